@@ -1,3 +1,4 @@
+import io
 import os
 import discord
 import ssl
@@ -9,10 +10,12 @@ from discord.ext import commands
 from dotenv import load_dotenv
 from features.player_tracker import PlayerTracker
 from utils.rcon_client import RCONClient
+from utils.rcon_scheduler import PRIORITY_PLAYER
 from utils.ftp_handler import FTPHandler
 from features.build_limit import BuildLimitTracker
 from features.classement_player import KillTracker
 from features.player_sync import PlayerSync
+from utils.log_events import EVENT_DEATH, EVENT_JOIN, EVENT_LEAVE
 from features.vote_tracker import VoteTracker
 from features.item_manager import ItemManager
 from database.init_database import init_database
@@ -63,6 +66,8 @@ async def on_ready():
         bot.build_tracker = BuildLimitTracker(bot=bot, channel_id=BUILD_CHANNEL_ID, ftp_handler=ftp_handler)
         bot.kill_tracker = KillTracker(bot=bot, channel_id=KILLS_CHANNEL_ID)
         bot.player_sync = PlayerSync(bot, LOG_FILE_PATH, ftp_handler=ftp_handler)
+        bot.player_sync.log_events.subscribe((EVENT_JOIN, EVENT_LEAVE), bot.player_tracker.on_connection_events)
+        bot.player_sync.log_events.subscribe(EVENT_DEATH, bot.kill_tracker.on_death_events, transactional=True)
         bot.vote_tracker = VoteTracker(bot, TOP_SERVER_CHANNEL_ID, SERVER_PRIVE_CHANNEL_ID, ftp_handler=ftp_handler)
         bot.item_manager = ItemManager(bot, ftp_handler=ftp_handler)
 
@@ -115,13 +120,15 @@ async def check_rcon(ctx):
     """Vérifie la connexion RCON"""
     if ctx.author.guild_permissions.administrator:
         try:
-            response = rcon_client.execute("version")
+            response = await rcon_client.execute("version")
             if response:
                 await ctx.send(f"✅ Connexion RCON OK\nRéponse: {response}")
             else:
                 await ctx.send("❌ Pas de réponse du serveur RCON")
         except Exception as e:
             await ctx.send(f"❌ Erreur RCON: {e}")
+            if rcon_client.last_error:
+                await ctx.send(f"État de la connexion: {rcon_client.state} - dernière erreur: {rcon_client.last_error}")
     else:
         await ctx.send("Vous n'avez pas la permission d'utiliser cette commande")
 
@@ -223,63 +230,12 @@ async def starterpack_command(ctx):
             return
 
         # Vérifier si le joueur est connecté
-        online_players = bot.player_tracker.rcon_client.get_online_players()
-        
-        # Log la liste des joueurs connectés pour le débogage
-        logger.info(f"Joueurs en ligne: {online_players}")
-        
-        # Vérifier que la liste des joueurs est valide
-        is_valid_player_list = True
-        for player in online_players:
-            if "Couldn't find the command" in player or "Try \"help\"" in player:
-                is_valid_player_list = False
-                logger.error(f"Erreur dans la liste des joueurs: {player}")
-                break
-        
-        if not is_valid_player_list:
-            # Récupérer directement avec ListPlayers pour contourner le problème
-            try:
-                resp = bot.player_tracker.rcon_client.execute("ListPlayers")
-                logger.info(f"Réponse directe de ListPlayers: {resp}")
-                
-                # Extraction manuelle des noms de personnages
-                online_players = []
-                lines = resp.splitlines()
-                
-                # Ignorer la ligne d'en-tête
-                if lines and ("Idx" in lines[0] or "Char name" in lines[0]):
-                    lines = lines[1:]
-                
-                for line in lines:
-                    if not line.strip():
-                        continue
-                    if "|" in line:
-                        parts = line.split("|")
-                        if len(parts) >= 2:
-                            char_name = parts[1].strip()
-                            if char_name and char_name != "Char name":
-                                online_players.append(char_name)
-                                logger.info(f"Joueur extrait manuellement: {char_name}")
-            except Exception as e:
-                logger.error(f"Erreur lors de l'extraction manuelle des joueurs: {e}")
-        
-        # Option de débogage: afficher la liste des joueurs en ligne
-        await ctx.send(f"ℹ️ Joueurs connectés: {', '.join(online_players)}")
-        
-        # Vérifier si le joueur est en ligne en utilisant ListPlayers et le Steam ID
-        resp = bot.player_tracker.rcon_client.execute("ListPlayers")
-        logger.info(f"Vérification de la présence du joueur avec Steam ID {steam_id}")
-        
-        is_player_online = False
-        if resp and steam_id:
-            lines = resp.splitlines()
-            for line in lines:
-                if steam_id in line:
-                    is_player_online = True
-                    logger.info(f"Joueur avec Steam ID {steam_id} trouvé en ligne: {line}")
-                    break
-        
-        if not is_player_online:
+        # Liste partagée des joueurs connectés (une seule requête ListPlayers, mise en cache)
+        roster = await bot.player_tracker.rcon_client.roster.get(priority=PRIORITY_PLAYER)
+        logger.info(f"Joueurs en ligne: {roster.names}")
+        await ctx.send(f"ℹ️ Joueurs connectés: {', '.join(roster.names)}")
+        online_player = await bot.player_tracker.rcon_client.roster.find(steam_id=steam_id, priority=PRIORITY_PLAYER)
+        if online_player is None:
             await ctx.send(f"❌ Vous devez être connecté au serveur avec votre personnage '{player_name}' pour recevoir votre pack de départ.")
             return
 
@@ -393,5 +349,22 @@ async def kills_status_command(ctx):
         await ctx.send(f"❌ Erreur: {str(e)}")
         print(f"Erreur kills_status_command: {e}")
 
+@bot.command(name='ftpstats')
+async def ftp_stats_command(ctx, format: str = None):
+    """Affiche les durées, débits et compteurs FTP (!ftpstats json pour l'export complet)"""
+    if not ctx.author.guild_permissions.administrator:
+        await ctx.send("Vous n'avez pas la permission d'utiliser cette commande")
+        return
+    try:
+        if format == 'json':
+            data = io.BytesIO(ftp_handler.metrics.to_json().encode('utf-8'))
+            await ctx.send("📊 Métriques FTP", file=discord.File(data, filename='ftp_metrics.json'))
+            return
+        summary = "\n".join(ftp_handler.metrics.summary_lines())
+        # Limite de 2000 caractères par message Discord
+        await ctx.send(f"📊 **Métriques FTP**\n```\n{summary[:1900]}\n```")
+    except Exception as e:
+        await ctx.send(f"❌ Erreur lors de la lecture des métriques FTP: {e}")
+
 # Lancer le bot
 bot.run(DISCORD_TOKEN) 
\ No newline at end of file
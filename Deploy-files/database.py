@@ -2,8 +2,6 @@
 import sqlite3
 import os
 from dotenv import load_dotenv
-import tempfile
-import uuid
 import logging
 
 load_dotenv()
@@ -11,22 +9,7 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 # --------------------------
-# 1) Charger les créer un fichier temporaire
-# --------------------------
-def _load_db_from_bytes(db_bytes: bytes) -> str:
-    """
-    Écrit db_bytes dans un fichier temporaire sur disque, et renvoie son chemin.
-    Il faut fermer le fichier avant de l'ouvrir avec sqlite3 sur Windows.
-    """
-    tmp_dir = tempfile.gettempdir()
-    tmp_name = f"conan_db_{uuid.uuid4().hex}.db"
-    tmp_path = os.path.join(tmp_dir, tmp_name)
-    with open(tmp_path, 'wb') as f:
-        f.write(db_bytes)
-    return tmp_path
-
-# --------------------------
-# 2) Compter le nombre de pièce par joueur
+# 1) Compter le nombre de pièce par joueur
 # --------------------------
 class DatabaseManager:
     def __init__(self):
@@ -44,15 +27,8 @@ class DatabaseManager:
         - building_types: liste des types de constructions
         """
         try:
-            # Lire la base de données depuis le FTP
-            db_data = ftp_handler.read_database(self.remote_db)
-            if db_data is None:
-                print("❌ Impossible de lire la base de données depuis le FTP")
-                return []
-
-            # Créer un fichier temporaire pour la base de données
-            temp_path = _load_db_from_bytes(db_data)
-            conn = sqlite3.connect(temp_path)
+            # Copie locale de la base, retéléchargée seulement si le serveur a sauvegardé
+            conn = ftp_handler.get_snapshot(self.remote_db).connect()
             cur = conn.cursor()
 
             # Récupérer les noms des clans
@@ -107,7 +83,6 @@ class DatabaseManager:
                 })
 
             conn.close()
-            os.remove(temp_path)
             return results
 
         except Exception as e:
@@ -123,15 +98,8 @@ class DatabaseManager:
         - solo_players: liste des joueurs sans clan
         """
         try:
-            # Lire la base de données depuis le FTP
-            db_data = ftp_handler.read_database(self.remote_db)
-            if db_data is None:
-                print("❌ Impossible de lire la base de données depuis le FTP")
-                return []
-
-            # Créer un fichier temporaire pour la base de données
-            temp_path = _load_db_from_bytes(db_data)
-            conn = sqlite3.connect(temp_path)
+            # Copie locale de la base, retéléchargée seulement si le serveur a sauvegardé
+            conn = ftp_handler.get_snapshot(self.remote_db).connect()
             cur = conn.cursor()
 
             # Requête pour obtenir les clans et leurs membres
@@ -182,7 +150,6 @@ class DatabaseManager:
                 })
 
             conn.close()
-            os.remove(temp_path)
             return results
 
         except Exception as e:
@@ -191,7 +158,6 @@ class DatabaseManager:
 
     def get_player_stats(self, ftp_handler):
         """Récupère les statistiques des joueurs depuis la base de données du jeu"""
-        temp_db_path = None
         conn = None
         try:
             # Utiliser le chemin depuis les variables d'environnement
@@ -200,17 +166,8 @@ class DatabaseManager:
                 logger.error("FTP_DB_PATH non défini dans les variables d'environnement")
                 return []
             
-            # Lire la base de données depuis le FTP
-            db_bytes = ftp_handler.read_database(game_db_path)
-            if not db_bytes:
-                logger.error("Impossible de lire la base de données du jeu")
-                return []
-            
-            # Écrire la base de données dans un fichier temporaire
-            temp_db_path = _load_db_from_bytes(db_bytes)
-            
-            # Se connecter à la base de données
-            conn = sqlite3.connect(temp_db_path)
+            # Se connecter à la copie locale de la base, rafraîchie seulement si elle a changé
+            conn = ftp_handler.get_snapshot(game_db_path).connect()
             cursor = conn.cursor()
             
             # Requête pour obtenir les statistiques des joueurs
@@ -246,10 +203,3 @@ class DatabaseManager:
                     conn.close()
                 except Exception as e:
                     logger.error(f"Erreur lors de la fermeture de la connexion: {str(e)}")
-            
-            # Supprimer le fichier temporaire
-            if temp_db_path and os.path.exists(temp_db_path):
-                try:
-                    os.remove(temp_db_path)
-                except Exception as e:
-                    logger.error(f"Erreur lors de la suppression du fichier temporaire: {str(e)}")
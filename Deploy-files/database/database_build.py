@@ -1,15 +1,6 @@
 import os
-import sqlite3
 from utils.ftp_handler import FTPHandler
 
-def _load_db_from_bytes(db_data):
-    """Crée un fichier temporaire avec les données de la base de données"""
-    import tempfile
-    temp = tempfile.NamedTemporaryFile(delete=False)
-    temp.write(db_data)
-    temp.close()
-    return temp.name
-
 class DatabaseBuildManager:
     def __init__(self):
         """Initialise le chemin de la base de données sur le FTP"""
@@ -26,15 +17,8 @@ class DatabaseBuildManager:
         - building_types: liste des types de constructions
         """
         try:
-            # Lire la base de données depuis le FTP
-            db_data = ftp_handler.read_database(self.remote_db)
-            if db_data is None:
-                print("❌ Impossible de lire la base de données depuis le FTP")
-                return []
-
-            # Créer un fichier temporaire pour la base de données
-            temp_path = _load_db_from_bytes(db_data)
-            conn = sqlite3.connect(temp_path)
+            # Copie locale de la base, retéléchargée seulement si le serveur a sauvegardé
+            conn = ftp_handler.get_snapshot(self.remote_db).connect()
             cur = conn.cursor()
 
             # Récupérer les noms des clans
@@ -89,9 +73,12 @@ class DatabaseBuildManager:
                 })
 
             conn.close()
-            os.remove(temp_path)
             return results
 
         except Exception as e:
             print(f"❌ Erreur dans get_constructions_by_player: {e}")
             return []
+
+    def get_snapshot_date(self, ftp_handler: FTPHandler):
+        """Date de la sauvegarde du serveur utilisée par le dernier rapport"""
+        return ftp_handler.get_snapshot(self.remote_db).last_modified
@@ -25,6 +25,15 @@ class DatabaseClassement:
                 last_death TIMESTAMP
             )
         ''')
+        # Kills déjà comptés, pour ignorer un même événement reçu deux fois (log relu, RCON)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS kill_events (
+                timestamp TIMESTAMP NOT NULL,
+                killer TEXT NOT NULL,
+                victim TEXT NOT NULL,
+                PRIMARY KEY (timestamp, killer, victim)
+            )
+        ''')
         conn.commit()
         conn.close()
 
@@ -46,6 +55,103 @@ class DatabaseClassement:
         finally:
             conn.close()
 
+    def valid_players(self, player_names) -> set:
+        """Noms parmi player_names présents dans la table characters du jeu (une seule requête)"""
+        names = list(set(player_names))
+        if not names:
+            return set()
+        conn = sqlite3.connect(self.game_db_path)
+        try:
+            rows = conn.execute(
+                f"SELECT char_name FROM characters WHERE char_name IN ({','.join('?' * len(names))})", names
+            ).fetchall()
+            return {row[0] for row in rows}
+        except Exception as e:
+            # Pas d'ensemble vide : le lot de kills serait validé sans eux, puis jamais relu
+            logger.error(f"Erreur lors de la vérification des joueurs {names}: {e}")
+            raise
+        finally:
+            conn.close()
+
+    def record_kills(self, kills, conn=None, retention_days=7) -> int:
+        """Applique un lot de kills au classement en une transaction.
+
+        kills contient des tuples (timestamp, killer_id, killer_name, victim_id, victim_name) ;
+        killer_id vide pour une mort sans tueur joueur (PNJ, chute...). Les doublons
+        (timestamp, tueur, victime) sont ignorés, dans le lot comme d'un lot à l'autre.
+        Avec conn, les écritures rejoignent la transaction de l'appelant, qui la valide.
+        Une erreur de lecture de game.db fait échouer tout le lot, qui sera relu.
+        Retourne le nombre de kills appliqués.
+        """
+        unique = {}
+        for kill in kills:
+            timestamp, killer_id, killer_name, victim_id, victim_name = kill
+            key = (timestamp.isoformat(sep=' '), killer_id or killer_name or '', victim_id or victim_name)
+            unique.setdefault(key, kill)
+        if not unique:
+            return 0
+
+        own_connection = conn is None
+        if own_connection:
+            conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        try:
+            keys = sorted(unique)
+            c.execute('''
+                SELECT timestamp, killer, victim FROM kill_events
+                WHERE timestamp BETWEEN ? AND ?
+            ''', (keys[0][0], keys[-1][0]))
+            seen = set(c.fetchall())
+            keys = [key for key in keys if key not in seen]
+
+            # Même règle que update_kill_stats : un kill n'est compté que si le tueur est un joueur
+            valid = self.valid_players(unique[key][2] for key in keys if unique[key][1])
+            killers, victims = {}, {}
+            applied = []
+            for key in keys:
+                timestamp, killer_id, killer_name, victim_id, victim_name = unique[key]
+                if killer_id:
+                    if killer_name not in valid:
+                        logger.info(f"Kill ignoré car {killer_name} n'est pas un joueur valide")
+                        continue
+                    count, _, _ = killers.get(killer_id, (0, None, None))
+                    killers[killer_id] = (count + 1, killer_name, key[0])
+                count, _, _ = victims.get(victim_id, (0, None, None))
+                victims[victim_id] = (count + 1, victim_name, key[0])
+                applied.append(key)
+
+            # Seuls les kills appliqués sont marqués comme vus : un kill ignoré peut être repris à une relecture
+            c.executemany('INSERT OR IGNORE INTO kill_events (timestamp, killer, victim) VALUES (?, ?, ?)', applied)
+            c.executemany('''
+                INSERT INTO classement (player_id, player_name, kills, last_kill)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(player_id) DO UPDATE SET
+                    kills = kills + excluded.kills,
+                    last_kill = excluded.last_kill,
+                    player_name = excluded.player_name
+            ''', [(player_id, name, count, last) for player_id, (count, name, last) in killers.items()])
+            c.executemany('''
+                INSERT INTO classement (player_id, player_name, deaths, last_death)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(player_id) DO UPDATE SET
+                    deaths = deaths + excluded.deaths,
+                    last_death = excluded.last_death,
+                    player_name = excluded.player_name
+            ''', [(player_id, name, count, last) for player_id, (count, name, last) in victims.items()])
+            c.execute("DELETE FROM kill_events WHERE timestamp < datetime('now', ?)", (f'-{retention_days} days',))
+
+            if own_connection:
+                conn.commit()
+            return sum(count for count, _, _ in killers.values())
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement des kills: {e}")
+            if own_connection:
+                conn.rollback()
+            raise
+        finally:
+            if own_connection:
+                conn.close()
+
     def update_kill_stats(self, killer_id: str, killer_name: str, victim_id: str, victim_name: str, is_kill: bool = True):
         """Met à jour les statistiques de kills dans la base de données"""
         # Vérifier si le tueur est un joueur valide
@@ -0,0 +1,71 @@
+import sqlite3
+import logging
+from datetime import datetime
+from config.logging_config import setup_logging
+
+logger = setup_logging()
+
+class DatabaseLogCursor:
+    def __init__(self):
+        """Initialise la table des curseurs de lecture des logs du serveur"""
+        self.db_path = 'discord.db'
+        self._initialize_db()
+
+    def _initialize_db(self):
+        """Crée la table log_cursors si elle n'existe pas"""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        try:
+            # identity : empreinte de la première ligne du log (change à chaque redémarrage du serveur)
+            # position : octets de lignes complètes déjà traités
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS log_cursors (
+                    name TEXT PRIMARY KEY,
+                    identity TEXT,
+                    size INTEGER,
+                    position INTEGER NOT NULL DEFAULT 0,
+                    last_event_at TIMESTAMP,
+                    updated_at TIMESTAMP
+                )
+            ''')
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'initialisation de la table log_cursors: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def connect(self):
+        """Connexion pour une transaction qui enregistre le curseur avec les effets du lot traité"""
+        return sqlite3.connect(self.db_path)
+
+    def load(self, name: str):
+        """Retourne (identity, size, position, last_event_at) ou None si aucun curseur n'est enregistré"""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        try:
+            c.execute('SELECT identity, size, position, last_event_at FROM log_cursors WHERE name = ?', (name,))
+            row = c.fetchone()
+            if row is None:
+                return None
+            identity, size, position, last_event_at = row
+            return identity, size, position, datetime.fromisoformat(last_event_at) if last_event_at else None
+        except Exception as e:
+            logger.error(f"Erreur lors de la lecture du curseur {name}: {e}")
+            raise
+        finally:
+            conn.close()
+
+    def save(self, conn, name: str, identity: str, size: int, position: int, last_event_at=None):
+        """Enregistre le curseur dans la transaction de conn (validée par l'appelant)"""
+        conn.execute('''
+            INSERT INTO log_cursors (name, identity, size, position, last_event_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE SET
+                identity = excluded.identity,
+                size = excluded.size,
+                position = excluded.position,
+                last_event_at = excluded.last_event_at,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (name, identity, size, position, last_event_at.isoformat() if last_event_at else None))
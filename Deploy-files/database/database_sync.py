@@ -83,9 +83,14 @@ class DatabaseSync:
         finally:
             conn.close()
 
-    def verify_player(self, discord_id: str, player_name: str, player_id: str, steam_id: str = None):
-        """Vérifie et met à jour les informations du joueur"""
-        conn = sqlite3.connect(self.db_path)
+    def verify_player(self, discord_id: str, player_name: str, player_id: str, steam_id: str = None, conn=None):
+        """Vérifie et met à jour les informations du joueur.
+
+        Avec conn, la mise à jour rejoint la transaction de l'appelant, qui la valide.
+        """
+        own_connection = conn is None
+        if own_connection:
+            conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
         try:
             c.execute('''
@@ -100,14 +105,17 @@ class DatabaseSync:
                 WHERE discord_id = ?
                 AND verification_code IS NOT NULL
             ''', (player_name, player_id, steam_id, discord_id))
-            conn.commit()
+            if own_connection:
+                conn.commit()
             return c.rowcount > 0
         except Exception as e:
             logger.error(f"Erreur lors de la vérification du joueur: {e}")
-            conn.rollback()
+            if own_connection:
+                conn.rollback()
             raise
         finally:
-            conn.close()
+            if own_connection:
+                conn.close()
 
     def get_verification_code(self, discord_id: str):
         """Récupère le code de vérification pour un utilisateur Discord"""
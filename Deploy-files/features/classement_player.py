@@ -60,6 +60,20 @@ class KillTracker:
             logger.error(f"Erreur lors de la mise à jour des stats: {e}")
             raise
 
+    def on_death_events(self, events, conn):
+        """Abonné transactionnel aux morts du log : le lot est écrit avec le curseur du log"""
+        kills = []
+        for event in events:
+            if event.timestamp is None:
+                # L'horodatage fait partie de la clé de dédoublonnage : sans lui, une relecture compterait le kill deux fois
+                logger.warning(f"Mort ignorée, ligne sans horodatage: {event.line}")
+                continue
+            # killer_id n'est présent que pour un tueur joueur ; un PNJ (killer_name) ne compte qu'une mort
+            kills.append((event.timestamp, event.get('killer_id'),
+                          event.get('killer') or event.get('killer_name'), event['victim_id'], event['victim']))
+        applied = self.db.record_kills(kills, conn)
+        logger.info(f"{len(kills)} mort(s) lue(s) dans le log, {applied} kill(s) ajouté(s) au classement")
+
     def get_kill_stats(self):
         """Récupère les statistiques de kills triées par nombre de kills"""
         try:
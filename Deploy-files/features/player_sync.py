@@ -1,26 +1,42 @@
 import logging
 import random
 import string
-import re
 import sqlite3
 from datetime import datetime, timedelta
 from discord.ext import tasks
 from config.logging_config import setup_logging
 from database.database_sync import DatabaseSync
+from database.database_log_cursor import DatabaseLogCursor
 from utils.ftp_handler import FTPHandler
+from utils.log_follower import LogFollower
+from utils.log_events import EVENT_CHAT, LogEventPipeline
 
 logger = setup_logging()
 
 class PlayerSync:
+    # Échecs consécutifs d'un même lot avant de l'abandonner pour ne pas bloquer la lecture du log
+    MAX_BATCH_FAILURES = 3
+
     def __init__(self, bot, log_file_path, ftp_handler=None):
         """Initialise le système de synchronisation des joueurs"""
         self.bot = bot
         self.log_file_path = log_file_path
         self.ftp = ftp_handler or FTPHandler()
+        self.log_follower = LogFollower(self.ftp, log_file_path)
         self.db = DatabaseSync()
         self.game_db_path = 'game.db'
         self.verification_codes = {}
         self.verification_timeouts = {}
+        # Événements du log diffusés aux abonnés (vérification, suivi des joueurs...)
+        self.log_events = LogEventPipeline()
+        self.log_events.subscribe(EVENT_CHAT, self.check_verifications, transactional=True)
+        # Curseur du log en base : un redémarrage du bot reprend là où il s'était arrêté
+        self.cursor_db = DatabaseLogCursor()
+        self.cursor_loaded = False
+        self.last_event_at = None
+        self._replay_since = None  # Filtre horaire du premier lot, si le curseur n'a pas pu être repris
+        self._batch_failures = 0
+        self._verified_users = []  # Confirmations à envoyer une fois le lot validé
         logger.info("PlayerSync initialisé")
 
     def generate_verification_code(self, length=8):
@@ -43,74 +59,114 @@ class PlayerSync:
             logger.error(f"Erreur lors de la génération du code de vérification: {e}")
             await ctx.send("❌ Une erreur est survenue lors de la génération du code de vérification.")
 
-    def parse_log_line(self, line):
-        """Parse une ligne de log pour extraire les informations du joueur"""
-        try:
-            # Format attendu : [2025.06.01-17.57.38:972][555]ChatWindow: Character pago-fraise (uid 12364, player 76561198276177053) said: message
-            match = re.search(r'Character ([^()]+) \(uid (\d+), player (\d+)\) said: (.+)', line)
-            if match:
-                char_name = match.group(1).strip()
-                uid = match.group(2)
-                steam_id = match.group(3)
-                message = match.group(4).strip()
-                return char_name, uid, steam_id, message
-        except Exception as e:
-            logger.error(f"Erreur lors du parsing de la ligne de log: {e}")
-        return None, None, None, None
+    async def resume_from_cursor(self):
+        """Reprend la lecture du log à la position enregistrée si le fichier n'a pas changé"""
+        saved = self.cursor_db.load(self.log_file_path)
+        if saved is not None:
+            identity, size, position, last_event_at = saved
+            self.last_event_at = last_event_at
+            if await self.ftp.aio.run(lambda: self.log_follower.resume(identity, position)):
+                logger.info(f"Reprise de la lecture du log à l'octet {position}")
+            else:
+                logger.info("Le log a changé depuis le dernier curseur (redémarrage du serveur), lecture depuis le début")
+                # Sans position d'octet fiable, seuls les événements postérieurs au dernier traité sont diffusés
+                self._replay_since = last_event_at
+        self.cursor_loaded = True
 
     @tasks.loop(seconds=5)
     async def check_logs(self):
-        """Vérifie les logs pour les codes de vérification"""
+        """Lit les nouvelles lignes du log et diffuse les événements aux abonnés"""
         try:
-            # Lire les logs
-            log_content = self.ftp.read_database(self.log_file_path)
-            if not log_content:
-                logger.error("Impossible de lire les logs")
+            if not self.cursor_loaded:
+                await self.resume_from_cursor()
+
+            # Lire uniquement les lignes ajoutées au log depuis le dernier passage,
+            # dans un thread du FTP pour ne pas bloquer la boucle Discord
+            before = self.log_follower.state()
+            new_lines = await self.ftp.aio.run(lambda: list(self.log_follower.follow()))
+            if not new_lines:
                 return
 
-            # Convertir en texte et filtrer les lignes de chat
-            log_text = log_content.decode('utf-8', errors='ignore')
-            chat_lines = [line for line in log_text.splitlines() if 'ChatWindow' in line]
-            logger.info(f"Nombre de lignes de chat trouvées: {len(chat_lines)}")
-
-            # Récupérer tous les codes de vérification en attente
-            pending_verifications = self.db.get_pending_verifications()
-            logger.info(f"Vérifications en attente: {len(pending_verifications)}")
-
-            for discord_id, code in pending_verifications:
-                logger.info(f"Recherche du code {code} pour l'utilisateur {discord_id}")
-                
-                # Chercher le code dans les lignes de chat
-                for line in chat_lines:
-                    if code in line:
-                        logger.info(f"Code trouvé dans la ligne: {line}")
-                        
-                        # Extraire les informations du joueur
-                        char_name, uid, steam_id, message = self.parse_log_line(line)
-                        if char_name and uid and message:
-                            logger.info(f"Informations extraites - Nom: {char_name}, UID: {uid}, Steam ID: {steam_id}, Message: {message}")
-                            
-                            # Vérifier que le message correspond exactement au code
-                            if message == code:
-                                # Vérifier le joueur
-                                if self.db.verify_player(discord_id, char_name, uid, steam_id):
-                                    logger.info(f"Joueur vérifié avec succès: {char_name} (UID: {uid}, Steam ID: {steam_id})")
-                                    # Envoyer un message de confirmation
-                                    user = self.bot.get_user(int(discord_id))
-                                    if user:
-                                        await user.send(f"✅ Votre compte a été vérifié avec succès!\n")
-                                else:
-                                    logger.error(f"Échec de la vérification pour {char_name} (UID: {uid})")
-                            else:
-                                logger.info(f"Message ne correspond pas au code attendu: {message} != {code}")
-                        else:
-                            logger.error(f"Impossible d'extraire les informations de la ligne: {line}")
+            # Les écritures des abonnés et le nouveau curseur sont validés ensemble :
+            # après un arrêt, un lot est soit entièrement appliqué, soit relu
+            conn = self.cursor_db.connect()
+            self._verified_users = []
+            try:
+                # Le curseur d'octets, validé dans la même transaction, suffit à ne pas relire un événement
+                events = await self.log_events.process(new_lines, conn, since=self._replay_since)
+                last_event_at = max((event.timestamp for event in events if event.timestamp), default=None)
+                if last_event_at is None or (self.last_event_at and self.last_event_at > last_event_at):
+                    last_event_at = self.last_event_at
+                self.cursor_db.save(conn, self.log_file_path, self.log_follower.identity,
+                                    self.log_follower.size, self.log_follower.position, last_event_at)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                self._batch_failures += 1
+                if self._batch_failures < self.MAX_BATCH_FAILURES:
+                    # Le même lot sera relu au prochain passage
+                    self.log_follower.restore(before)
+                    raise
+                logger.error(f"Lot de {len(new_lines)} lignes abandonné après {self._batch_failures} échecs: {e}")
+                self._save_cursor_only()
+                return
+            finally:
+                conn.close()
+            self._batch_failures = 0
+            self.last_event_at = last_event_at
+            self._replay_since = None
 
+            for discord_id in self._verified_users:
+                # Envoyer un message de confirmation
+                user = self.bot.get_user(int(discord_id))
+                if user:
+                    await user.send(f"✅ Votre compte a été vérifié avec succès!\n")
         except Exception as e:
-            logger.error(f"Erreur lors de la vérification des logs: {e}")
+            logger.error(f"Erreur lors de la lecture des logs: {e}")
             import traceback
             logger.error(traceback.format_exc())
 
+    def _save_cursor_only(self):
+        """Avance le curseur sans les effets du lot (lot abandonné)"""
+        self._batch_failures = 0
+        self._replay_since = None
+        conn = self.cursor_db.connect()
+        try:
+            self.cursor_db.save(conn, self.log_file_path, self.log_follower.identity,
+                                self.log_follower.size, self.log_follower.position, self.last_event_at)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def check_verifications(self, events, conn=None):
+        """Cherche les codes de vérification dans les messages du chat"""
+        logger.info(f"Nombre de lignes de chat trouvées: {len(events)}")
+
+        # Codes en attente indexés par code : chaque message est comparé une seule fois,
+        # quel que soit le nombre d'inscriptions en cours
+        pending = {code: discord_id for discord_id, code in self.db.get_pending_verifications()}
+        logger.info(f"Vérifications en attente: {len(pending)}")
+
+        for event in events:
+            if not pending:
+                break
+            # Le message doit correspondre exactement au code ; les autres champs ne
+            # sont extraits que pour le message qui correspond
+            message = event['message']
+            discord_id = pending.pop(message, None)
+            if discord_id is None:
+                continue
+            char_name, uid, steam_id = event['char_name'], event['uid'], event['steam_id']
+            logger.info(f"Code trouvé dans la ligne: {event.line}")
+            logger.info(f"Informations extraites - Nom: {char_name}, UID: {uid}, Steam ID: {steam_id}, Message: {message}")
+
+            # Vérifier le joueur (validé avec le curseur du log)
+            if self.db.verify_player(discord_id, char_name, uid, steam_id, conn=conn):
+                logger.info(f"Joueur vérifié avec succès: {char_name} (UID: {uid}, Steam ID: {steam_id})")
+                self._verified_users.append(discord_id)
+            else:
+                logger.error(f"Échec de la vérification pour {char_name} (UID: {uid})")
+
     async def start(self):
         """Démarre le système de synchronisation"""
         self.check_logs.start()
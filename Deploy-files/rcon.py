@@ -1,9 +1,14 @@
 # rcon.py
 
 import socket, struct, os, time
+import hashlib
+import re
+from collections import Counter
 from dotenv import load_dotenv
 import logging
 import asyncio
+from utils.log_events import EVENT_DEATH, EVENT_PATTERNS, LogEventPipeline
+from utils.player_list import parse_list_players
 
 # Configuration du logging
 logging.basicConfig(level=logging.DEBUG)
@@ -11,6 +16,101 @@ logger = logging.getLogger('rcon')
 
 load_dotenv()
 
+# Horodatage en tête des lignes de getlastlog : [2025.06.01-17.57.38:972]
+# (largeur fixe, donc comparable comme une chaîne)
+_LINE_TIMESTAMP = re.compile(r'\[(\d{4}\.\d\d\.\d\d-\d\d\.\d\d\.\d\d:\d{3})\]')
+
+
+class LogCursor:
+    """Position dans le flux de getlastlog : dernier horodatage traité et lignes déjà vues à cet horodatage.
+
+    getlastlog renvoie une fenêtre glissante des dernières lignes. Plusieurs lignes
+    peuvent partager le même horodatage (et même être identiques) : le curseur
+    garde le multiensemble des empreintes des lignes vues à cet horodatage, pour
+    ne rejeter que celles-là et pas les nouvelles lignes arrivées dans la même
+    milliseconde.
+    """
+
+    def __init__(self):
+        self.timestamp = None
+        self.seen = Counter()    # empreinte -> occurrences déjà traitées à self.timestamp
+
+    @staticmethod
+    def digest(line):
+        return hashlib.blake2b(line.encode('utf-8', errors='ignore'), digest_size=8).digest()
+
+    def unseen(self, lines):
+        """Lignes de lines pas encore traitées, dans l'ordre, et avance le curseur après elles.
+
+        Les lignes sont parcourues depuis la fin jusqu'à la première plus ancienne
+        que le curseur : la partie déjà traitée de la fenêtre n'est pas analysée.
+        Une ligne sans horodatage (suite d'un message) prend celui de la ligne précédente.
+        """
+        # Horodatages calculés de la fin vers le début : on ne sait qu'ensuite
+        # à quelle ligne horodatée se rattache une ligne de continuation
+        tail = []
+        pending = []
+        for line in reversed(lines):
+            match = _LINE_TIMESTAMP.match(line)
+            if match is None:
+                pending.append(line)
+                continue
+            timestamp = match.group(1)
+            if self.timestamp is not None and timestamp < self.timestamp:
+                pending = []
+                break
+            tail.append((timestamp, line))
+            tail.extend((timestamp, continuation) for continuation in pending)
+            pending = []
+        # Lignes de continuation en tête de fenêtre : leur ligne horodatée est sortie de la fenêtre
+        tail.reverse()
+
+        fresh = []
+        current = Counter()
+        for timestamp, line in tail:
+            if timestamp == self.timestamp:
+                key = self.digest(line)
+                current[key] += 1
+                if current[key] <= self.seen[key]:
+                    continue
+            fresh.append(line)
+
+        if tail:
+            last = tail[-1][0]
+            if last == self.timestamp:
+                self.seen = self.seen | current
+            else:
+                self.timestamp = last
+                self.seen = Counter(self.digest(line) for timestamp, line in tail if timestamp == last)
+        return fresh
+
+
+class EventSubscription:
+    """Abonné au flux d'événements : file bornée consommée par sa propre tâche"""
+
+    def __init__(self, callback, event_types=None, maxsize=100):
+        self.callback = callback
+        self.event_types = frozenset((event_types,) if isinstance(event_types, str) else event_types or ())
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.task = None
+
+    def wants(self, event):
+        return not self.event_types or event.type in self.event_types
+
+    async def run(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                result = self.callback(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Erreur d'un abonné aux événements RCON ({getattr(self.callback, '__name__', self.callback)}): {e}")
+            finally:
+                self.queue.task_done()
+
+
 class RconClient:
     def __init__(self):
         """Initialise le client RCON"""
@@ -20,7 +120,13 @@ class RconClient:
         self.timeout = 10.0
         self.sock = None
         self.connected = False
-        self.event_callbacks = []
+        self.subscriptions = []
+        self.log_cursor = LogCursor()
+        self.log_events = LogEventPipeline(EVENT_PATTERNS)
+        self._monitoring = False
+        self.poll_interval = float(os.getenv('RCON_EVENTS_INTERVAL', '2'))
+        # Attente maximale, par relevé, de la place dans les files des abonnés lents
+        self.publish_timeout = float(os.getenv('RCON_EVENTS_PUBLISH_TIMEOUT', '0.5'))
         self.max_retries = 3
         self.retry_delay = 5
 
@@ -185,16 +291,8 @@ class RconClient:
             if not resp:
                 return []
             
-            # Parser la réponse
-            players = []
-            for line in resp.split('\n'):
-                if line.strip():
-                    # Extraire le nom du joueur (dernier élément de la ligne)
-                    parts = line.strip().split()
-                    if parts:
-                        players.append(parts[-1])
-            
-            return players
+            # Parser la réponse (même analyseur que utils.rcon_client)
+            return parse_list_players(resp).names
             
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des joueurs: {e}")
@@ -223,52 +321,93 @@ class RconClient:
             self.connected = False
             return False
 
+    def subscribe(self, callback, event_types=None, maxsize=100):
+        """Abonne callback(event) (fonction ou coroutine) aux événements des types donnés (tous par défaut).
+
+        Chaque abonné a sa file bornée et sa tâche : un abonné lent ne retarde
+        pas les autres ni la lecture des logs.
+        """
+        subscription = EventSubscription(callback, event_types, maxsize)
+        self.subscriptions.append(subscription)
+        # Seuls les motifs des types demandés par au moins un abonné sont essayés
+        types = set()
+        for entry in self.subscriptions:
+            types |= entry.event_types or {event_type for event_type, _, _ in EVENT_PATTERNS}
+        self.log_events.unsubscribe(self._publish)
+        self.log_events.subscribe(types, self._publish)
+        if self._monitoring:
+            subscription.task = asyncio.create_task(subscription.run())
+        return subscription
+
     def add_event_callback(self, callback):
-        """Ajoute un callback pour recevoir les événements RCON"""
-        self.event_callbacks.append(callback)
+        """Ajoute un callback pour recevoir les kills au format d'origine.
+
+        callback reçoit {'type': 'kill', 'killer', 'victim', 'timestamp'} pour chaque
+        mort avec un tueur ; les nouveaux abonnés utilisent subscribe() et LogEvent.
+        """
+        async def legacy(event):
+            killer = event.get('killer') or event.get('killer_name')
+            if not killer:
+                return
+            await callback({
+                'type': 'kill',
+                'killer': killer,
+                'victim': event['victim'],
+                # Texte, comme avant : l'ordre des chaînes suit l'ordre chronologique
+                'timestamp': event.timestamp.isoformat(sep=' ') if event.timestamp else None,
+            })
+        legacy.__name__ = getattr(callback, '__name__', 'callback')
+        return self.subscribe(legacy, EVENT_DEATH)
+
+    async def _publish(self, events):
+        """Dépose les événements dans les files des abonnés.
+
+        Une file pleine fait patienter le relevé au plus publish_timeout au total ;
+        au-delà, l'événement est perdu pour cet abonné seulement (compté dans dropped).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.publish_timeout
+        for subscription in self.subscriptions:
+            dropped = 0
+            for event in events:
+                if not subscription.wants(event):
+                    continue
+                try:
+                    subscription.queue.put_nowait(event)
+                    continue
+                except asyncio.QueueFull:
+                    pass
+                remaining = deadline - loop.time()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    await asyncio.wait_for(subscription.queue.put(event), remaining)
+                except asyncio.TimeoutError:
+                    dropped += 1
+            if dropped:
+                subscription.dropped += dropped
+                logger.warning(f"{dropped} événement(s) perdu(s) pour un abonné trop lent "
+                               f"({getattr(subscription.callback, '__name__', subscription.callback)}, "
+                               f"{subscription.dropped} au total)")
+
+    async def poll_events(self):
+        """Un relevé de getlastlog : analyse les seules lignes nouvelles et diffuse leurs événements"""
+        logs = await self.execute("getlastlog")
+        return await self.log_events.process(self.log_cursor.unseen(logs.splitlines()))
 
     async def monitor_events(self):
         """Démarre la surveillance des événements RCON"""
+        self._monitoring = True
+        for subscription in self.subscriptions:
+            if subscription.task is None or subscription.task.done():
+                subscription.task = asyncio.create_task(subscription.run())
         try:
-            last_timestamp = None
             while True:
                 try:
-                    # Récupérer les derniers logs
-                    logs = await self.execute("getlastlog")
-                    
-                    # Analyser les logs pour détecter les kills
-                    for line in logs.splitlines():
-                        if "Killed" in line:
-                            # Extraire le timestamp
-                            parts = line.split()
-                            current_timestamp = " ".join(parts[:2])
-                            
-                            # Ignorer les logs déjà traités
-                            if last_timestamp and current_timestamp <= last_timestamp:
-                                continue
-                                
-                            # Extraire les informations
-                            killer = parts[1]
-                            victim = parts[3]
-                            
-                            # Créer un événement
-                            event = {
-                                'type': 'kill',
-                                'killer': killer,
-                                'victim': victim,
-                                'timestamp': current_timestamp
-                            }
-                            
-                            # Notifier tous les callbacks
-                            for callback in self.event_callbacks:
-                                await callback(event)
-                            
-                            # Mettre à jour le timestamp
-                            last_timestamp = current_timestamp
-                    
+                    await self.poll_events()
                     # Attendre avant la prochaine vérification
-                    await asyncio.sleep(2)  # Augmenter l'intervalle pour éviter le rate limiting
-                    
+                    await asyncio.sleep(self.poll_interval)  # Intervalle suffisant pour éviter le rate limiting
+
                 except (BrokenPipeError, ConnectionResetError) as e:
                     logger.warning(f"Connexion perdue: {str(e)}")
                     # Réinitialiser la connexion
@@ -281,9 +420,16 @@ class RconClient:
                     await asyncio.sleep(5)  # Attendre plus longtemps en cas d'erreur
                     continue
 
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Erreur critique lors de la surveillance des événements: {str(e)}")
             raise
+        finally:
+            self._monitoring = False
+            for subscription in self.subscriptions:
+                if subscription.task is not None:
+                    subscription.task.cancel()
 
     def _ensure_connection(self):
         """S'assure que la connexion est établie"""
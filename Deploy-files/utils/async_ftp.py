@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.ftp_pool import cancellation
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFTPHandler:
+    """Façade asynchrone de FTPHandler.
+
+    Les opérations FTP (bloquantes) s'exécutent dans un pool de threads borné
+    pour ne jamais bloquer la boucle d'événements de Discord. Chaque appel a
+    un timeout ; un timeout ou une annulation interrompt le transfert en cours
+    au bloc suivant.
+    """
+
+    def __init__(self, ftp_handler, max_transfers=None, timeout=None):
+        self.ftp = ftp_handler
+        self.max_transfers = max_transfers or ftp_handler.pool.max_size
+        self.timeout = timeout or float(os.getenv('FTP_CALL_TIMEOUT', '300'))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_transfers, thread_name_prefix='ftp')
+        self._semaphore = asyncio.Semaphore(self.max_transfers)
+
+    def _call(self, event, func, args, kwargs):
+        """Exécute func dans le thread de travail avec son événement d'annulation"""
+        with cancellation(event):
+            return func(*args, **kwargs)
+
+    async def run(self, func, *args, timeout=None, **kwargs):
+        """Exécute une fonction bloquante utilisant le FTP, sans bloquer la boucle"""
+        timeout = self.timeout if timeout is None else timeout
+        event = threading.Event()
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._executor, functools.partial(self._call, event, func, args, kwargs)
+            )
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                event.set()
+                logger.error(f"Opération FTP {getattr(func, '__name__', func)} interrompue après {timeout}s")
+                raise
+            except asyncio.CancelledError:
+                event.set()
+                raise
+
+    async def read(self, remote_path: str, offset: int = 0, timeout=None) -> bytes:
+        """Lit un fichier distant (à partir d'un décalage éventuel)"""
+        return await self.run(self.ftp.read_from_offset, remote_path, offset, timeout=timeout)
+
+    async def stat(self, remote_path: str, timeout=None):
+        """Retourne (taille, MDTM) d'un fichier distant, ou None"""
+        return await self.run(self.ftp.stat, remote_path, timeout=timeout)
+
+    async def open_database(self, remote_path: str, timeout=None):
+        """Télécharge et ouvre une base distante en lecture seule"""
+        return await self.run(self.ftp.open_database, remote_path, timeout=timeout)
+
+    async def download(self, remote_path: str, local_path: str, timeout=None) -> bool:
+        """Télécharge un fichier distant sur le disque"""
+        return await self.run(self.ftp.download_file, remote_path, local_path, timeout=timeout)
+
+    async def upload(self, local_path: str, remote_path: str, timeout=None) -> bool:
+        """Envoie un fichier local sur le serveur"""
+        return await self.run(self.ftp.upload_file, local_path, remote_path, timeout=timeout)
+
+    async def list(self, remote_path: str = '.', timeout=None) -> list:
+        """Liste les fichiers d'un répertoire distant"""
+        return await self.run(self.ftp.list_files, remote_path, timeout=timeout)
+
+    async def index(self, root: str = '.', force=False, timeout=None) -> dict:
+        """Retourne l'index typé d'une arborescence distante (chemin -> RemoteEntry)"""
+        return await self.run(self.ftp.get_index(root).refresh, force, timeout=timeout)
+
+    def shutdown(self):
+        """Arrête le pool de threads (les transferts en cours sont annulés au bloc suivant)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
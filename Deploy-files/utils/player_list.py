@@ -0,0 +1,144 @@
+import json
+import re
+
+# Ligne de joueur de ListPlayers : Idx | Char name | Player name | User ID | Platform ID | Platform Name
+# (les colonnes après le nom du personnage sont optionnelles selon la version du serveur)
+_COLUMNS = 6
+# Ancien format sans séparateurs : Idx Nom ...
+_ROW_NO_PIPE = re.compile(r'^[ \t]*(\d+)[ \t]+(\S+)[ \t]+\S', re.M)
+
+
+class Player:
+    """Joueur connecté, tel que listé par ListPlayers ou GetPlayerList"""
+
+    __slots__ = ('idx', 'char_name', 'player_name', 'user_id', 'platform_id', 'platform')
+
+    def __init__(self, idx, char_name, player_name='', user_id='', platform_id='', platform=''):
+        self.idx = idx                  # Index de connexion, utilisé par "con <idx> ..."
+        self.char_name = char_name
+        self.player_name = player_name
+        self.user_id = user_id
+        self.platform_id = platform_id  # Steam ID sur Steam
+        self.platform = platform
+
+    @property
+    def conid(self) -> str:
+        return self.idx
+
+    def __eq__(self, other):
+        return isinstance(other, Player) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"Player({self.idx!r}, {self.char_name!r}, steam_id={self.platform_id!r})"
+
+
+class PlayerList:
+    """Liste des joueurs connectés, indexée par Steam ID, nom de personnage et index"""
+
+    def __init__(self, players, raw='', available=True):
+        self.players = players
+        self.raw = raw
+        self.available = available      # False si la réponse n'est pas une liste de joueurs
+        self.by_name = {}
+        self.by_steam_id = {}
+        self.by_idx = {}
+        for player in players:
+            self.by_name[player.char_name.lower()] = player
+            if player.idx:
+                self.by_idx[player.idx] = player
+            # Le Steam ID enregistré peut être l'ID de plateforme ou l'User ID selon l'inscription
+            if player.user_id:
+                self.by_steam_id[player.user_id] = player
+            if player.platform_id:
+                self.by_steam_id[player.platform_id] = player
+
+    @property
+    def names(self) -> list:
+        return [player.char_name for player in self.players]
+
+    def find(self, steam_id=None, name=None, conid=None):
+        if steam_id:
+            return self.by_steam_id.get(str(steam_id).strip())
+        if name:
+            return self.by_name.get(name.strip().lower())
+        if conid is not None:
+            return self.by_idx.get(str(conid).strip())
+        return None
+
+    def __len__(self):
+        return len(self.players)
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def __contains__(self, name):
+        return name is not None and name.strip().lower() in self.by_name
+
+
+def parse_list_players(resp: str) -> PlayerList:
+    """Analyse la réponse de ListPlayers en une seule passe"""
+    resp = resp or ''
+    players = []
+    header = False
+    for line in resp.splitlines():
+        columns = line.split('|', _COLUMNS)
+        if len(columns) < 2:
+            continue
+        idx = columns[0].strip()
+        if not idx.isdigit():
+            header = header or idx == 'Idx'
+            continue
+        char_name = columns[1].strip()
+        if not char_name:
+            continue
+        if len(columns) >= _COLUMNS:
+            # Au-delà de la sixième colonne : ignoré
+            players.append(Player(idx, char_name, columns[2].strip(), columns[3].strip(),
+                                  columns[4].strip(), columns[5].strip()))
+        else:
+            # Colonnes absentes : valeurs par défaut de Player
+            players.append(Player(idx, char_name, *[column.strip() for column in columns[2:]]))
+    if not players and not header:
+        players = [
+            Player(idx, name) for idx, name in _ROW_NO_PIPE.findall(resp)
+            if name != 'Steam' and not name.isdigit()
+        ]
+    available = header or bool(players) or 'No players' in resp
+    return PlayerList(players, resp, available)
+
+
+def parse_get_player_list(resp: str) -> PlayerList:
+    """Analyse la réponse JSON de GetPlayerList ({"players": [{"playerId", "name", "charName"}, ...]})"""
+    resp = resp or ''
+    start = resp.find('{')
+    try:
+        data = json.loads(resp[start:]) if start >= 0 else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not isinstance(data.get('players'), list):
+        return PlayerList([], resp, available=False)
+    players = []
+    for entry in data['players']:
+        if not isinstance(entry, dict):
+            continue
+        char_name = entry.get('charName') or entry.get('name')
+        if char_name:
+            # GetPlayerList ne donne pas l'index de connexion
+            players.append(Player('', str(char_name), str(entry.get('name') or ''),
+                                  str(entry.get('playerId') or '')))
+    return PlayerList(players, resp)
+
+
+def parse_list_player_ids(resp: str) -> PlayerList:
+    """Analyse la réponse de ListPlayerIDs (PlayerID CharID Nom, le nom pouvant contenir des espaces)"""
+    resp = resp or ''
+    if "Couldn't find the command" in resp:
+        return PlayerList([], resp, available=False)
+    players = []
+    for line in resp.splitlines():
+        parts = line.split(None, 2)
+        if len(parts) == 3 and not parts[2].isdigit():
+            players.append(Player('', parts[2].strip()))
+    return PlayerList(players, resp)
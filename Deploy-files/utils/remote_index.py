@@ -0,0 +1,203 @@
+import fnmatch
+import ftplib
+import logging
+import posixpath
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from utils.ftp_pool import cancellation, check_cancelled, current_cancel_event
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteEntry:
+    """Fichier ou répertoire distant indexé"""
+
+    def __init__(self, path, type, size=None, modify=None):
+        self.path = path
+        self.type = type        # 'file' ou 'dir'
+        self.size = size        # Taille en octets (None pour un répertoire)
+        self.modify = modify    # MDTM/MLSD brut (YYYYMMDDHHMMSS), None si inconnu
+
+    @property
+    def name(self) -> str:
+        return posixpath.basename(self.path)
+
+    @property
+    def is_dir(self) -> bool:
+        return self.type == 'dir'
+
+    @property
+    def mtime(self):
+        """Date de modification distante (UTC)"""
+        if not self.modify:
+            return None
+        try:
+            return datetime.strptime(self.modify[:14], '%Y%m%d%H%M%S').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+
+    def __eq__(self, other):
+        return (isinstance(other, RemoteEntry)
+                and (self.path, self.type, self.size, self.modify) == (other.path, other.type, other.size, other.modify))
+
+    def __repr__(self):
+        return f"RemoteEntry({self.path!r}, {self.type!r}, size={self.size}, modify={self.modify!r})"
+
+
+class RemoteIndex:
+    """Index d'une arborescence FTP, parcourue en parallèle et mis en cache.
+
+    Chaque répertoire est listé par MLSD (noms avec espaces, tailles et dates
+    typées) sur une session du pool ; les sous-répertoires sont listés en
+    parallèle. Le résultat est réutilisé pendant ttl secondes et chaque
+    nouveau parcours calcule les changements par rapport au précédent.
+    """
+
+    def __init__(self, ftp_handler, root='.', ttl=300, max_workers=None):
+        self.ftp = ftp_handler
+        self.root = root
+        self.ttl = ttl
+        self.max_workers = max_workers or ftp_handler.pool.max_size
+        self.mlsd_supported = True
+        self.entries = {}        # chemin -> RemoteEntry
+        self.indexed_at = None   # time.monotonic() du dernier parcours
+        self.generation = 0
+        self.last_changes = ([], [], [])  # (ajoutés, modifiés, supprimés) au dernier parcours
+        self._lock = threading.Lock()
+
+    def _join(self, directory, name):
+        if directory in ('', '.'):
+            return name
+        return posixpath.join(directory, name)
+
+    def _list_mlsd(self, ftp, directory):
+        entries = []
+        for name, facts in ftp.mlsd(directory, facts=['type', 'size', 'modify']):
+            kind = facts.get('type', '').lower()
+            if kind in ('cdir', 'pdir') or name in ('.', '..'):
+                continue
+            is_dir = kind == 'dir'
+            size = facts.get('size')
+            entries.append(RemoteEntry(
+                self._join(directory, name),
+                'dir' if is_dir else 'file',
+                None if is_dir or size is None else int(size),
+                facts.get('modify')
+            ))
+        return entries
+
+    def _list_unix(self, ftp, directory):
+        """Repli LIST pour les serveurs sans MLSD (date de modification inconnue)"""
+        lines = []
+        ftp.retrlines(f'LIST {directory}', lines.append)
+        entries = []
+        for line in lines:
+            parts = line.split(None, 8)
+            if len(parts) < 9 or parts[8] in ('.', '..'):
+                continue
+            is_dir = line.startswith('d')
+            entries.append(RemoteEntry(
+                self._join(directory, parts[8]),
+                'dir' if is_dir else 'file',
+                None if is_dir else int(parts[4])
+            ))
+        return entries
+
+    def list_directory(self, directory):
+        """Liste un répertoire distant en entrées typées"""
+        def _list(ftp):
+            if self.mlsd_supported:
+                try:
+                    return self._list_mlsd(ftp, directory)
+                except ftplib.error_perm as e:
+                    if not str(e).startswith(('500', '502')):
+                        raise
+                    logger.info(f"MLSD non supporté par le serveur, repli sur LIST: {e}")
+                    self.mlsd_supported = False
+            return self._list_unix(ftp, directory)
+
+        with self.ftp.metrics.measure('MLSD' if self.mlsd_supported else 'LIST', directory):
+            return self.ftp.pool.run(_list)
+
+    def scan(self) -> dict:
+        """Parcourt toute l'arborescence, un répertoire par session en parallèle"""
+        parent = current_cancel_event()
+        entries = {}
+
+        def _list(directory):
+            with cancellation(parent):
+                return self.list_directory(directory)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ftp-index') as executor:
+            pending = {executor.submit(_list, self.root)}
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for entry in future.result():
+                            entries[entry.path] = entry
+                            if entry.is_dir:
+                                pending.add(executor.submit(_list, entry.path))
+                    check_cancelled()
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+        return entries
+
+    def refresh(self, force=False) -> dict:
+        """Retourne l'index, reparcouru si le cache a plus de ttl secondes"""
+        with self._lock:
+            if not force and self.indexed_at is not None and time.monotonic() - self.indexed_at < self.ttl:
+                return self.entries
+            entries = self.scan()
+            if self.indexed_at is not None:
+                self.last_changes = self.diff(self.entries, entries)
+            self.entries = entries
+            self.indexed_at = time.monotonic()
+            self.generation += 1
+            logger.info(f"Index FTP de {self.root} mis à jour ({len(entries)} entrées)")
+            return entries
+
+    @staticmethod
+    def diff(old: dict, new: dict):
+        """Compare deux index : retourne (ajoutés, modifiés, supprimés)"""
+        added = [entry for path, entry in new.items() if path not in old]
+        modified = [entry for path, entry in new.items() if path in old and old[path] != entry]
+        removed = [entry for path, entry in old.items() if path not in new]
+        return added, modified, removed
+
+    def changes_since(self, previous: dict, force=False):
+        """Changements entre un index déjà obtenu (refresh) et l'index courant"""
+        return self.diff(previous, self.refresh(force))
+
+    def files(self, pattern='*', under=None, force=False) -> list:
+        """Fichiers dont le nom correspond au motif, triés du plus récent au plus ancien"""
+        entries = self.refresh(force)
+        prefix = under.rstrip('/') + '/' if under else None
+        matches = [
+            entry for entry in entries.values()
+            if not entry.is_dir
+            and fnmatch.fnmatch(entry.name, pattern)
+            and (prefix is None or entry.path.startswith(prefix))
+        ]
+        return sorted(matches, key=lambda entry: entry.modify or '', reverse=True)
+
+    def tree(self, force=False) -> dict:
+        """Arborescence imbriquée au format de get_directory_structure"""
+        entries = self.refresh(force)
+        tree = {}
+        for path in sorted(entries):
+            entry = entries[path]
+            relative = path[len(self.root):].lstrip('/') if self.root not in ('', '.') else path
+            *parents, name = relative.split('/')
+            node = tree
+            for part in parents:
+                node = node.setdefault(part, {})
+            if entry.is_dir:
+                node.setdefault(name, {})
+            else:
+                node[name] = f"{entry.size} bytes"
+        return tree
@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+WAL_HEADER_SIZE = 32
+WAL_FRAME_HEADER_SIZE = 24
+WAL_MAGIC = (0x377f0682, 0x377f0683)
+
+
+class GameDBReplica:
+    """Réplique locale d'une base SQLite distante en mode WAL.
+
+    La base est téléchargée une seule fois, puis chaque rafraîchissement ne
+    récupère que la fin du fichier -wal distant (REST) tant que son sel
+    d'en-tête ne change pas. Les trames validées sont rejouées sur la réplique
+    locale ; un nouveau téléchargement complet n'a lieu qu'après un checkpoint
+    du serveur (sel modifié, WAL tronqué ou supprimé).
+
+    Offre la même interface que GameDBSnapshot (refresh, connect, last_modified).
+    """
+
+    def __init__(self, ftp_handler, remote_path, local_dir=None):
+        self.ftp = ftp_handler
+        self.remote_path = remote_path
+        self.remote_wal = remote_path + '-wal'
+        if local_dir is None:
+            # Préfixe conan_db_ comme les autres copies de la base du jeu
+            digest = hashlib.sha1(remote_path.encode('utf-8')).hexdigest()[:12]
+            local_dir = os.path.join(tempfile.gettempdir(), f"conan_db_replica_{digest}")
+        os.makedirs(local_dir, exist_ok=True)
+        self.db_path = os.path.join(local_dir, 'replica.db')
+        self.mirror_path = self.db_path + '-wal.mirror'
+
+        self.db_stat = None      # (taille, MDTM) de la base distante au dernier téléchargement complet
+        self.wal_stat = None     # (taille, MDTM) du WAL distant au dernier rafraîchissement
+        self.wal_salt = None     # Sel de l'en-tête du WAL répliqué
+        self.page_size = None
+        self.wal_offset = 0      # Octets du WAL distant recopiés dans le miroir (trames validées)
+        self.bytes_fetched = 0   # Volume total téléchargé, pour le suivi
+        self.fetched_at = None
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def frame_size(self) -> int:
+        return WAL_FRAME_HEADER_SIZE + self.page_size
+
+    @property
+    def last_modified(self):
+        """Date de la dernière écriture distante intégrée à la réplique (UTC)"""
+        stamps = [stat[1] for stat in (self.db_stat, self.wal_stat) if stat and stat[1]]
+        if not stamps:
+            return None
+        try:
+            return datetime.strptime(max(stamps)[:14], '%Y%m%d%H%M%S').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+
+    def _wal_usable(self, wal_stat) -> bool:
+        return wal_stat is not None and wal_stat[0] >= WAL_HEADER_SIZE
+
+    def refresh(self) -> bool:
+        """Met la réplique à jour. Retourne True si de nouvelles données ont été intégrées."""
+        with self._lock:
+            try:
+                return self._refresh()
+            except Exception as e:
+                # Repartir d'une base complète au prochain rafraîchissement
+                self.db_stat = None
+                if os.path.exists(self.db_path) and self.fetched_at is not None:
+                    logger.warning(f"Mise à jour de la réplique {self.remote_path} échouée, réutilisation de la copie locale: {e}")
+                    return False
+                if isinstance(e, RuntimeError):
+                    raise
+                raise RuntimeError("Impossible de lire la base de données depuis le FTP") from e
+
+    def _refresh(self) -> bool:
+        wal_stat = self.ftp.stat(self.remote_wal, missing_ok=True)
+        self.checked_at = datetime.now()
+
+        if self.db_stat is None:
+            self._rebaseline(wal_stat)
+            return True
+
+        if not self._wal_usable(wal_stat):
+            # Pas de WAL distant : la base seule fait foi
+            db_stat = self.ftp.stat(self.remote_path)
+            if db_stat is None or (db_stat == self.db_stat and not self.wal_offset):
+                return False
+            self._rebaseline(wal_stat)
+            return True
+
+        if wal_stat == self.wal_stat:
+            return False
+
+        if self.wal_salt is None or wal_stat[0] < self.wal_offset:
+            self._rebaseline(wal_stat)
+            return True
+
+        header = self.ftp.read_range(self.remote_wal, 0, WAL_HEADER_SIZE)
+        self.bytes_fetched += len(header)
+        if len(header) < WAL_HEADER_SIZE or header[16:24] != self.wal_salt:
+            logger.info(f"Checkpoint détecté sur {self.remote_path}, nouvelle base de référence")
+            self._rebaseline(wal_stat)
+            return True
+
+        appended = 0
+        if wal_stat[0] > self.wal_offset:
+            tail = self.ftp.read_from_offset(self.remote_wal, self.wal_offset)
+            self.bytes_fetched += len(tail)
+            appended = self._append_frames(tail)
+        self.wal_stat = wal_stat
+        if appended:
+            self._apply()
+            self.fetched_at = datetime.now()
+        return bool(appended)
+
+    def _rebaseline(self, wal_stat):
+        """Télécharge la base complète puis l'intégralité du WAL distant"""
+        db_stat = self.ftp.stat(self.remote_path)
+        if db_stat is None:
+            raise RuntimeError("Impossible de lire la base de données depuis le FTP")
+        part_path = self.db_path + '.part'
+        if not self.ftp.download_file(self.remote_path, part_path):
+            raise RuntimeError("Impossible de lire la base de données depuis le FTP")
+        self._remove_sidecars()
+        os.replace(part_path, self.db_path)
+        self.bytes_fetched += os.path.getsize(self.db_path)
+
+        self.db_stat = db_stat
+        self.wal_salt = None
+        self.page_size = None
+        self.wal_offset = 0
+        with open(self.mirror_path, 'wb'):
+            pass
+
+        if self._wal_usable(wal_stat):
+            data = self.ftp.read_from_offset(self.remote_wal, 0)
+            self.bytes_fetched += len(data)
+            if self._start_mirror(data):
+                self._append_frames(data[WAL_HEADER_SIZE:])
+        self.wal_stat = wal_stat
+        self._apply()
+        self.fetched_at = datetime.now()
+        logger.info(f"Réplique de {self.remote_path} recréée ({self.db_stat[0]} octets + {self.wal_offset} octets de WAL)")
+
+    def _start_mirror(self, data) -> bool:
+        """Initialise le miroir local avec l'en-tête du WAL distant"""
+        if len(data) < WAL_HEADER_SIZE:
+            return False
+        magic, _, page_size = struct.unpack('>III', data[:12])
+        if magic not in WAL_MAGIC:
+            logger.warning(f"En-tête WAL invalide pour {self.remote_wal}, WAL ignoré")
+            return False
+        self.page_size = page_size
+        self.wal_salt = bytes(data[16:24])
+        with open(self.mirror_path, 'wb') as f:
+            f.write(data[:WAL_HEADER_SIZE])
+        self.wal_offset = WAL_HEADER_SIZE
+        return True
+
+    def _append_frames(self, data) -> int:
+        """Ajoute au miroir les trames complètes jusqu'à la dernière trame de commit.
+
+        Les trames non validées peuvent être réécrites par le serveur : elles
+        seront relues au prochain rafraîchissement.
+        """
+        frame_size = self.frame_size
+        end = 0
+        pos = 0
+        while pos + frame_size <= len(data):
+            commit_size, = struct.unpack('>I', data[pos + 4:pos + 8])
+            if data[pos + 8:pos + 16] != self.wal_salt:
+                # Trame d'une génération précédente du WAL : fin des données valides
+                break
+            pos += frame_size
+            if commit_size:
+                end = pos
+        if end:
+            with open(self.mirror_path, 'ab') as f:
+                f.write(data[:end])
+            self.wal_offset += end
+        return end
+
+    def _remove_sidecars(self, path=None):
+        """Supprime les fichiers -wal/-shm locaux laissés par un rejeu précédent"""
+        path = path or self.db_path
+        for suffix in ('-wal', '-shm'):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def _apply(self):
+        """Rejoue le miroir du WAL via un checkpoint local sur une copie, puis la met en place.
+
+        Les lecteurs ouvrent la réplique en immutable=1 : elle n'est jamais réécrite
+        sur place, os.replace leur laisse l'ancien fichier jusqu'à leur fermeture.
+        """
+        if self.wal_offset <= WAL_HEADER_SIZE:
+            return
+        part_path = self.db_path + '.part'
+        self._remove_sidecars(part_path)
+        shutil.copyfile(self.db_path, part_path)
+        shutil.copyfile(self.mirror_path, part_path + '-wal')
+        # Les trames déjà intégrées sont réécrites à l'identique : le rejeu est idempotent
+        conn = sqlite3.connect(part_path)
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            conn.close()
+        self._remove_sidecars(part_path)
+        os.replace(part_path, self.db_path)
+
+    def connect(self) -> sqlite3.Connection:
+        """Ouvre une connexion en lecture seule sur une réplique à jour"""
+        self.refresh()
+        with self._lock:
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro&immutable=1'
+            return sqlite3.connect(uri, uri=True)
@@ -0,0 +1,298 @@
+"""Banc d'essai des performances de FTPHandler contre un serveur FTP local.
+
+Génère des game.db synthétiques (1 Mo à 500 Mo) et un ConanSandbox.log qui
+grossit pendant la mesure, puis mesure read_database (flux unique et
+segmenté), download_file, upload_file, le cache de game.db, la réplique WAL
+et le suivi du log. Pour chaque scénario : débit (Mo/s), latence p50/p99 et
+pic de mémoire (RSS) du processus.
+
+Usage :
+    python Tests/bench_ftp.py --sizes 1,50,500 --iterations 5
+    python Tests/bench_ftp.py --json resultats.json
+    python Tests/bench_ftp.py --baseline resultats.json --tolerance 20
+
+Avec --baseline, le script échoue (code 1) si un débit baisse de plus de
+--tolerance % par rapport à la référence : utilisable comme garde-fou avant
+de déployer une modification du code FTP.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_ftp_server import LocalFTPServer
+
+# config.settings exige un token au bon format, le banc n'a pas besoin de Discord
+os.environ.setdefault('DISCORD_TOKEN', 'bench.local.token')
+
+MEGABYTE = 1024 * 1024
+DB_DIR = 'ConanSandbox/Saved'
+LOG_PATH = 'ConanSandbox/Saved/Logs/ConanSandbox.log'
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus en Mo (None si indisponible)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    return peak / MEGABYTE if sys.platform == 'darwin' else peak / 1024
+
+
+def make_game_db(path, size_mb):
+    """Crée une base SQLite en mode WAL d'environ size_mb Mo"""
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * MEGABYTE * 0.95:
+        return
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE buildings (object_id INTEGER PRIMARY KEY, owner_id INTEGER, payload BLOB)')
+    conn.execute('CREATE TABLE characters (id INTEGER PRIMARY KEY, char_name TEXT, guild INTEGER)')
+    conn.executemany('INSERT INTO characters (char_name, guild) VALUES (?, ?)',
+                     [(f'Joueur{i}', i % 20) for i in range(200)])
+    block = os.urandom(4096)
+    rows = size_mb * MEGABYTE // 4200
+    batch = 1000
+    for start in range(0, rows, batch):
+        conn.executemany('INSERT INTO buildings (owner_id, payload) VALUES (?, ?)',
+                         [(i % 200, block) for i in range(start, min(rows, start + batch))])
+        conn.commit()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+
+
+class LogWriter(threading.Thread):
+    """Ajoute des lignes au log local à intervalle régulier (serveur de jeu simulé)"""
+
+    def __init__(self, path, lines_per_tick=50, interval=0.05):
+        super().__init__(daemon=True)
+        self.path = path
+        self.lines_per_tick = lines_per_tick
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.count = 0
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for _ in range(self.lines_per_tick):
+                    self.count += 1
+                    f.write(f"[2025.01.01-12.00.00:000][  0]LogChat: ChatWindow: Character Joueur{self.count % 200} "
+                            f"said: message numéro {self.count}\n")
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.results = []
+        self.workdir = args.workdir or os.path.join(tempfile.gettempdir(), 'conan_ftp_bench')
+        self.root = os.path.join(self.workdir, 'root')
+        os.makedirs(os.path.join(self.root, DB_DIR, 'Logs'), exist_ok=True)
+        self.server = LocalFTPServer(self.root, latency=args.latency)
+        os.environ.update({
+            'FTP_HOST': '127.0.0.1',
+            'FTP_PORT': str(self.server.port),
+            'FTP_USERNAME': self.server.user,
+            'FTP_PASSWORD': self.server.password,
+        })
+        # Import après la configuration de l'environnement (FTPHandler lit le .env à l'import)
+        from utils.ftp_handler import FTPHandler
+        from utils.ftp_metrics import RollingHistogram
+        # Seuls les avertissements du bot s'affichent pendant les mesures
+        logging.getLogger().setLevel(logging.WARNING)
+        self.FTPHandler = FTPHandler
+        self.RollingHistogram = RollingHistogram
+
+    def measure(self, name, size_mb, func, iterations=None, pause=0.0):
+        """Exécute func plusieurs fois et enregistre débit, latences et pic de mémoire.
+
+        pause : attente non chronométrée avant chaque appel (intervalle de sondage).
+        """
+        iterations = iterations or self.args.iterations
+        durations = self.RollingHistogram(iterations)
+        transferred = 0
+        for _ in range(iterations):
+            time.sleep(pause)
+            started = time.perf_counter()
+            nbytes = func()
+            durations.add(time.perf_counter() - started)
+            transferred += nbytes or 0
+        summary = durations.summary()
+        result = {
+            'scenario': name,
+            'size_mb': size_mb,
+            'iterations': iterations,
+            'mb_per_s': transferred / MEGABYTE / durations.total if durations.total else None,
+            'p50_ms': summary['p50'] * 1000,
+            'p99_ms': summary['p99'] * 1000,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        self.results.append(result)
+        rate = f"{result['mb_per_s']:8.1f} Mo/s" if result['mb_per_s'] else '         - '
+        rss = f"{result['peak_rss_mb']:.0f} Mo" if result['peak_rss_mb'] is not None else '-'
+        print(f"{name:<28} {size_mb:>5} Mo {rate}  p50 {result['p50_ms']:8.1f} ms  "
+              f"p99 {result['p99_ms']:8.1f} ms  RSS max {rss}")
+        return result
+
+    def bench_database(self, handler, size_mb):
+        remote = f"{DB_DIR}/game_{size_mb}mb.db"
+        local = os.path.join(self.root, remote)
+        make_game_db(local, size_mb)
+        size = os.path.getsize(local)
+        scratch = os.path.join(self.workdir, 'download.db')
+
+        handler.segments = 1
+        self.measure('read_database', size_mb, lambda: len(handler.read_database(remote)))
+        handler.segments = self.args.segments
+        self.measure(f'read_database x{self.args.segments}', size_mb, lambda: len(handler.read_database(remote)))
+        handler.segments = 1
+
+        def download():
+            handler.download_file(remote, scratch)
+            return os.path.getsize(scratch)
+        self.measure('download_file', size_mb, download)
+
+        def upload():
+            handler.upload_file(scratch, f"{DB_DIR}/upload.db")
+            return size
+        self.measure('upload_file', size_mb, upload)
+        os.remove(scratch)
+
+        def snapshot():
+            handler.get_snapshot(remote).connect().close()
+            return 0
+        # Premier appel : téléchargement ; les suivants ne coûtent qu'un SIZE/MDTM
+        handler.get_snapshot(remote).connect().close()
+        self.measure('snapshot (cache)', size_mb, snapshot)
+
+    def bench_wal_replica(self, handler, size_mb):
+        """Réplique WAL : écritures continues côté serveur, rafraîchissements incrémentaux"""
+        from utils.wal_replica import GameDBReplica
+        remote = f"{DB_DIR}/game_live.db"
+        local = os.path.join(self.root, remote)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(local + suffix):
+                os.remove(local + suffix)
+        shutil.copyfile(os.path.join(self.root, f"{DB_DIR}/game_{size_mb}mb.db"), local)
+        writer = sqlite3.connect(local)
+        writer.execute('PRAGMA journal_mode=WAL')
+        writer.execute('PRAGMA wal_autocheckpoint=0')
+        replica = GameDBReplica(handler, remote, local_dir=os.path.join(self.workdir, 'replica'))
+        replica.refresh()
+        block = os.urandom(4096)
+
+        def refresh():
+            writer.executemany('INSERT INTO buildings (owner_id, payload) VALUES (?, ?)', [(1, block)] * 20)
+            writer.commit()
+            # MDTM a une résolution d'une seconde : forcer une date différente
+            stamp = time.time() + refresh.calls
+            refresh.calls += 1
+            os.utime(local + '-wal', (stamp, stamp))
+            before = replica.bytes_fetched
+            replica.refresh()
+            return replica.bytes_fetched - before
+        refresh.calls = 1
+        self.measure('wal_replica refresh', size_mb, refresh)
+        writer.close()
+
+    def bench_log_tail(self, handler):
+        """Suivi du log pendant qu'il grossit, comme la boucle de PlayerSync"""
+        from utils.log_follower import LogFollower
+        local = os.path.join(self.root, LOG_PATH)
+        with open(local, 'w', encoding='utf-8') as f:
+            f.write('Log file open\n' * 20000)
+        follower = LogFollower(handler, LOG_PATH)
+        follower.read_new_bytes()
+        writer = LogWriter(local)
+        writer.start()
+        try:
+            def poll():
+                return len(follower.read_new_bytes())
+            self.measure('log tail (REST)', round(os.path.getsize(local) / MEGABYTE, 1), poll,
+                         iterations=self.args.iterations * 4, pause=self.args.poll_interval)
+        finally:
+            writer.stop_event.set()
+            writer.join()
+
+    def run(self):
+        self.server.start()
+        handler = self.FTPHandler()
+        try:
+            print(f"Serveur local 127.0.0.1:{self.server.port}, latence {self.args.latency * 1000:.0f} ms/commande")
+            for size_mb in self.args.sizes:
+                self.bench_database(handler, size_mb)
+            self.bench_wal_replica(handler, self.args.sizes[0])
+            self.bench_log_tail(handler)
+            print(f"Connexions FTP ouvertes: {self.server.stats['logins']}, "
+                  f"commandes: {self.server.stats['commands']}, "
+                  f"octets envoyés: {self.server.stats['bytes_sent'] / MEGABYTE:.0f} Mo")
+        finally:
+            handler.close()
+            self.server.stop()
+        return self.results
+
+
+def compare(results, baseline_path, tolerance):
+    """Compare les débits à une référence ; retourne la liste des régressions"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['scenario'], r['size_mb']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        reference = baseline.get((result['scenario'], result['size_mb']))
+        if not reference or not reference.get('mb_per_s') or not result.get('mb_per_s'):
+            continue
+        change = (result['mb_per_s'] - reference['mb_per_s']) / reference['mb_per_s'] * 100
+        if change < -tolerance:
+            regressions.append(f"{result['scenario']} ({result['size_mb']} Mo): "
+                               f"{reference['mb_per_s']:.1f} -> {result['mb_per_s']:.1f} Mo/s ({change:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de FTPHandler contre un serveur FTP local")
+    parser.add_argument('--sizes', default='1,10,100',
+                        type=lambda value: [int(size) for size in value.split(',')],
+                        help="Tailles des game.db synthétiques en Mo (ex. 1,50,500)")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--segments', type=int, default=4, help="Sessions du mode segmenté")
+    parser.add_argument('--latency', type=float, default=0.0, help="Délai ajouté à chaque commande (s)")
+    parser.add_argument('--poll-interval', type=float, default=0.2, help="Intervalle de suivi du log (s)")
+    parser.add_argument('--workdir', help="Dossier des fichiers générés (réutilisés d'un lancement à l'autre)")
+    parser.add_argument('--json', help="Écrit les résultats dans ce fichier")
+    parser.add_argument('--baseline', help="Résultats de référence (--json d'un lancement précédent)")
+    parser.add_argument('--tolerance', type=float, default=20.0, help="Baisse de débit tolérée en %%")
+    args = parser.parse_args()
+
+    results = Bench(args).run()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'args': vars(args), 'results': results}, f, indent=2)
+        print(f"Résultats écrits dans {args.json}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("❌ Régressions de débit :")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("✅ Aucune régression de débit par rapport à la référence")
+
+
+if __name__ == '__main__':
+    main()
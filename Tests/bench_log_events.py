@@ -0,0 +1,175 @@
+"""Vérification et banc d'essai du pipeline d'événements de ConanSandbox.log.
+
+Génère un log synthétique (lignes de bruit du moteur mêlées de messages de
+chat, connexions, morts, destructions et redémarrages), vérifie que chaque
+événement est extrait avec le bon type et les bons champs, puis compare le
+débit du pipeline (une passe, test `literal in line` avant chaque motif) à
+l'ancien check_logs et à une passe par motif, chaque module relisant toutes
+les lignes. Des deux côtés, les champs lus par les abonnés sont extraits.
+
+Usage :
+    python Tests/bench_log_events.py
+    python Tests/bench_log_events.py --lines 200000 --seed 3 --input ConanSandbox.log
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log_events import (EVENT_BUILDING_DESTROYED, EVENT_CHAT, EVENT_DEATH, EVENT_JOIN, EVENT_LEAVE,
+                              EVENT_PATTERNS, EVENT_SERVER_RESTART, LogEventPipeline)
+
+ALL_EVENTS = (EVENT_CHAT, EVENT_JOIN, EVENT_LEAVE, EVENT_DEATH, EVENT_BUILDING_DESTROYED, EVENT_SERVER_RESTART)
+NOISE = [
+    "LogNet: NotifyAcceptingConnection accepted from: 10.0.0.{n}:7777",
+    "LogStreaming: Display: Async loading of /Game/Items/Item_{n} took 0.02 ms",
+    "LogSpawn: Warning: SpawnActor failed because of collision at location X={n} Y=12 Z=3",
+    "LogBuildingManager: Stability update for {n} pieces",
+    "LogTemp: Character tick took {n} us",
+]
+
+
+def stamp(second, frame):
+    return f"[2025.06.01-17.{second // 60 % 60:02d}.{second % 60:02d}:{frame % 1000:03d}][{frame % 1000:3d}]"
+
+
+def make_log(count, rng):
+    """Log synthétique et liste des événements attendus (type, champ clé)"""
+    lines, expected = [], []
+    for index in range(count):
+        prefix = stamp(index // 50, index)
+        roll = rng.random()
+        if roll < 0.03:
+            message = rng.choice(["salut", f"CODE{index}", "je me suis fait killed by un loup", "base destroyed !"])
+            lines.append(f"{prefix}ChatWindow: Character Joueur {index % 40} (uid {1000 + index % 40}, "
+                         f"player {76561190000000000 + index % 40}) said: {message}")
+            expected.append((EVENT_CHAT, message))
+        elif roll < 0.04:
+            lines.append(f"{prefix}LogNet: Join succeeded: compte{index % 40}")
+            expected.append((EVENT_JOIN, f"compte{index % 40}"))
+        elif roll < 0.05:
+            lines.append(f"{prefix}LogNet: Player disconnected: compte{index % 40} ({76561190000000000 + index % 40})")
+            expected.append((EVENT_LEAVE, f"compte{index % 40}"))
+        elif roll < 0.055:
+            lines.append(f"{prefix}LogGame: Character Joueur {index % 40} (uid {1000 + index % 40}) was killed by "
+                         f"Character Joueur {(index + 1) % 40} (uid {1000 + (index + 1) % 40})")
+            expected.append((EVENT_DEATH, f"Joueur {index % 40}"))
+        elif roll < 0.056:
+            lines.append(f"{prefix}LogGame: Building Foundation_{index} owned by Clan{index % 5} was destroyed by "
+                         f"Joueur {index % 40}")
+            expected.append((EVENT_BUILDING_DESTROYED, f"Foundation_{index}"))
+        elif roll < 0.0561:
+            lines.append("Log file open, 06/01/25 17:57:38")
+            expected.append((EVENT_SERVER_RESTART, None))
+        else:
+            lines.append(prefix + rng.choice(NOISE).format(n=index))
+    return lines, expected
+
+
+KEY_FIELD = {EVENT_CHAT: 'message', EVENT_JOIN: 'player_name', EVENT_LEAVE: 'player_name',
+             EVENT_DEATH: 'victim', EVENT_BUILDING_DESTROYED: 'building', EVENT_SERVER_RESTART: None}
+
+
+def check(lines, expected):
+    pipeline = LogEventPipeline()
+    pipeline.subscribe(ALL_EVENTS, lambda events: None)
+    events = list(pipeline.parse(lines))
+    found = [(event.type, event.get(KEY_FIELD[event.type]) if KEY_FIELD[event.type] else None) for event in events]
+    assert found == expected, next((pair for pair in zip(found, expected) if pair[0] != pair[1]), None)
+    for event in events:
+        assert event.timestamp is not None, event
+        if event.type == EVENT_DEATH:
+            assert event['killer'] and event['killer_id'], event
+
+    # Un abonné ne reçoit que ses types, dans l'ordre du log
+    received = []
+    only_chat = LogEventPipeline()
+    only_chat.subscribe(EVENT_CHAT, received.extend)
+    asyncio.run(only_chat.process(lines))
+    assert [event['message'] for event in received] == [key for kind, key in expected if kind == EVENT_CHAT]
+
+
+# Ancien check_logs : filtre des lignes de chat puis extraction des champs de chacune
+LEGACY_CHAT = re.compile(r'Character ([^()]+) \(uid (\d+), player (\d+)\) said: (.+)')
+
+
+def legacy_check_logs(lines):
+    chat_lines = [line for line in lines if 'ChatWindow' in line]
+    found = []
+    for line in chat_lines:
+        match = LEGACY_CHAT.search(line)
+        if match:
+            found.append((match.group(1).strip(), match.group(2), match.group(3), match.group(4).strip()))
+    return found
+
+
+def legacy_modules(lines):
+    """Sans pipeline : chaque module relit toutes les lignes avec son propre motif"""
+    found = []
+    for _, literal, regex in EVENT_PATTERNS:
+        for line in lines:
+            if literal in line:
+                match = regex.search(line)
+                if match:
+                    found.append(match.groups())
+    return found
+
+
+def read_chat(pipeline, lines):
+    # Comme PlayerSync.check_verifications : le message d'abord, le reste sur correspondance
+    return [event['message'] for event in pipeline.parse(lines)]
+
+
+def read_key_fields(pipeline, lines):
+    return [event[KEY_FIELD[event.type]] if KEY_FIELD[event.type] else event.timestamp
+            for event in pipeline.parse(lines)]
+
+
+def bench(label, func, lines, rounds=15):
+    """Meilleur de plusieurs essais : le moins perturbé par le reste de la machine"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func(lines)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<34} {len(lines) / best / 1000:9.0f} k lignes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=50000, help="Lignes du log synthétique")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--input', action='append', default=[], help="Log réel à analyser en plus")
+    args = parser.parse_args()
+
+    lines, expected = make_log(args.lines, random.Random(args.seed))
+    check(lines, expected)
+    print(f"Extraction OK : {len(expected)} événements sur {len(lines)} lignes")
+
+    for path in args.input:
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            real = f.read().splitlines()
+        pipeline = LogEventPipeline()
+        pipeline.subscribe(ALL_EVENTS, lambda events: None)
+        asyncio.run(pipeline.process(real))
+        counts = {name: count for name, count in pipeline.counters.items() if name != 'lines'}
+        print(f"{os.path.basename(path)} : {len(real)} lignes, événements {counts}")
+
+    chat_only = LogEventPipeline()
+    chat_only.subscribe(EVENT_CHAT, lambda events: None)
+    everything = LogEventPipeline()
+    everything.subscribe(ALL_EVENTS, lambda events: None)
+    print(f"{len(lines)} lignes")
+    bench('pipeline (chat seul)', lambda l: read_chat(chat_only, l), lines)
+    bench('ancien check_logs (chat seul)', legacy_check_logs, lines)
+    bench('pipeline (tous les événements)', lambda l: read_key_fields(everything, l), lines)
+    bench(f'un parcours par motif ({len(EVENT_PATTERNS)} motifs)', legacy_modules, lines)
+
+if __name__ == '__main__':
+    main()
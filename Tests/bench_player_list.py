@@ -0,0 +1,194 @@
+"""Tests aléatoires (fuzz) et banc d'essai de l'analyseur ListPlayers / GetPlayerList.
+
+Les réponses de référence reprennent le format renvoyé par le serveur
+(ListPlayers avec 0, 1 et 40 joueurs, commande inconnue, GetPlayerList).
+D'autres captures peuvent être ajoutées avec --input (réponse brute copiée
+depuis les logs DEBUG de utils.player_roster).
+
+Le fuzz vérifie que l'analyseur ne lève jamais d'exception et que les index
+restent cohérents sur des réponses mutées (lignes coupées, séparateurs en
+trop, CRLF, caractères Unicode...), puis qu'une liste générée est relue à
+l'identique. Le banc compare l'analyseur (six colonnes, index) à l'ancien découpage ligne
+par ligne.
+
+Usage :
+    python Tests/bench_player_list.py
+    python Tests/bench_player_list.py --fuzz 20000 --seed 42 --input capture.txt
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.player_list import Player, parse_get_player_list, parse_list_players
+
+HEADER = "Idx | Char name | Player name | User ID | Platform ID | Platform Name"
+NAMES = ["Thorgal", "Aëlys la Rouge", "Kalanthes", "Zath's Chosen", "Bob Le Bricoleur",
+         "Юрий", "李小龙", "O'Malley", "xX_Raider_Xx", "Séléné"]
+
+
+def make_players(count, rng=None):
+    rng = rng or random.Random(0)
+    players = []
+    for idx in range(count):
+        name = f"{rng.choice(NAMES)} {idx}" if count > len(NAMES) else NAMES[idx % len(NAMES)]
+        players.append(Player(str(idx), name, f"joueur{idx}", f"{rng.getrandbits(48):X}",
+                              str(76561190000000000 + rng.getrandbits(32)), "Steam"))
+    return players
+
+
+def render_list_players(players, newline='\n'):
+    rows = [HEADER] + [
+        f"{p.idx:>3} | {p.char_name} | {p.player_name} | {p.user_id} | {p.platform_id} | {p.platform}"
+        for p in players
+    ]
+    return newline.join(rows) + newline
+
+
+RECORDED = {
+    'vide': HEADER + "\n",
+    'aucun joueur': "No players connected\n",
+    'un joueur': render_list_players(make_players(1)),
+    '40 joueurs': render_list_players(make_players(40)),
+    '40 joueurs CRLF': render_list_players(make_players(40), '\r\n'),
+    'commande inconnue': "Couldn't find the command: ListPlayers. Try \"help\"\n",
+    'GetPlayerList': "Command 'GetPlayerList' succeeded! "
+                     '{"players": [{"playerId": 1, "name": "joueur1", "charName": "Thorgal"}, '
+                     '{"playerId": 2, "name": "joueur2", "charName": ""}]}',
+}
+
+
+def legacy_parse(resp):
+    """Ancien découpage de get_online_players, pour comparaison"""
+    players = []
+    lines = resp.splitlines()
+    if lines and ("Idx" in lines[0] or "Char name" in lines[0] or "Player name" in lines[0]):
+        lines = lines[1:]
+    for line in lines:
+        if not line.strip():
+            continue
+        if "|" in line:
+            parts = line.split("|")
+            if len(parts) >= 2:
+                char_name = parts[1].strip()
+                if char_name and char_name != "Char name":
+                    players.append(char_name)
+    return players
+
+
+def check_consistency(result):
+    """Invariants d'une liste analysée"""
+    for player in result.players:
+        assert player.idx == '' or player.idx.isdigit(), player
+        assert player.char_name and player.char_name == player.char_name.strip(), player
+        assert result.find(name=player.char_name) is not None, player
+        if player.idx:
+            assert result.by_idx[player.idx].idx == player.idx
+    for steam_id, player in result.by_steam_id.items():
+        assert steam_id in (player.user_id, player.platform_id)
+    assert len(result.names) == len(result)
+
+
+def mutate(text, rng):
+    """Mutation aléatoire d'une réponse"""
+    chars = list(text)
+    for _ in range(rng.randint(1, 8)):
+        op = rng.randrange(6)
+        pos = rng.randrange(len(chars) + 1)
+        if op == 0 and chars:
+            del chars[min(pos, len(chars) - 1)]
+        elif op == 1:
+            chars.insert(pos, rng.choice('|\n\r \t0123456789éЮ李"{}'))
+        elif op == 2:
+            chars = chars[:pos]  # Réponse tronquée
+        elif op == 3:
+            chars.insert(pos, '|' * rng.randint(1, 4))
+        elif op == 4:
+            chars.insert(pos, chr(rng.randrange(32, 0x3000)))
+        else:
+            chars.insert(pos, '\r\n')
+    return ''.join(chars)
+
+
+def run_fuzz(samples, iterations, seed):
+    rng = random.Random(seed)
+    texts = list(samples.values())
+    for _ in range(iterations):
+        text = mutate(rng.choice(texts), rng)
+        check_consistency(parse_list_players(text))
+        check_consistency(parse_get_player_list(text))
+
+    # Aller-retour : une liste générée est relue à l'identique
+    for count in (0, 1, 7, 40, 120):
+        for newline in ('\n', '\r\n'):
+            players = make_players(count, rng)
+            result = parse_list_players(render_list_players(players, newline))
+            assert result.players == players, (count, newline)
+            assert result.available
+            for player in players:
+                assert result.find(steam_id=player.platform_id) == player
+
+    # Réponses de référence
+    assert parse_list_players(samples['vide']).available and not parse_list_players(samples['vide']).players
+    assert parse_list_players(samples['aucun joueur']).available
+    assert not parse_list_players(samples['commande inconnue']).available
+    assert parse_get_player_list(samples['GetPlayerList']).names == ['Thorgal', 'joueur2']
+    for name in ('40 joueurs', '40 joueurs CRLF'):
+        assert parse_list_players(samples[name]).names == legacy_parse(samples[name])
+
+
+def bench(label, func, text, rounds=15, loops=200):
+    """Meilleur de plusieurs essais : le moins perturbé par le reste de la machine"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(text)
+        elapsed = (time.perf_counter() - started) / loops
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<28} {best * 1e6:9.1f} µs/appel")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fuzz', type=int, default=5000, help="Nombre de réponses mutées")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--input', action='append', default=[], help="Capture brute supplémentaire")
+    args = parser.parse_args()
+
+    samples = dict(RECORDED)
+    for path in args.input:
+        with open(path, encoding='utf-8') as f:
+            samples[os.path.basename(path)] = f.read()
+
+    started = time.perf_counter()
+    run_fuzz(samples, args.fuzz, args.seed)
+    print(f"Fuzz OK : {args.fuzz} réponses mutées en {time.perf_counter() - started:.2f}s")
+
+    for name in ('un joueur', '40 joueurs'):
+        text = samples[name]
+        print(f"{name} ({len(text)} octets)")
+        bench('analyseur (6 col.)', parse_list_players, text)
+        bench('ancien découpage (noms)', legacy_parse, text)
+        players = parse_list_players(text)
+        steam_id = players.players[-1].platform_id
+        bench('recherche Steam ID (index)', lambda _: players.find(steam_id=steam_id), None)
+        bench('recherche Steam ID (scan)', lambda t: next(l for l in t.splitlines() if steam_id in l), text)
+
+        # Un !starterpack : trois découpages et deux recherches par sous-chaîne avant,
+        # une analyse (partagée par le cache) et une recherche indexée maintenant
+        def legacy_flow(t):
+            for _ in range(3):
+                legacy_parse(t)
+            for _ in range(2):
+                next(l for l in t.splitlines() if steam_id in l)
+
+        bench('!starterpack (ancien)', legacy_flow, text)
+        bench('!starterpack (liste indexée)', lambda t: parse_list_players(t).find(steam_id=steam_id), text)
+
+
+if __name__ == '__main__':
+    main()
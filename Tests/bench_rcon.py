@@ -0,0 +1,254 @@
+"""Banc d'essai de RCONClient et ItemManager contre un serveur RCON local.
+
+Lance Tests/local_rcon_server.py (joueurs fictifs, latence réseau simulée)
+puis mesure, pour chaque scénario, le débit (commandes/s) et les latences
+p50/p99 :
+  - commandes une par une, puis en parallèle (pool multiplexé) ;
+  - liste des joueurs (ListPlayers réassemblée et analysée) ;
+  - starter packs livrés par ItemManager.deliver_items pour plusieurs joueurs ;
+  - commandes pendant que le serveur coupe des connexions au hasard ;
+  - temps de reprise après une coupure de toutes les connexions et après un
+    redémarrage du serveur (superviseur de reconnexion).
+
+Le débit du client est limité par RCON_RATE en production (5 commandes/s) :
+le banc le relève (--rate) pour mesurer le client lui-même.
+
+Usage :
+    python Tests/bench_rcon.py --players 40 --latency 0.02
+    python Tests/bench_rcon.py --json resultats.json
+    python Tests/bench_rcon.py --baseline resultats.json --tolerance 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_rcon_server import LocalRCONServer
+
+# config.settings exige un token au bon format, le banc n'a pas besoin de Discord
+os.environ.setdefault('DISCORD_TOKEN', 'bench.local.token')
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.results = []
+        self.server = LocalRCONServer(players=args.players, latency=args.latency, service_time=args.service_time)
+
+    async def setup(self):
+        await self.server.start()
+        os.environ.update({
+            'GAME_SERVER_HOST': '127.0.0.1',
+            'RCON_PORT': str(self.server.port),
+            'RCON_PASSWORD': self.server.password,
+            'RCON_POOL_SIZE': str(self.args.pool),
+            'RCON_RATE': str(self.args.rate),
+            'RCON_BURST': str(max(1, int(self.args.rate))),
+            'RCON_BACKOFF_BASE': str(self.args.backoff_base),
+            'RCON_BACKOFF_MAX': str(self.args.backoff_max),
+        })
+        # Import après la configuration de l'environnement
+        from features.item_manager import ItemManager
+        from utils.ftp_metrics import RollingHistogram
+        from utils.rcon_client import RCONClient
+        # Seules les erreurs du bot s'affichent pendant les mesures (les coupures sont voulues)
+        logging.getLogger().setLevel(logging.WARNING if self.args.verbose else logging.ERROR)
+        self.RollingHistogram = RollingHistogram
+        self.client = RCONClient()
+        bot = SimpleNamespace(player_tracker=SimpleNamespace(rcon_client=self.client))
+        self.item_manager = ItemManager(bot, None)
+
+    def record(self, name, count, elapsed, durations, errors=0, commands=None):
+        summary = durations.summary()
+        result = {
+            'scenario': name,
+            'count': count,
+            'cmd_per_s': (commands if commands is not None else count) / elapsed if elapsed else None,
+            'p50_ms': summary['p50'] * 1000 if 'p50' in summary else None,
+            'p99_ms': summary['p99'] * 1000 if 'p99' in summary else None,
+            'errors': errors,
+        }
+        self.results.append(result)
+        p50 = f"{result['p50_ms']:8.2f}" if result['p50_ms'] is not None else '       -'
+        p99 = f"{result['p99_ms']:8.2f}" if result['p99_ms'] is not None else '       -'
+        print(f"{name:<34} {count:>6} {result['cmd_per_s']:9.0f} cmd/s  p50 {p50} ms  p99 {p99} ms"
+              f"  erreurs {errors}")
+        return result
+
+    async def measure(self, name, operation, count, concurrency=1, commands_per_call=1):
+        """Lance count appels d'operation avec au plus concurrency en parallèle"""
+        durations = self.RollingHistogram(count)
+        errors = 0
+        queue = iter(range(count))
+
+        async def worker():
+            nonlocal errors
+            for index in queue:
+                started = time.perf_counter()
+                try:
+                    await operation(index)
+                except Exception:
+                    errors += 1
+                    continue
+                durations.add(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return self.record(name, count, elapsed, durations, errors, count * commands_per_call)
+
+    async def bench_execute(self):
+        count = self.args.commands
+        await self.client.execute('version')  # Ouvre la première connexion hors mesure
+        await self.measure('execute séquentiel', lambda i: self.client.execute(f'con 0 spawnitem 1 {i}'), count)
+        await self.measure(f'execute concurrent x{self.args.concurrency}',
+                           lambda i: self.client.execute(f'con 0 spawnitem 1 {i}'),
+                           count, self.args.concurrency)
+
+    async def bench_roster(self):
+        async def refresh(_):
+            players = await self.client.roster.get(force=True)
+            if len(players) != self.args.players:
+                raise RuntimeError(f"{len(players)} joueurs lus sur {self.args.players}")
+        await self.measure(f'roster ListPlayers ({self.args.players} joueurs)', refresh, self.args.commands // 10)
+
+    async def bench_starter_packs(self):
+        items = self.item_manager.starter_items
+        players = min(self.args.players, self.args.concurrency)
+
+        async def deliver(index):
+            conid = str(index % self.args.players)
+            results = await self.item_manager.deliver_items(conid, items, key=conid)
+            if not all(result.success for result in results):
+                raise RuntimeError("livraison incomplète")
+
+        await self.measure(f'starter packs x{players} (ItemManager)', deliver,
+                           max(players, self.args.commands // len(items)), players, len(items))
+
+    async def bench_resets(self):
+        self.server.reset_rate = self.args.reset_rate
+        try:
+            await self.measure(f'execute avec coupures ({self.args.reset_rate:.0%})',
+                               lambda i: self.client.execute(f'con 0 spawnitem 1 {i}'),
+                               self.args.commands, self.args.concurrency)
+        finally:
+            self.server.reset_rate = 0.0
+
+    async def wait_recovery(self, started, timeout=120):
+        """Sonde le serveur jusqu'à la première commande réussie ; retourne la durée et les échecs rapides"""
+        failures = self.RollingHistogram(4096)
+        while time.perf_counter() - started < timeout:
+            attempt = time.perf_counter()
+            try:
+                await self.client.execute('version')
+                return time.perf_counter() - started, failures
+            except Exception:
+                failures.add(time.perf_counter() - attempt)
+                await asyncio.sleep(0.01)
+        raise TimeoutError("Le client RCON ne s'est pas reconnecté")
+
+    def record_recovery(self, name, recovery, failures):
+        summary = failures.summary()
+        result = {'scenario': name, 'recovery_ms': recovery * 1000, 'failed_calls': failures.count,
+                  'failed_call_p99_ms': summary['p99'] * 1000 if 'p99' in summary else None}
+        self.results.append(result)
+        p99 = f"{result['failed_call_p99_ms']:.2f} ms" if result['failed_call_p99_ms'] is not None else '-'
+        print(f"{name:<34} reprise en {result['recovery_ms']:8.1f} ms  "
+              f"{failures.count} appel(s) refusé(s), p99 de l'échec {p99}")
+
+    async def bench_recovery(self):
+        await self.client.execute('version')
+        started = time.perf_counter()
+        self.server.reset_connections()
+        self.record_recovery('reprise après coupure', *await self.wait_recovery(started))
+
+        await self.server.stop()
+        stopped = time.perf_counter()
+        outage = asyncio.create_task(self.wait_recovery(stopped))
+        await asyncio.sleep(self.args.outage)
+        await self.server.start()
+        restarted = time.perf_counter()
+        recovery, failures = await outage
+        # Compté depuis le redémarrage : c'est le délai ajouté par le superviseur
+        self.record_recovery(f'reprise après arrêt de {self.args.outage:.0f}s', recovery - (restarted - stopped),
+                             failures)
+
+    async def run(self):
+        await self.setup()
+        try:
+            print(f"Serveur local 127.0.0.1:{self.server.port}, {self.args.players} joueurs, "
+                  f"latence {self.args.latency * 1000:.0f} ms, débit client {self.args.rate:.0f} cmd/s")
+            await self.bench_execute()
+            await self.bench_roster()
+            await self.bench_starter_packs()
+            await self.bench_resets()
+            await self.bench_recovery()
+            print(f"Connexions RCON ouvertes: {self.server.stats['sessions']}, "
+                  f"commandes: {self.server.stats['commands']}, paquets envoyés: {self.server.stats['packets_sent']}, "
+                  f"coupures: {self.server.stats['resets']}, pool: {dict(self.client.pool.counters)}")
+        finally:
+            await self.client.close()
+            await self.server.stop()
+        return self.results
+
+
+def compare(results, baseline_path, tolerance):
+    """Compare les débits à une référence ; retourne la liste des régressions"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {r['scenario']: r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        reference = baseline.get(result['scenario'])
+        if not reference or not reference.get('cmd_per_s') or not result.get('cmd_per_s'):
+            continue
+        change = (result['cmd_per_s'] - reference['cmd_per_s']) / reference['cmd_per_s'] * 100
+        if change < -tolerance:
+            regressions.append(f"{result['scenario']}: {reference['cmd_per_s']:.0f} -> "
+                               f"{result['cmd_per_s']:.0f} cmd/s ({change:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de RCONClient contre un serveur RCON local")
+    parser.add_argument('--players', type=int, default=40, help="Joueurs fictifs connectés")
+    parser.add_argument('--commands', type=int, default=2000, help="Commandes par scénario")
+    parser.add_argument('--concurrency', type=int, default=16, help="Appels en parallèle")
+    parser.add_argument('--latency', type=float, default=0.01, help="Délai réseau ajouté à chaque réponse (s)")
+    parser.add_argument('--service-time', type=float, default=0.0, help="Temps de traitement d'une commande (s)")
+    parser.add_argument('--reset-rate', type=float, default=0.01, help="Probabilité de coupure par commande")
+    parser.add_argument('--outage', type=float, default=3.0, help="Durée de l'arrêt du serveur (s)")
+    parser.add_argument('--pool', type=int, default=2, help="RCON_POOL_SIZE")
+    parser.add_argument('--rate', type=float, default=10000, help="RCON_RATE (5 en production)")
+    parser.add_argument('--backoff-base', type=float, default=1.0, help="RCON_BACKOFF_BASE")
+    parser.add_argument('--backoff-max', type=float, default=60.0, help="RCON_BACKOFF_MAX")
+    parser.add_argument('--verbose', action='store_true', help="Affiche aussi les avertissements du client")
+    parser.add_argument('--json', help="Écrit les résultats dans ce fichier")
+    parser.add_argument('--baseline', help="Résultats de référence (--json d'un lancement précédent)")
+    parser.add_argument('--tolerance', type=float, default=20.0, help="Baisse de débit tolérée en %%")
+    args = parser.parse_args()
+
+    results = asyncio.run(Bench(args).run())
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'args': vars(args), 'results': results}, f, indent=2)
+        print(f"Résultats écrits dans {args.json}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("❌ Régressions de débit :")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("✅ Aucune régression de débit par rapport à la référence")
+
+
+if __name__ == '__main__':
+    main()
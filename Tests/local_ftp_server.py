@@ -0,0 +1,343 @@
+"""Serveur FTP local minimal pour tester FTPHandler sans toucher au serveur de production.
+
+Gère PASV/EPSV, REST, SIZE, MDTM, RETR, STOR, LIST, MLSD et les commandes de
+gestion de fichiers. allow_rest/allow_mlsd simulent un hébergeur plus limité
+et latency ajoute un délai à chaque commande.
+
+Usage autonome : python Tests/local_ftp_server.py <dossier> [port]
+"""
+import os
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class _FTPRequestHandler(socketserver.StreamRequestHandler):
+    """Gère une session de contrôle FTP"""
+
+    def setup(self):
+        super().setup()
+        # Sans TCP_NODELAY, l'ACK retardé ajoute ~40 ms à chaque réponse et fausse les mesures
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.cwd = '/'
+        self.type = 'A'
+        self.rest = 0
+        self.pasv_sock = None
+        self.rename_from = None
+        self.authenticated = False
+        self.user = None
+
+    def reply(self, text):
+        self.wfile.write((text + '\r\n').encode('utf-8'))
+        self.wfile.flush()
+
+    def _local(self, path):
+        if not path:
+            path = self.cwd
+        if not path.startswith('/'):
+            path = self.cwd.rstrip('/') + '/' + path
+        parts = []
+        for part in path.split('/'):
+            if part in ('', '.'):
+                continue
+            if part == '..':
+                if parts:
+                    parts.pop()
+                continue
+            parts.append(part)
+        return '/' + '/'.join(parts), os.path.join(self.server.root, *parts)
+
+    def _data_connection(self):
+        if self.pasv_sock is None:
+            self.reply('425 Use PASV first')
+            return None
+        self.pasv_sock.settimeout(10)
+        try:
+            conn, _ = self.pasv_sock.accept()
+        finally:
+            self.pasv_sock.close()
+            self.pasv_sock = None
+        return conn
+
+    def handle(self):
+        self.server.stats['sessions'] += 1
+        self.reply('220 Serveur FTP local')
+        while True:
+            try:
+                line = self.rfile.readline()
+            except OSError:
+                break
+            if not line:
+                break
+            line = line.decode('utf-8', errors='replace').rstrip('\r\n')
+            cmd, _, arg = line.partition(' ')
+            cmd = cmd.upper()
+            self.server.stats['commands'] += 1
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            handler = getattr(self, 'cmd_' + cmd, None)
+            if handler is None:
+                self.reply('502 Command not implemented')
+                continue
+            if not self.authenticated and cmd not in ('USER', 'PASS', 'QUIT', 'FEAT', 'SYST'):
+                self.reply('530 Please login')
+                continue
+            try:
+                if handler(arg) is False:
+                    break
+            except (ConnectionError, OSError):
+                break
+
+    def finish(self):
+        if self.pasv_sock is not None:
+            self.pasv_sock.close()
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def cmd_USER(self, arg):
+        self.user = arg
+        self.reply('331 Password required')
+
+    def cmd_PASS(self, arg):
+        if self.user == self.server.user and arg == self.server.password:
+            self.authenticated = True
+            self.server.stats['logins'] += 1
+            self.reply('230 Logged in')
+        else:
+            self.reply('530 Login incorrect')
+
+    def cmd_SYST(self, arg):
+        self.reply('215 UNIX Type: L8')
+
+    def cmd_FEAT(self, arg):
+        self.wfile.write(b'211-Features:\r\n MDTM\r\n SIZE\r\n REST STREAM\r\n MLST type*;size*;modify*;\r\n')
+        self.reply('211 End')
+
+    def cmd_OPTS(self, arg):
+        self.reply('200 OK')
+
+    def cmd_NOOP(self, arg):
+        self.reply('200 NOOP ok')
+
+    def cmd_QUIT(self, arg):
+        self.reply('221 Bye')
+        return False
+
+    def cmd_TYPE(self, arg):
+        self.type = arg.upper()[:1]
+        self.reply(f'200 Type set to {self.type}')
+
+    def cmd_PWD(self, arg):
+        self.reply(f'257 "{self.cwd}"')
+
+    def cmd_CWD(self, arg):
+        virtual, local = self._local(arg)
+        if os.path.isdir(local):
+            self.cwd = virtual
+            self.reply('250 OK')
+        else:
+            self.reply('550 No such directory')
+
+    def cmd_CDUP(self, arg):
+        return self.cmd_CWD('..')
+
+    def cmd_PASV(self, arg):
+        if self.pasv_sock is not None:
+            self.pasv_sock.close()
+        self.pasv_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.pasv_sock.bind((self.server.server_address[0], 0))
+        self.pasv_sock.listen(1)
+        host, port = self.pasv_sock.getsockname()
+        self.reply('227 Entering Passive Mode (%s,%d,%d)' % (host.replace('.', ','), port >> 8, port & 0xFF))
+
+    def cmd_EPSV(self, arg):
+        self.cmd_PASV(arg)
+
+    def cmd_REST(self, arg):
+        if not self.server.allow_rest:
+            self.reply('502 REST not supported')
+            return
+        self.rest = int(arg)
+        self.reply(f'350 Restarting at {self.rest}')
+
+    def cmd_SIZE(self, arg):
+        _, local = self._local(arg)
+        if os.path.isfile(local):
+            self.reply(f'213 {os.path.getsize(local)}')
+        else:
+            self.reply('550 No such file')
+
+    def cmd_MDTM(self, arg):
+        _, local = self._local(arg)
+        if os.path.isfile(local):
+            mtime = datetime.fromtimestamp(os.path.getmtime(local), timezone.utc)
+            self.reply('213 ' + mtime.strftime('%Y%m%d%H%M%S'))
+        else:
+            self.reply('550 No such file')
+
+    def cmd_RETR(self, arg):
+        _, local = self._local(arg)
+        offset, self.rest = self.rest, 0
+        if not os.path.isfile(local):
+            self.reply('550 No such file')
+            return
+        conn = self._data_connection()
+        if conn is None:
+            return
+        self.reply('150 Opening data connection')
+        sent = 0
+        aborted = False
+        try:
+            with open(local, 'rb') as f:
+                f.seek(offset)
+                while True:
+                    chunk = f.read(65536)
+                    if not chunk:
+                        break
+                    conn.sendall(chunk)
+                    sent += len(chunk)
+        except OSError:
+            aborted = True
+        finally:
+            conn.close()
+        self.server.stats['bytes_sent'] += sent
+        self.reply('426 Transfer aborted' if aborted else '226 Transfer complete')
+
+    def cmd_STOR(self, arg):
+        _, local = self._local(arg)
+        conn = self._data_connection()
+        if conn is None:
+            return
+        self.reply('150 Ok to send data')
+        received = 0
+        with open(local, 'wb') as f:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                f.write(chunk)
+                received += len(chunk)
+        conn.close()
+        self.server.stats['bytes_received'] += received
+        self.reply('226 Transfer complete')
+
+    def _list_lines(self, local):
+        names = sorted(os.listdir(local)) if os.path.isdir(local) else [os.path.basename(local)]
+        base = local if os.path.isdir(local) else os.path.dirname(local)
+        for name in names:
+            st = os.stat(os.path.join(base, name))
+            kind = 'd' if os.path.isdir(os.path.join(base, name)) else '-'
+            date = datetime.fromtimestamp(st.st_mtime).strftime('%b %d %H:%M')
+            yield f'{kind}rw-r--r-- 1 ftp ftp {st.st_size:>12} {date} {name}'
+
+    def _send_lines(self, lines):
+        conn = self._data_connection()
+        if conn is None:
+            return
+        self.reply('150 Here comes the listing')
+        payload = ''.join(line + '\r\n' for line in lines).encode('utf-8')
+        conn.sendall(payload)
+        conn.close()
+        self.reply('226 Directory send OK')
+
+    def cmd_LIST(self, arg):
+        _, local = self._local(arg if arg and not arg.startswith('-') else '')
+        if not os.path.exists(local):
+            self.reply('550 No such file or directory')
+            return
+        self._send_lines(self._list_lines(local))
+
+    def cmd_NLST(self, arg):
+        _, local = self._local(arg)
+        self._send_lines(sorted(os.listdir(local)))
+
+    def cmd_MLSD(self, arg):
+        if not self.server.allow_mlsd:
+            self.reply('500 MLSD not understood')
+            return
+        _, local = self._local(arg)
+        if not os.path.isdir(local):
+            self.reply('501 Not a directory')
+            return
+        lines = []
+        for name in sorted(os.listdir(local)):
+            path = os.path.join(local, name)
+            st = os.stat(path)
+            kind = 'dir' if os.path.isdir(path) else 'file'
+            modify = datetime.fromtimestamp(st.st_mtime, timezone.utc).strftime('%Y%m%d%H%M%S')
+            lines.append(f'type={kind};size={st.st_size};modify={modify}; {name}')
+        self._send_lines(lines)
+
+    def cmd_MKD(self, arg):
+        virtual, local = self._local(arg)
+        os.makedirs(local, exist_ok=True)
+        self.reply(f'257 "{virtual}" created')
+
+    def cmd_DELE(self, arg):
+        _, local = self._local(arg)
+        if os.path.isfile(local):
+            os.remove(local)
+            self.reply('250 Deleted')
+        else:
+            self.reply('550 No such file')
+
+    def cmd_RNFR(self, arg):
+        self.rename_from = self._local(arg)[1]
+        self.reply('350 Ready for RNTO')
+
+    def cmd_RNTO(self, arg):
+        os.replace(self.rename_from, self._local(arg)[1])
+        self.rename_from = None
+        self.reply('250 Renamed')
+
+    def cmd_ABOR(self, arg):
+        self.reply('226 Abort OK')
+
+
+class LocalFTPServer(socketserver.ThreadingTCPServer):
+    """Serveur FTP en mémoire de processus servant un répertoire local"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, root, user='bench', password='bench', host='127.0.0.1', port=0,
+                 allow_rest=True, allow_mlsd=True, latency=0.0):
+        super().__init__((host, port), _FTPRequestHandler)
+        self.root = root
+        self.user = user
+        self.password = password
+        self.allow_rest = allow_rest
+        self.allow_mlsd = allow_mlsd
+        self.latency = latency
+        self.stats = {'sessions': 0, 'logins': 0, 'commands': 0, 'bytes_sent': 0, 'bytes_received': 0}
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    import sys
+
+    root = sys.argv[1] if len(sys.argv) > 1 else '.'
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 2121
+    server = LocalFTPServer(root, port=port)
+    print(f"Serveur FTP local sur 127.0.0.1:{server.port} (bench/bench), racine {os.path.abspath(root)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
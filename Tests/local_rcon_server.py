@@ -0,0 +1,208 @@
+"""Serveur RCON (protocole Source) local pour tester le client sans toucher au serveur Conan.
+
+Gère l'authentification, ListPlayers / GetPlayerList avec des joueurs fictifs,
+version, "con <idx> spawnitem <id> <quantité>" et les réponses découpées en
+plusieurs paquets. Les paquets vides (sentinelles) reçoivent la même réponse
+que sur un vrai serveur Source : un RESPONSE_VALUE vide suivi du paquet
+0x00 0x01 0x00 0x00.
+
+Chaque connexion traite ses commandes dans l'ordre, comme le serveur de jeu :
+latency est le délai réseau (aller-retour) ajouté à chaque réponse, sans
+bloquer les commandes suivantes ; service_time est le temps de traitement
+d'une commande, séquentiel. reset_rate coupe la connexion au lieu de répondre
+(probabilité par commande) ; reset_connections() coupe tout immédiatement et
+stop() / start() simulent un redémarrage du serveur sur le même port.
+
+Usage autonome : python Tests/local_rcon_server.py [port] [joueurs]
+"""
+import asyncio
+import json
+import random
+import socket
+import struct
+
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+HEADER = "Idx | Char name | Player name | User ID | Platform ID | Platform Name"
+
+
+def make_players(count):
+    """Joueurs fictifs : (idx, nom du personnage, nom du compte, User ID, Steam ID)"""
+    return [
+        (str(idx), f"Joueur {idx}", f"compte{idx}", f"{0xA000 + idx:X}", str(76561190000000000 + idx))
+        for idx in range(count)
+    ]
+
+
+class _Session:
+    """Une connexion cliente : lecture des paquets, réponses dans l'ordre d'arrivée"""
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.queue = asyncio.Queue()
+        self.authenticated = False
+
+    def send(self, req_id, type_id, body):
+        data = body if isinstance(body, bytes) else body.encode('utf-8')
+        self.writer.write(struct.pack('<iii', len(data) + 10, req_id, type_id) + data + b'\x00\x00')
+        self.server.stats['packets_sent'] += 1
+
+    def send_response(self, req_id, body):
+        """Réponse découpée en paquets de chunk octets au plus, comme le serveur de jeu"""
+        data = body.encode('utf-8')
+        chunk = self.server.chunk
+        for start in range(0, max(len(data), 1), chunk):
+            self.send(req_id, SERVERDATA_RESPONSE_VALUE, data[start:start + chunk])
+
+    async def read_loop(self):
+        loop = asyncio.get_running_loop()
+        worker = asyncio.create_task(self.process_loop())
+        try:
+            while True:
+                size, = struct.unpack('<i', await self.reader.readexactly(4))
+                data = await self.reader.readexactly(size)
+                req_id, type_id = struct.unpack('<ii', data[:8])
+                self.queue.put_nowait((loop.time(), req_id, type_id, data[8:-2].decode('utf-8', errors='replace')))
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error):
+            pass
+        finally:
+            worker.cancel()
+            self.writer.close()
+            self.server._sessions.discard(self)
+
+    async def process_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            received_at, req_id, type_id, body = await self.queue.get()
+            delay = received_at + self.server.latency - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if type_id == SERVERDATA_AUTH:
+                self.server.stats['logins'] += 1
+                self.authenticated = body == self.server.password
+                if not self.authenticated:
+                    self.server.stats['auth_failures'] += 1
+                self.send(req_id, SERVERDATA_RESPONSE_VALUE, '')
+                self.send(req_id if self.authenticated else -1, SERVERDATA_AUTH_RESPONSE, '')
+            elif not self.authenticated:
+                self.writer.close()
+                return
+            elif not body:
+                # Sentinelle : réponse vide puis paquet 0x00 0x01 0x00 0x00
+                self.send(req_id, SERVERDATA_RESPONSE_VALUE, '')
+                if type_id == SERVERDATA_RESPONSE_VALUE:
+                    self.send(req_id, SERVERDATA_RESPONSE_VALUE, b'\x00\x01\x00\x00')
+            else:
+                self.server.stats['commands'] += 1
+                if self.server.reset_rate and random.random() < self.server.reset_rate:
+                    self.server.stats['resets'] += 1
+                    self.writer.transport.abort()
+                    return
+                if self.server.service_time:
+                    await asyncio.sleep(self.server.service_time)
+                self.send_response(req_id, self.server.respond(body))
+            await self.writer.drain()
+
+
+class LocalRCONServer:
+    """Serveur RCON asyncio servant une liste de joueurs fictifs"""
+
+    def __init__(self, password='bench', host='127.0.0.1', port=0, players=10, latency=0.0,
+                 service_time=0.0, reset_rate=0.0, chunk=4096, commands=('ListPlayers', 'GetPlayerList')):
+        self.password = password
+        self.host = host
+        self.players = make_players(players) if isinstance(players, int) else list(players)
+        self.latency = latency
+        self.service_time = service_time
+        self.reset_rate = reset_rate
+        self.chunk = chunk
+        self.commands = set(commands)      # Commandes de liste des joueurs reconnues
+        self.version = "Conan Exiles 3.0 (local)"
+        self.spawned = {}                  # idx -> nombre d'items reçus
+        self.stats = {'sessions': 0, 'logins': 0, 'auth_failures': 0, 'commands': 0,
+                      'resets': 0, 'packets_sent': 0, 'spawned': 0}
+        self._port = port
+        self._server = None
+        self._sessions = set()
+
+    @property
+    def port(self):
+        return self._port
+
+    async def start(self):
+        # Port fixé après le premier démarrage : un redémarrage réécoute au même endroit
+        self._server = await asyncio.start_server(self._handle, self.host, self._port, reuse_address=True)
+        self._port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        """Arrête d'écouter et coupe les connexions (serveur éteint)"""
+        if self._server is not None:
+            self._server.close()
+            self.reset_connections()
+            await self._server.wait_closed()
+            self._server = None
+
+    def reset_connections(self):
+        """Coupe brutalement toutes les connexions ouvertes (RST)"""
+        for session in list(self._sessions):
+            session.writer.transport.abort()
+
+    async def _handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats['sessions'] += 1
+        session = _Session(self, reader, writer)
+        self._sessions.add(session)
+        try:
+            await session.read_loop()
+        except asyncio.CancelledError:
+            pass  # Boucle d'événements arrêtée en fin de banc
+
+    def respond(self, command):
+        """Réponse du serveur de jeu à une commande"""
+        name, _, args = command.strip().partition(' ')
+        if name == 'ListPlayers' and name in self.commands:
+            rows = [HEADER] + [f"{idx:>3} | {char} | {account} | {user_id} | {steam_id} | Steam"
+                               for idx, char, account, user_id, steam_id in self.players]
+            return '\n'.join(rows) + '\n'
+        if name == 'GetPlayerList' and name in self.commands:
+            players = [{'playerId': user_id, 'name': account, 'charName': char}
+                       for _, char, account, user_id, _ in self.players]
+            return f"Command 'GetPlayerList' succeeded! {json.dumps({'players': players})}"
+        if name == 'version':
+            return self.version
+        if name == 'con':
+            idx, _, action = args.partition(' ')
+            parts = action.split()
+            if parts and parts[0] == 'spawnitem':
+                if not any(player[0] == idx for player in self.players):
+                    return f"Couldn't find a valid player with index {idx}"
+                count = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 1
+                self.spawned[idx] = self.spawned.get(idx, 0) + count
+                self.stats['spawned'] += count
+                return ''
+        return f"Couldn't find the command: {name}. Try \"help\""
+
+
+if __name__ == '__main__':
+    import sys
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 25575
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    async def serve():
+        server = await LocalRCONServer(port=port, players=players).start()
+        print(f"Serveur RCON local sur 127.0.0.1:{server.port} (mot de passe bench), {players} joueurs")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
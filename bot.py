@@ -13,6 +13,7 @@ from utils.ftp_handler import FTPHandler
 from features.build_limit import BuildLimitTracker
 from features.classement_player import KillTracker
 from features.player_sync import PlayerSync
+from utils.log_events import EVENT_DEATH, EVENT_JOIN, EVENT_LEAVE
 from features.vote_tracker import VoteTracker
 from features.item_manager import ItemManager
 from database.init_database import init_database
@@ -51,6 +52,8 @@ print(f"- Password: {'*' * len(os.getenv('RCON_PASSWORD', '')) if os.getenv('RCO
 # Initialisation des clients et trackers
 rcon_client = RCONClient()
 ftp_handler = FTPHandler()
+bot.rcon_client = rcon_client  # type: ignore
+bot.ftp_handler = ftp_handler  # type: ignore
 
 @bot.event
 async def on_ready():
@@ -61,6 +64,8 @@ async def on_ready():
         bot.build_tracker = BuildLimitTracker(bot=bot, channel_id=BUILD_CHANNEL_ID, ftp_handler=ftp_handler)  # type: ignore
         bot.kill_tracker = KillTracker(bot=bot, channel_id=KILLS_CHANNEL_ID)  # type: ignore
         bot.player_sync = PlayerSync(bot, LOG_FILE_PATH, ftp_handler=ftp_handler)  # type: ignore
+        bot.player_sync.log_events.subscribe((EVENT_JOIN, EVENT_LEAVE), bot.player_tracker.on_connection_events)  # type: ignore
+        bot.player_sync.log_events.subscribe(EVENT_DEATH, bot.kill_tracker.on_death_events, transactional=True)  # type: ignore
         bot.vote_tracker = VoteTracker(bot, TOP_SERVER_CHANNEL_ID, SERVER_PRIVE_CHANNEL_ID, ftp_handler=ftp_handler)  # type: ignore
         bot.item_manager = ItemManager(bot, ftp_handler=ftp_handler)  # type: ignore
 
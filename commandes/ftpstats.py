@@ -0,0 +1,31 @@
+import io
+import discord
+from discord.ext import commands
+
+class FTPStats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name='ftpstats')
+    async def ftp_stats(self, ctx, format: str = None):
+        """Affiche les durées, débits et compteurs FTP (!ftpstats json pour l'export complet)"""
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("Vous n'avez pas la permission d'utiliser cette commande")
+            return
+        ftp_handler = getattr(self.bot, 'ftp_handler', None)
+        if ftp_handler is None:
+            await ctx.send("❌ Le gestionnaire FTP n'est pas initialisé.")
+            return
+        try:
+            if format == 'json':
+                data = io.BytesIO(ftp_handler.metrics.to_json().encode('utf-8'))
+                await ctx.send("📊 Métriques FTP", file=discord.File(data, filename='ftp_metrics.json'))
+                return
+            summary = "\n".join(ftp_handler.metrics.summary_lines())
+            # Limite de 2000 caractères par message Discord
+            await ctx.send(f"📊 **Métriques FTP**\n```\n{summary[:1900]}\n```")
+        except Exception as e:
+            await ctx.send(f"❌ Erreur lors de la lecture des métriques FTP: {e}")
+
+def setup(bot):
+    bot.add_cog(FTPStats(bot))
@@ -9,13 +9,15 @@ class Rcon(commands.Cog):
         """Vérifie la connexion RCON"""
         if ctx.author.guild_permissions.administrator:
             try:
-                response = self.bot.rcon_client.execute("version")
+                response = await self.bot.rcon_client.execute("version")
                 if response:
                     await ctx.send(f"✅ Connexion RCON OK\nRéponse: {response}")
                 else:
                     await ctx.send("❌ Pas de réponse du serveur RCON")
             except Exception as e:
                 await ctx.send(f"❌ Erreur RCON: {e}")
+                if self.bot.rcon_client.last_error:
+                    await ctx.send(f"État de la connexion: {self.bot.rcon_client.state} - dernière erreur: {self.bot.rcon_client.last_error}")
         else:
             await ctx.send("Vous n'avez pas la permission d'utiliser cette commande")
 
@@ -4,6 +4,7 @@ import sqlite3
 import datetime
 import logging
 import traceback
+from utils.rcon_scheduler import PRIORITY_PLAYER
 
 class StarterPack(commands.Cog):
     def __init__(self, bot):
@@ -33,46 +34,12 @@ class StarterPack(commands.Cog):
             if self.bot.player_sync.db.has_received_starterpack(str(ctx.author.id)):
                 await ctx.send("❌ Vous avez déjà reçu votre pack de départ. Cette commande ne peut être utilisée qu'une seule fois par joueur.")
                 return
-            online_players = self.bot.player_tracker.rcon_client.get_online_players()
-            logger.info(f"Joueurs en ligne: {online_players}")
-            is_valid_player_list = True
-            for player in online_players:
-                if "Couldn't find the command" in player or "Try \"help\"" in player:
-                    is_valid_player_list = False
-                    logger.error(f"Erreur dans la liste des joueurs: {player}")
-                    break
-            if not is_valid_player_list:
-                try:
-                    resp = self.bot.player_tracker.rcon_client.execute("ListPlayers")
-                    logger.info(f"Réponse directe de ListPlayers: {resp}")
-                    online_players = []
-                    lines = resp.splitlines()
-                    if lines and ("Idx" in lines[0] or "Char name" in lines[0]):
-                        lines = lines[1:]
-                    for line in lines:
-                        if not line.strip():
-                            continue
-                        if "|" in line:
-                            parts = line.split("|")
-                            if len(parts) >= 2:
-                                char_name = parts[1].strip()
-                                if char_name and char_name != "Char name":
-                                    online_players.append(char_name)
-                                    logger.info(f"Joueur extrait manuellement: {char_name}")
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'extraction manuelle des joueurs: {e}")
-            await ctx.send(f"ℹ️ Joueurs connectés: {', '.join(online_players)}")
-            resp = self.bot.player_tracker.rcon_client.execute("ListPlayers")
-            logger.info(f"Vérification de la présence du joueur avec Steam ID {steam_id}")
-            is_player_online = False
-            if resp and steam_id:
-                lines = resp.splitlines()
-                for line in lines:
-                    if steam_id in line:
-                        is_player_online = True
-                        logger.info(f"Joueur avec Steam ID {steam_id} trouvé en ligne: {line}")
-                        break
-            if not is_player_online:
+            # Liste partagée des joueurs connectés (une seule requête ListPlayers, mise en cache)
+            roster = await self.bot.player_tracker.rcon_client.roster.get(priority=PRIORITY_PLAYER)
+            logger.info(f"Joueurs en ligne: {roster.names}")
+            await ctx.send(f"ℹ️ Joueurs connectés: {', '.join(roster.names)}")
+            online_player = await self.bot.player_tracker.rcon_client.roster.find(steam_id=steam_id, priority=PRIORITY_PLAYER)
+            if online_player is None:
                 await ctx.send(f"❌ Vous devez être connecté au serveur avec votre personnage '{player_name}' pour recevoir votre pack de départ.")
                 return
             await ctx.send("⏳ Préparation de votre pack de départ, veuillez patienter...")
@@ -45,9 +45,9 @@ class BuildLimitTracker:
     async def _check_buildings(self):
         """Vérifie les constructions et envoie un rapport"""
         try:
-            # Récupérer les données depuis le FTP
+            # Récupérer les données depuis le FTP, hors de la boucle d'événements
             database = DatabaseBuildManager()
-            constructions = database.get_constructions_by_player(self.ftp_handler)
+            constructions = await self.ftp_handler.aio.run(database.get_constructions_by_player, self.ftp_handler)
             
             if not constructions:
                 message = "Aucune construction trouvée."
@@ -98,6 +98,11 @@ class BuildLimitTracker:
             if not has_exceeded_limit:
                 message += f"✅ **Bravo ! Tous les clans respectent la limite de construction ({self.LIMITE_CONSTRUCTION} pièces maximum) !**"
 
+            # Indiquer de quelle sauvegarde du serveur proviennent les données
+            snapshot_date = database.get_snapshot_date(self.ftp_handler)
+            if snapshot_date:
+                message += f"\n\n_Données de la sauvegarde du {snapshot_date:%d/%m/%Y à %H:%M} (UTC)_"
+
             # Envoyer le message dans le salon de rapport
             report_channel = self.bot.get_channel(self.channel_id)
             if report_channel:
@@ -1,17 +1,14 @@
 import logging
 import sqlite3
-import threading
 import time
 import os
 from config.logging_config import setup_logging
 import asyncio
-import valve.rcon
+from utils.rcon_batch import AdaptivePacer, CommandResult, run_pipelined
+from utils.rcon_scheduler import PRIORITY_PLAYER
 
 logger = setup_logging()
 
-# Verrou global pour éviter les appels multiples
-_global_lock = threading.Lock()
-
 class ItemManager:
     def __init__(self, bot, ftp_handler):
         """Initialise le gestionnaire d'items"""
@@ -32,6 +29,13 @@ class ItemManager:
             53002   # Extrait d'aoles
         ]
 
+        # Cadence des livraisons, ajustée d'un lot à l'autre selon les erreurs du serveur
+        self.delivery_pacer = AdaptivePacer(max_window=len(self.starter_items))
+
+        # Joueurs dont une livraison est en cours : une seule à la fois par joueur,
+        # les livraisons de joueurs différents sont ordonnancées par le client RCON
+        self._in_progress = set()
+
     def can_modify_inventory(self):
         """Vérifie si on peut modifier l'inventaire des joueurs"""
         current_time = time.time()
@@ -45,28 +49,47 @@ class ItemManager:
         """Met à jour le timestamp du dernier build"""
         self.last_build_time = time.time()
 
-    async def _execute_rcon_command(self, command, max_attempts=5):
-        """Exécute une commande RCON avec système de retry"""
-        attempts = 0
-        while attempts < max_attempts:
+    @staticmethod
+    def _check_spawn_response(result):
+        """Valide la réponse du serveur à un spawnitem"""
+        response = result.response or ''
+        if "Couldn't find a valid player" in response:
+            # Joueur déconnecté ou conid périmé : inutile de réessayer
+            result.success = False
+            result.retryable = False
+        elif "Unknown command" in response or "Couldn't find the command" in response:
+            result.success = False
+
+    async def deliver_items(self, player_conid, items, max_rounds=3, key=None):
+        """Livre un lot d'items à un joueur : commandes en pipeline sur une même connexion RCON.
+
+        items contient des template_id ou des couples (template_id, quantité).
+        Retourne un CommandResult par item ; seuls les items en échec sont renvoyés
+        aux tours suivants. key regroupe les commandes du joueur dans la file
+        équitable de l'ordonnanceur RCON (conid par défaut).
+        """
+        results = []
+        for item in items:
+            item_id, count = item if isinstance(item, tuple) else (item, 1)
+            results.append(CommandResult(f"con {player_conid} spawnitem {item_id} {count}", key=item_id))
+
+        pending = results
+        for round_number in range(1, max_rounds + 1):
             try:
-                with valve.rcon.RCON((self.rcon_client.host, self.rcon_client.port), self.rcon_client.password) as rcon:
-                    response = rcon.execute(command)
-                    logger.info(f"Réponse RCON: {response.text}")
-                    return True, response.text
-            except valve.rcon.RCONAuthenticationError:
-                logger.error("Erreur d'authentification RCON")
-                attempts += 1
-                await asyncio.sleep(1)
-            except ConnectionResetError:
-                logger.error("Erreur de connexion au serveur (karma)")
-                attempts += 5  # On attend plus longtemps en cas de karma
-                await asyncio.sleep(5)
+                connection = await self.rcon_client.acquire(PRIORITY_PLAYER, key or player_conid)
             except Exception as e:
-                logger.error(f"Erreur RCON: {e}")
-                attempts += 1
-                await asyncio.sleep(1)
-        return False, None
+                logger.error(f"Connexion RCON impossible pour la livraison: {e}")
+                for result in pending:
+                    result.error = str(e)
+                break
+            await run_pipelined(connection, pending, self.delivery_pacer, self._check_spawn_response)
+            pending = [result for result in pending if not result.success and result.retryable]
+            if not pending:
+                break
+            if round_number < max_rounds:
+                logger.warning(f"{len(pending)} item(s) en échec, nouvel essai ({round_number + 1}/{max_rounds})")
+                await asyncio.sleep(self.delivery_pacer.delay or self.delivery_pacer.initial_delay)
+        return results
 
     async def give_starter_pack_by_steam_id(self, steam_id):
         """Donne le pack de départ à un joueur via RCON en utilisant son Steam ID"""
@@ -74,34 +97,18 @@ class ItemManager:
             logger.warning("Système verrouillé, impossible de donner le starter pack maintenant")
             return False
 
-        if not _global_lock.acquire(blocking=False):
+        if steam_id in self._in_progress:
             logger.warning(f"Une autre opération est en cours pour le joueur avec Steam ID {steam_id}")
-            _global_lock.release()
             return False
+        self._in_progress.add(steam_id)
 
         try:
             logger.info(f"Début de l'ajout du pack de départ pour le joueur avec Steam ID {steam_id}")
             
-            # Récupérer les informations des joueurs en ligne
-            resp = self.rcon_client.execute("ListPlayers")
-            logger.info(f"Réponse brute de ListPlayers: {resp}")
-            
-            # Extraire les informations des joueurs
-            lines = resp.splitlines()
-            if lines and ("Idx" in lines[0] or "Char name" in lines[0] or "Player name" in lines[0]):
-                lines = lines[1:]
-            
-            # Chercher le joueur par son Steam ID
-            target_player_name = None
-            player_conid = None
-            
-            for line in lines:
-                if steam_id in line:
-                    parts = line.split("|")
-                    if len(parts) >= 2:
-                        target_player_name = parts[1].strip()
-                        player_conid = parts[0].strip()  # Récupérer le conid (index du joueur)
-                        break
+            # Retrouver le joueur dans la liste partagée des joueurs connectés
+            player = await self.rcon_client.roster.find(steam_id=steam_id, priority=PRIORITY_PLAYER)
+            target_player_name = player.char_name if player else None
+            player_conid = player.conid if player else None  # conid = index du joueur
             
             if not target_player_name or not player_conid:
                 logger.error(f"Joueur avec Steam ID {steam_id} non trouvé en ligne ou ID manquant")
@@ -118,29 +125,15 @@ class ItemManager:
             except Exception as e:
                 logger.error(f"Erreur lors de la mise à jour du conid: {e}")
 
-            success_count = 0
-            error_count = 0
-            
-            for item_id in self.starter_items:
-                try:
-                    # Utiliser la commande RCON avec le conid du joueur
-                    command = f"con {player_conid} spawnitem {item_id} 1"
-                    logger.info(f"Exécution de la commande: {command}")
-                    
-                    success, response = await self._execute_rcon_command(command)
-                    if success and "Couldn't find a valid player" not in response:
-                        logger.info(f"Item {item_id} ajouté avec succès pour '{target_player_name}'")
-                        success_count += 1
-                    else:
-                        logger.error(f"Échec de l'ajout de l'item {item_id} pour '{target_player_name}'")
-                        error_count += 1
-                    
-                    # Attendre un peu entre chaque commande
-                    await asyncio.sleep(0.2)
-                    
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'ajout de l'item {item_id}: {e}")
-                    error_count += 1
+            results = await self.deliver_items(player_conid, self.starter_items, key=steam_id)
+            success_count = sum(1 for result in results if result.success)
+            error_count = len(results) - success_count
+            for result in results:
+                if result.success:
+                    logger.info(f"Item {result.key} ajouté avec succès pour '{target_player_name}'")
+                else:
+                    logger.error(f"Échec de l'ajout de l'item {result.key} pour '{target_player_name}' "
+                                 f"après {result.attempts} essai(s): {result.error or result.response}")
             
             logger.info(f"Starter pack pour '{target_player_name}' (Steam ID: {steam_id}): {success_count} items ajoutés, {error_count} échecs")
             return success_count > 0
@@ -151,7 +144,7 @@ class ItemManager:
             logger.error(traceback.format_exc())
             return False
         finally:
-            _global_lock.release()
+            self._in_progress.discard(steam_id)
 
             
     async def give_item_to_player(self, player_name, item_id, count=1):
@@ -160,21 +153,20 @@ class ItemManager:
             logger.warning("Système verrouillé, impossible de donner l'item maintenant")
             return False
             
-        if not _global_lock.acquire(blocking=False):
-            logger.warning(f"Une autre opération est en cours")
+        if player_name in self._in_progress:
+            logger.warning(f"Une autre opération est en cours pour {player_name}")
             return False
+        self._in_progress.add(player_name)
             
         try:
             # Vérifier si le joueur est connecté
-            online_players = self.rcon_client.get_online_players()
-            
-            if player_name not in online_players:
+            if await self.rcon_client.roster.find(name=player_name, priority=PRIORITY_PLAYER) is None:
                 logger.warning(f"Le joueur {player_name} n'est pas connecté. Impossible de donner l'item.")
                 return False
                 
             # Exécuter la commande RCON
             command = f"con {player_name} spawnitem {item_id} {count}"
-            response = self.rcon_client.execute(command)
+            response = await self.rcon_client.execute(command, priority=PRIORITY_PLAYER, key=player_name)
             
             if response and "Unknown command" not in response:
                 logger.info(f"Item {item_id} (x{count}) ajouté avec succès pour {player_name}")
@@ -187,4 +179,4 @@ class ItemManager:
             logger.error(f"Erreur lors de l'ajout de l'item {item_id}: {e}")
             return False
         finally:
-            _global_lock.release() 
\ No newline at end of file
+            self._in_progress.discard(player_name) 
\ No newline at end of file
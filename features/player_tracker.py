@@ -9,6 +9,7 @@ import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.rcon_client import RCONClient
+from utils.rcon_scheduler import PRIORITY_BACKGROUND
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,10 @@ class PlayerTracker:
             except asyncio.CancelledError:
                 pass
 
+    def on_connection_events(self, events):
+        """Connexion ou déconnexion vue dans le log : la liste des joueurs en cache est périmée"""
+        self.rcon_client.roster.invalidate()
+
     async def _update_loop(self):
         """Boucle de mise à jour du nom du salon"""
         while self.is_running:
@@ -55,7 +60,7 @@ class PlayerTracker:
         """Met à jour le nom du salon avec le nombre de joueurs"""
         try:
             # Récupérer la liste des joueurs en ligne via RCON
-            online = self.rcon_client.get_online_players()
+            online = await self.rcon_client.get_online_players(priority=PRIORITY_BACKGROUND)
             count = len(online)
             
             # Vérifier si c'est le raid time
@@ -2,12 +2,21 @@ import logging
 import ftplib
 import os
 import tempfile
+import sqlite3
 from config.logging_config import setup_logging
 from config.settings import *
 from dotenv import load_dotenv
 from io import BytesIO
 import threading
 import shutil
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from utils.ftp_pool import FTPSessionPool, TransferCancelled, cancellation, check_cancelled, current_cancel_event, guard
+from utils.async_ftp import AsyncFTPHandler
+from utils.ftp_metrics import FTPMetrics
+from utils.game_db_cache import GameDBSnapshot
+from utils.remote_index import RemoteIndex
+from utils.wal_replica import GameDBReplica
+from utils.sqlite_loader import SpooledDownload, open_readonly
 
 load_dotenv()
 
@@ -46,53 +55,76 @@ class FTPHandler:
         if not all([self.host, self.user, self.password]):
             raise ValueError("Informations de connexion FTP manquantes dans le fichier .env")
         
-        self.ftp = None
         self.max_retries = 3
         self.retry_delay = 5  # secondes
-        self._lock = threading.Lock()
         self.timeout = 300  # 5 minutes
 
-    def _connect(self):
-        """Établit la connexion FTP avec gestion des erreurs"""
-        with self._lock:
-            for attempt in range(self.max_retries):
-                try:
-                    if self.ftp:
-                        try:
-                            self.ftp.quit()
-                        except:
-                            pass
-                    
-                    self.ftp = ftplib.FTP()
-                    self.ftp.connect(self.host, self.port, timeout=self.timeout)
-                    self.ftp.login(self.user, self.password)
-                    logger.info("Connexion FTP établie avec succès")
-                    return
-                except Exception as e:
-                    logger.error(f"Tentative {attempt + 1}/{self.max_retries} - Erreur lors de la connexion FTP: {e}")
-                    if attempt < self.max_retries - 1:
-                        import time
-                        time.sleep(self.retry_delay)
-                    else:
-                        logger.error("Impossible de se connecter au serveur FTP après plusieurs tentatives")
-                        raise
+        # Durées, débits et compteurs de toutes les opérations (commande !ftpstats)
+        self.metrics = FTPMetrics()
+
+        # Sessions authentifiées réutilisées d'une opération à l'autre
+        self.pool = FTPSessionPool(
+            self.host, self.port, self.user, self.password,
+            timeout=self.timeout,
+            max_size=int(os.getenv('FTP_POOL_SIZE', '4')),
+            keepalive_interval=int(os.getenv('FTP_KEEPALIVE', '60')),
+            max_idle=int(os.getenv('FTP_MAX_IDLE', '600')),
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+            metrics=self.metrics
+        )
+        # Téléchargement segmenté (plusieurs sessions en parallèle), désactivé par défaut
+        self.segments = int(os.getenv('FTP_SEGMENTS', '1'))
+        self.segment_min_size = int(os.getenv('FTP_SEGMENT_MIN_MB', '4')) * 1024 * 1024
+        self.rest_supported = True  # Passe à False au premier refus de REST par le serveur
+        self.index_ttl = int(os.getenv('FTP_INDEX_TTL', '300'))
+        self._snapshots = {}
+        self._indexes = {}
+        self._aio = None
+
+    @property
+    def aio(self) -> AsyncFTPHandler:
+        """Façade asynchrone partagée : les opérations s'exécutent hors de la boucle Discord"""
+        if self._aio is None:
+            self._aio = AsyncFTPHandler(self)
+        return self._aio
+
+    def get_snapshot(self, remote_path: str) -> GameDBSnapshot:
+        """Retourne la copie locale partagée d'une base distante (créée au premier appel).
+
+        Avec GAME_DB_REPLICATION=wal, la copie est une réplique alimentée par le WAL distant.
+        """
+        if remote_path not in self._snapshots:
+            if os.getenv('GAME_DB_REPLICATION', '').lower() == 'wal':
+                self._snapshots[remote_path] = GameDBReplica(self, remote_path)
+            else:
+                self._snapshots[remote_path] = GameDBSnapshot(self, remote_path)
+        return self._snapshots[remote_path]
+
+    def get_index(self, root: str = '.') -> RemoteIndex:
+        """Retourne l'index partagé (mis en cache FTP_INDEX_TTL secondes) d'une arborescence distante"""
+        if root not in self._indexes:
+            self._indexes[root] = RemoteIndex(self, root, ttl=self.index_ttl)
+        return self._indexes[root]
 
     def test_connection(self) -> bool:
         """Teste la connexion FTP"""
         try:
-            self._connect()
-            self.ftp.quit()
+            with self.metrics.measure('NOOP'):
+                self.pool.run(lambda ftp: ftp.voidcmd('NOOP'))
             return True
         except Exception as e:
             logger.error(f"❌ FTP connexion échouée : {e}")
             return False
 
     def download_file(self, remote_path: str, local_path: str) -> bool:
-        try:
-            self._connect()
+        def _download(ftp):
             with open(local_path, 'wb') as f:
-                self.ftp.retrbinary(f'RETR {remote_path}', f.write)
-            self.ftp.quit()
+                ftp.retrbinary(f'RETR {remote_path}', guard(transfer.counting(f.write)))
+
+        try:
+            with self.metrics.measure('RETR', remote_path) as transfer:
+                self.pool.run(_download)
             return True
         except Exception as e:
             logger.error(f"❌ Erreur download_file: {e}")
@@ -100,30 +132,55 @@ class FTPHandler:
 
     def read_database(self, remote_path: str) -> bytes:
         """Lire directement la base de données depuis le FTP sans la sauvegarder"""
-        try:
-            self._connect()
-            # Créer un fichier temporaire
-            temp = tempfile.NamedTemporaryFile(delete=False)
-            temp_path = temp.name
-            temp.close()
-
-            # Télécharger le fichier
-            with open(temp_path, 'wb') as f:
-                self.ftp.retrbinary(f'RETR {remote_path}', f.write)
-            self.ftp.quit()
-
-            # Lire le fichier
-            with open(temp_path, 'rb') as f:
-                data = f.read()
-
-            # Nettoyer
-            os.remove(temp_path)
-            return data
+        def _read(ftp):
+            # Les blocs reçus s'accumulent dans un seul tampon mémoire
+            buffer = BytesIO()
+            ftp.retrbinary(f'RETR {remote_path}', guard(transfer.counting(buffer.write)))
+            return buffer.getvalue()
 
+        try:
+            if self.segments > 1:
+                return self.read_segmented(remote_path)
+            with self.metrics.measure('RETR', remote_path) as transfer:
+                return self.pool.run(_read)
         except Exception as e:
             logger.error(f"❌ Erreur lecture base de données: {e}")
             return None
 
+    def download_database(self, remote_path: str, max_memory: int = None) -> SpooledDownload:
+        """Télécharge une base en mémoire, ou sur disque au-delà de max_memory octets"""
+        def _download(ftp):
+            download = SpooledDownload(max_memory)
+            try:
+                ftp.retrbinary(f'RETR {remote_path}', guard(transfer.counting(download.write)))
+            except Exception:
+                download.discard()
+                raise
+            return download.finish()
+
+        if self.segments > 1:
+            # Chaque plage est écrite à son décalage dans le tampon ou le fichier déversé
+            download = SpooledDownload(max_memory)
+            try:
+                self.read_segmented(remote_path, into=download)
+            except Exception:
+                download.discard()
+                raise
+            return download.finish()
+        with self.metrics.measure('RETR', remote_path) as transfer:
+            return self.pool.run(_download)
+
+    def open_database(self, remote_path: str, max_memory: int = None) -> sqlite3.Connection:
+        """Ouvre une base distante en lecture seule, sans fichier temporaire si elle tient en mémoire"""
+        download = self.download_database(remote_path, max_memory)
+        try:
+            return open_readonly(download)
+        finally:
+            # deserialize a copié les données ; un fichier déversé reste lisible par la
+            # connexion après suppression, sauf sous Windows (nettoyé par clear_cache)
+            if download.in_memory or os.name != 'nt':
+                download.discard()
+
     def write_database(self, remote_path: str, data: bytes) -> bool:
         """Écrire directement la base de données sur le FTP"""
         try:
@@ -148,46 +205,25 @@ class FTPHandler:
             return False
 
     def get_directory_structure(self, path: str = '/') -> dict:
-        """Récupère la structure des répertoires"""
-        self._connect()
-        def _walk(cur_path):
-            self.ftp.cwd(cur_path)
-            entries = []
-            self.ftp.retrlines('LIST', entries.append)
-            tree = {}
-            for line in entries:
-                parts = line.split()
-                name = parts[-1]
-                if line.startswith('d'):
-                    tree[name] = _walk(cur_path + '/' + name)
-                else:
-                    size = parts[4]
-                    tree[name] = f"{size} bytes"
-            self.ftp.cwd('..')
-            return tree
-        struct = _walk(path)
-        self.ftp.quit()
-        return struct
+        """Récupère la structure des répertoires (depuis l'index MLSD mis en cache)"""
+        return self.get_index(path).tree()
 
     def close(self):
-        """Ferme la connexion FTP"""
-        if self.ftp:
-            try:
-                self.ftp.quit()
-                logger.info("Connexion FTP fermée")
-            except:
-                pass
-            finally:
-                self.ftp = None
+        """Ferme les connexions FTP"""
+        if self._aio is not None:
+            self._aio.shutdown()
+        self.pool.close()
 
     def upload_file(self, local_path, remote_path):
         """Envoie un fichier vers le serveur FTP"""
-        try:
-            self._connect()
+        def _upload(ftp):
             with open(local_path, 'rb') as f:
                 # Augmenter la taille du buffer pour l'upload
-                self.ftp.storbinary(f'STOR {remote_path}', f, blocksize=8192)
-            self.ftp.quit()
+                ftp.storbinary(f'STOR {remote_path}', f, blocksize=8192, callback=guard(transfer.counting(lambda block: None)))
+
+        try:
+            with self.metrics.measure('STOR', remote_path) as transfer:
+                self.pool.run(_upload)
             logger.info(f"Fichier {local_path} envoyé avec succès")
             return True
         except Exception as e:
@@ -196,12 +232,14 @@ class FTPHandler:
             
     def list_files(self, remote_path='.'):
         """Liste les fichiers dans un répertoire FTP"""
-        try:
-            self._connect()
+        def _list(ftp):
             files = []
-            self.ftp.retrlines(f'LIST {remote_path}', lambda x: files.append(x.split()[-1]))
-            self.ftp.quit()
+            ftp.retrlines(f'LIST {remote_path}', lambda x: files.append(x.split()[-1]))
             return files
+
+        try:
+            with self.metrics.measure('LIST', remote_path):
+                return self.pool.run(_list)
         except Exception as e:
             logger.error(f"Erreur lors de la liste des fichiers dans {remote_path}: {e}")
             return []
@@ -209,9 +247,8 @@ class FTPHandler:
     def create_directory(self, remote_path):
         """Crée un répertoire sur le serveur FTP"""
         try:
-            self._connect()
-            self.ftp.mkd(remote_path)
-            self.ftp.quit()
+            with self.metrics.measure('MKD', remote_path):
+                self.pool.run(lambda ftp: ftp.mkd(remote_path))
             logger.info(f"Répertoire {remote_path} créé avec succès")
             return True
         except Exception as e:
@@ -221,9 +258,8 @@ class FTPHandler:
     def delete_file(self, remote_path):
         """Supprime un fichier sur le serveur FTP"""
         try:
-            self._connect()
-            self.ftp.delete(remote_path)
-            self.ftp.quit()
+            with self.metrics.measure('DELE', remote_path):
+                self.pool.run(lambda ftp: ftp.delete(remote_path))
             logger.info(f"Fichier {remote_path} supprimé avec succès")
             return True
         except Exception as e:
@@ -233,9 +269,8 @@ class FTPHandler:
     def rename_file(self, old_name, new_name):
         """Renomme un fichier sur le serveur FTP"""
         try:
-            self._connect()
-            self.ftp.rename(old_name, new_name)
-            self.ftp.quit()
+            with self.metrics.measure('RNFR', old_name):
+                self.pool.run(lambda ftp: ftp.rename(old_name, new_name))
             logger.info(f"Fichier {old_name} renommé en {new_name} avec succès")
             return True
         except Exception as e:
@@ -244,11 +279,14 @@ class FTPHandler:
             
     def get_file_size(self, remote_path):
         """Récupère la taille d'un fichier sur le serveur FTP"""
+        def _size(ftp):
+            # Certains serveurs refusent SIZE en mode ASCII, laissé actif par un LIST précédent
+            ftp.voidcmd('TYPE I')
+            return ftp.size(remote_path)
+
         try:
-            self._connect()
-            size = self.ftp.size(remote_path)
-            self.ftp.quit()
-            return size
+            with self.metrics.measure('SIZE', remote_path):
+                return self.pool.run(_size)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de la taille du fichier {remote_path}: {e}")
             return None
@@ -256,10 +294,9 @@ class FTPHandler:
     def get_file_modification_time(self, remote_path):
         """Récupère la date de modification d'un fichier sur le serveur FTP"""
         try:
-            self._connect()
             # Utiliser MDTM pour obtenir la date de modification
-            response = self.ftp.sendcmd(f'MDTM {remote_path}')
-            self.ftp.quit()
+            with self.metrics.measure('MDTM', remote_path):
+                response = self.pool.run(lambda ftp: ftp.sendcmd(f'MDTM {remote_path}'))
             if response.startswith('213'):
                 # Format: 213 YYYYMMDDHHMMSS
                 timestamp = response[4:].strip()
@@ -267,4 +304,174 @@ class FTPHandler:
             return None
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de la date de modification du fichier {remote_path}: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    def stat(self, remote_path, missing_ok=False):
+        """Récupère la taille et la date de modification d'un fichier en une seule session.
+
+        Avec missing_ok=True, un fichier absent (550) retourne None sans journaliser d'erreur.
+        """
+        def _stat(ftp):
+            ftp.voidcmd('TYPE I')
+            size = ftp.size(remote_path)
+            response = ftp.sendcmd(f'MDTM {remote_path}')
+            # Format: 213 YYYYMMDDHHMMSS
+            mtime = response[4:].strip() if response.startswith('213') else None
+            return size, mtime
+
+        try:
+            with self.metrics.measure('STAT', remote_path):
+                return self.pool.run(_stat)
+        except ftplib.error_perm as e:
+            if not (missing_ok and str(e).startswith('550')):
+                logger.error(f"Erreur lors de la récupération des métadonnées du fichier {remote_path}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des métadonnées du fichier {remote_path}: {e}")
+            return None
+
+    def read_from_offset(self, remote_path: str, offset: int = 0) -> bytes:
+        """Lit un fichier distant à partir d'un décalage en octets (commande REST).
+
+        Contrairement à read_database, les erreurs sont propagées pour que l'appelant
+        puisse distinguer un refus de REST d'une panne de connexion.
+        """
+        def _read(ftp):
+            buffer = BytesIO()
+            ftp.retrbinary(f'RETR {remote_path}', guard(transfer.counting(buffer.write)), rest=offset or None)
+            return buffer.getvalue()
+
+        with self.metrics.measure('RETR', remote_path) as transfer:
+            return self.pool.run(_read)
+
+    def read_range(self, remote_path: str, offset: int, length: int, into=None) -> bytes:
+        """Lit au plus length octets à partir de offset (REST puis RETR interrompu).
+
+        Si into est fourni (memoryview de length octets, ou fichier ouvert en écriture
+        et positionné au début de la plage), les données y sont écrites directement
+        et le nombre d'octets lus est retourné. Les erreurs sont propagées,
+        notamment le refus de REST par le serveur.
+        """
+        def _read(ftp):
+            ftp.voidcmd('TYPE I')
+            sink = into if hasattr(into, 'write') else None
+            if sink is not None:
+                target = memoryview(bytearray(min(65536, length)))
+            else:
+                target = into if into is not None else memoryview(bytearray(length))
+            conn = ftp.transfercmd(f'RETR {remote_path}', rest=offset or None)
+            received = 0
+            try:
+                while received < length:
+                    check_cancelled()
+                    if sink is not None:
+                        count = conn.recv_into(target, min(len(target), length - received))
+                        sink.write(target[:count])
+                    else:
+                        count = conn.recv_into(target[received:], min(65536, length - received))
+                    if not count:
+                        break
+                    received += count
+                    transfer.add(count)
+            finally:
+                conn.close()
+            # Fermer le canal de données avant la fin provoque 426/451 selon le serveur
+            try:
+                ftp.voidresp()
+            except ftplib.error_temp as e:
+                if not str(e).startswith(('426', '450', '451')):
+                    raise
+            return received if into is not None else bytes(target[:received])
+
+        with self.metrics.measure('RANGE', remote_path) as transfer:
+            return self.pool.run(_read)
+
+    def read_segmented(self, remote_path: str, segments: int = None, into: SpooledDownload = None):
+        """Télécharge un fichier par plages disjointes sur plusieurs sessions en parallèle.
+
+        Chaque session lit sa plage (REST + RETR partiel) directement à sa place :
+        dans un tampon préalloué à la taille annoncée par SIZE, ou, avec into, dans
+        le SpooledDownload (sa mémoire, ou son fichier temporaire au-delà de
+        max_memory). Repli sur un flux unique si le serveur refuse REST ou si le
+        total reçu ne correspond pas à SIZE. Retourne le tampon, ou into.
+        """
+        segments = segments or self.segments
+        stat = self.stat(remote_path)
+        if stat is None:
+            raise RuntimeError(f"Taille de {remote_path} indisponible")
+        size = stat[0]
+        segments = min(segments, self.pool.max_size, size // self.segment_min_size)
+        if segments < 2 or not self.rest_supported:
+            return self._read_whole(remote_path, into)
+
+        if into is None:
+            buffer = bytearray(size)
+            view = memoryview(buffer)
+        else:
+            view = into.allocate(size)
+        bounds = [(i * size // segments, (i + 1) * size // segments) for i in range(segments)]
+        # Les sessions s'arrêtent ensemble si une plage échoue ou si l'appelant annule
+        parent = current_cancel_event()
+        abort = threading.Event()
+
+        def _segment(start, end):
+            with cancellation(abort):
+                if view is not None:
+                    return self.read_range(remote_path, start, end - start, into=view[start:end])
+                # Fichier déversé : un descripteur par session, écrit à partir du début de la plage
+                with open(into.path, 'r+b') as f:
+                    f.seek(start)
+                    return self.read_range(remote_path, start, end - start, into=f)
+
+        try:
+            # Durée et débit de l'ensemble ; chaque plage est aussi comptée (RANGE) pour le fichier
+            with self.metrics.measure('SEGMENTED') as transfer:
+                with ThreadPoolExecutor(max_workers=segments, thread_name_prefix='ftp-segment') as executor:
+                    futures = [executor.submit(_segment, start, end) for start, end in bounds]
+                    pending = futures
+                    try:
+                        while pending:
+                            done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                            if any(future.exception() for future in done):
+                                break
+                            if parent is not None and parent.is_set():
+                                break
+                    finally:
+                        if pending:
+                            abort.set()
+                check_cancelled()
+                errors = [future.exception() for future in futures if future.exception()]
+                if errors:
+                    # L'erreur d'origine plutôt que les annulations qu'elle a provoquées
+                    raise next((e for e in errors if not isinstance(e, TransferCancelled)), errors[0])
+                received = sum(future.result() for future in futures)
+                transfer.add(received)
+        except (ftplib.error_perm, ftplib.error_reply) as e:
+            if str(e).startswith('550'):
+                # Fichier illisible : ce n'est pas un refus de REST
+                raise
+            logger.warning(f"REST refusé pour {remote_path}, repli sur un flux unique: {e}")
+            self.rest_supported = False
+            return self._read_whole(remote_path, into)
+        finally:
+            if view is not None:
+                view.release()
+
+        if received != size:
+            # Fichier modifié pendant le transfert : une lecture d'un seul tenant reste cohérente
+            logger.warning(f"Taille reçue pour {remote_path} ({received}) différente de SIZE ({size}), repli sur un flux unique")
+            return self._read_whole(remote_path, into)
+        return buffer if into is None else into
+
+    def _read_whole(self, remote_path: str, into: SpooledDownload = None):
+        """Lecture d'un seul tenant : en mémoire, ou en flux dans into (recommencé depuis le début)"""
+        if into is None:
+            return bytearray(self.read_from_offset(remote_path))
+
+        def _download(ftp):
+            ftp.retrbinary(f'RETR {remote_path}', guard(transfer.counting(into.write)))
+
+        into.reset()
+        with self.metrics.measure('RETR', remote_path) as transfer:
+            self.pool.run(_download)
+        return into
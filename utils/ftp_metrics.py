@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+MEGABYTE = 1024 * 1024
+
+
+class RollingHistogram:
+    """Fenêtre glissante des dernières valeurs mesurées (percentiles sur la fenêtre)"""
+
+    def __init__(self, size=512):
+        self.samples = deque(maxlen=size)
+        self.count = 0      # Nombre total de valeurs depuis le démarrage
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {'count': self.count}
+        return {
+            'count': self.count,
+            'mean': self.total / self.count,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': max(self.samples),
+        }
+
+
+class _Measure:
+    """Mesure en cours d'une opération FTP (octets transférés)"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def add(self, nbytes):
+        self.bytes += nbytes
+
+    def counting(self, callback):
+        """Enveloppe un callback de transfert pour compter les octets qui y passent"""
+        def _counted(data):
+            self.bytes += len(data)
+            return callback(data)
+        return _counted
+
+
+class FTPMetrics:
+    """Durées, débits et compteurs des opérations FTP, par opération et par fichier distant"""
+
+    def __init__(self, window=512):
+        self.window = window
+        self.started_at = time.time()
+        self.latency = defaultdict(self._histogram)     # opération -> durée (s)
+        self.throughput = defaultdict(self._histogram)  # opération -> débit (Mo/s)
+        self.counters = defaultdict(int)                # connexions, reconnexions, évictions...
+        self.paths = {}                                 # fichier distant -> compteurs
+        self._lock = threading.Lock()
+        self._current = threading.local()               # Fichier de l'opération en cours dans le thread
+
+    def _histogram(self):
+        return RollingHistogram(self.window)
+
+    def _path_stats(self, path):
+        stats = self.paths.get(path)
+        if stats is None:
+            stats = self.paths[path] = {'operations': 0, 'bytes': 0, 'failures': 0, 'retries': 0,
+                                        'reconnects': 0, 'evictions': 0, 'seconds': 0.0, 'last_error': None}
+        return stats
+
+    def incr(self, name, count=1):
+        """Incrémente un compteur global, et celui du fichier de l'opération en cours s'il y en a une"""
+        path = getattr(self._current, 'path', None)
+        with self._lock:
+            self.counters[name] += count
+            if path is not None:
+                stats = self._path_stats(path)
+                stats[name] = stats.get(name, 0) + count
+
+    def observe(self, operation, duration):
+        """Enregistre la durée d'une étape sans fichier associé (connexion, login)"""
+        with self._lock:
+            self.latency[operation].add(duration)
+
+    def record(self, operation, path, duration, nbytes=0, error=None):
+        """Enregistre une opération terminée"""
+        with self._lock:
+            self.latency[operation].add(duration)
+            if nbytes and duration > 0:
+                self.throughput[operation].add(nbytes / duration / MEGABYTE)
+            self.counters['operations'] += 1
+            if error is not None:
+                self.counters['failures'] += 1
+            if path is None:
+                # Opération agrégée (ex. SEGMENTED) : ses octets sont déjà comptés par fichier
+                return
+            self.counters['bytes'] += nbytes
+            stats = self._path_stats(path)
+            stats['operations'] += 1
+            stats['bytes'] += nbytes
+            stats['seconds'] += duration
+            if error is not None:
+                stats['failures'] += 1
+                stats['last_error'] = f"{type(error).__name__}: {error}"
+
+    @contextmanager
+    def measure(self, operation, path=None):
+        """Chronomètre une opération ; une exception est comptée comme un échec puis propagée.
+
+        Les tentatives, reconnexions et évictions comptées pendant l'opération (dans
+        le même thread) sont aussi attribuées à path.
+        """
+        measure = _Measure()
+        previous = getattr(self._current, 'path', None)
+        if path is not None:
+            self._current.path = path
+        started = time.monotonic()
+        try:
+            yield measure
+        except Exception as e:
+            self.record(operation, path, time.monotonic() - started, measure.bytes, error=e)
+            raise
+        finally:
+            self._current.path = previous
+        self.record(operation, path, time.monotonic() - started, measure.bytes)
+
+    def snapshot(self) -> dict:
+        """État courant des métriques sous forme de dictionnaire sérialisable"""
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'uptime': time.time() - self.started_at,
+                'counters': dict(self.counters),
+                'latency': {op: hist.summary() for op, hist in self.latency.items()},
+                'throughput': {op: hist.summary() for op, hist in self.throughput.items()},
+                'paths': {path: dict(stats) for path, stats in self.paths.items()},
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def summary_lines(self, max_paths=10) -> list:
+        """Résumé lisible des métriques (commande d'administration)"""
+        snap = self.snapshot()
+        counters = snap['counters']
+        lines = [
+            f"Depuis {snap['uptime'] / 3600:.1f} h : {counters.get('operations', 0)} opérations, "
+            f"{counters.get('bytes', 0) / MEGABYTE:.1f} Mo, {counters.get('failures', 0)} échecs",
+            f"Connexions: {counters.get('connects', 0)} (échecs {counters.get('connect_failures', 0)}, "
+            f"tentatives {counters.get('retries', 0)}), reconnexions {counters.get('reconnects', 0)}, "
+            f"évictions {counters.get('evictions', 0)}",
+        ]
+        for op, summary in sorted(snap['latency'].items()):
+            if 'p50' not in summary:
+                continue
+            line = (f"{op}: {summary['count']}× p50 {summary['p50'] * 1000:.0f} ms, "
+                    f"p99 {summary['p99'] * 1000:.0f} ms")
+            rate = snap['throughput'].get(op)
+            if rate and 'p50' in rate:
+                line += f", {rate['p50']:.2f} Mo/s"
+            lines.append(line)
+        busiest = sorted(snap['paths'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+        for path, stats in busiest[:max_paths]:
+            lines.append(f"{path}: {stats['operations']} op., {stats['bytes'] / MEGABYTE:.1f} Mo, "
+                         f"{stats['seconds']:.1f} s, {stats['failures']} échecs, "
+                         f"{stats['retries']} tentatives, {stats['reconnects']} reconnexions")
+        return lines
@@ -0,0 +1,235 @@
+import ftplib
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from utils.ftp_metrics import FTPMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class TransferCancelled(Exception):
+    """Transfert interrompu à la demande de l'appelant (annulation ou timeout)"""
+
+
+# Erreurs qui indiquent une session morte (timeout serveur, connexion coupée, 421...)
+# (erreurs de socket uniquement : une erreur d'écriture locale ne condamne pas la session)
+DEAD_SESSION_ERRORS = (EOFError, ConnectionError, socket.timeout, TransferCancelled)
+
+# Événement d'annulation associé au thread qui exécute l'opération en cours
+_cancel_state = threading.local()
+
+
+@contextmanager
+def cancellation(event):
+    """Associe un threading.Event d'annulation aux opérations FTP du thread courant"""
+    previous = getattr(_cancel_state, 'event', None)
+    _cancel_state.event = event
+    try:
+        yield event
+    finally:
+        _cancel_state.event = previous
+
+
+def current_cancel_event():
+    """Retourne l'événement d'annulation du thread courant (None hors d'une opération annulable)"""
+    return getattr(_cancel_state, 'event', None)
+
+
+def check_cancelled():
+    """Lève TransferCancelled si l'opération du thread courant a été annulée"""
+    event = current_cancel_event()
+    if event is not None and event.is_set():
+        raise TransferCancelled("Transfert FTP annulé")
+
+
+def guard(callback):
+    """Enveloppe un callback de transfert pour qu'il respecte l'annulation"""
+    def _guarded(data):
+        check_cancelled()
+        return callback(data)
+    return _guarded
+
+
+def is_dead_session_error(error) -> bool:
+    """Indique si une erreur signifie que la session FTP n'est plus utilisable"""
+    if isinstance(error, ftplib.error_temp):
+        return str(error).startswith('421')
+    return isinstance(error, DEAD_SESSION_ERRORS)
+
+
+class FTPSessionPool:
+    """Pool de sessions FTP authentifiées, maintenues en vie par des NOOP"""
+
+    def __init__(self, host, port, user, password, timeout=300, max_size=4,
+                 keepalive_interval=60, max_idle=600, max_retries=3, retry_delay=5, metrics=None):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.max_size = max_size
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.metrics = metrics or FTPMetrics()
+
+        self._idle = []  # Liste de (session, dernier usage, dernière vérification par NOOP)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._stop = threading.Event()
+        self._keepalive_thread = None
+
+    def _open(self) -> ftplib.FTP:
+        """Ouvre et authentifie une nouvelle session FTP avec retry"""
+        for attempt in range(self.max_retries):
+            check_cancelled()
+            try:
+                ftp = ftplib.FTP()
+                started = time.monotonic()
+                ftp.connect(self.host, self.port, timeout=self.timeout)
+                connected = time.monotonic()
+                ftp.login(self.user, self.password)
+                self.metrics.observe('CONNECT', connected - started)
+                self.metrics.observe('LOGIN', time.monotonic() - connected)
+                self.metrics.incr('connects')
+                logger.info("Connexion FTP établie avec succès")
+                return ftp
+            except Exception as e:
+                logger.error(f"Tentative {attempt + 1}/{self.max_retries} - Erreur lors de la connexion FTP: {e}")
+                self.metrics.incr('connect_failures')
+                if attempt < self.max_retries - 1:
+                    self.metrics.incr('retries')
+                    event = current_cancel_event()
+                    if event is not None:
+                        # Attente interrompue dès que l'appelant annule
+                        event.wait(self.retry_delay)
+                    else:
+                        time.sleep(self.retry_delay)
+                else:
+                    logger.error("Impossible de se connecter au serveur FTP après plusieurs tentatives")
+                    raise
+
+    def _discard(self, ftp, force=False):
+        """Ferme une session sans se soucier des erreurs.
+
+        force=True ferme la socket sans QUIT (transfert interrompu en cours de route).
+        """
+        try:
+            if force:
+                raise TransferCancelled()
+            ftp.quit()
+        except Exception:
+            try:
+                ftp.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        """Récupère une session inactive valide, ou en ouvre une nouvelle"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                ftp, _, last_checked = self._idle.pop()
+
+            # Une session restée inactive trop longtemps est vérifiée avant usage
+            if time.monotonic() - last_checked < self.keepalive_interval:
+                return ftp, True
+            try:
+                ftp.voidcmd('NOOP')
+                return ftp, True
+            except Exception as e:
+                logger.info(f"Session FTP inactive expirée, éviction: {e}")
+                self.metrics.incr('evictions')
+                self._discard(ftp)
+
+        return self._open(), False
+
+    def _checkin(self, ftp):
+        """Remet une session dans le pool"""
+        with self._lock:
+            if self._stop.is_set():
+                self._discard(ftp)
+                return
+            now = time.monotonic()
+            self._idle.append((ftp, now, now))
+            if self._keepalive_thread is None:
+                self._keepalive_thread = threading.Thread(
+                    target=self._keepalive_loop, name="ftp-keepalive", daemon=True
+                )
+                self._keepalive_thread.start()
+
+    def run(self, operation):
+        """Exécute operation(ftp) sur une session du pool.
+
+        Si une session réutilisée s'avère morte, elle est évincée et l'opération
+        est relancée une fois sur une session neuve.
+        """
+        self._slots.acquire()
+        try:
+            ftp, reused = self._checkout()
+            try:
+                result = operation(ftp)
+            except Exception as e:
+                if not is_dead_session_error(e):
+                    self._checkin(ftp)
+                    raise
+                self._discard(ftp, force=isinstance(e, TransferCancelled))
+                if not reused or isinstance(e, TransferCancelled):
+                    raise
+                logger.info(f"Session FTP morte évincée, nouvelle tentative: {e}")
+                self.metrics.incr('reconnects')
+                ftp = self._open()
+                try:
+                    result = operation(ftp)
+                except Exception as e:
+                    if is_dead_session_error(e):
+                        self._discard(ftp, force=isinstance(e, TransferCancelled))
+                    else:
+                        self._checkin(ftp)
+                    raise
+            self._checkin(ftp)
+            return result
+        finally:
+            self._slots.release()
+
+    def _keepalive_loop(self):
+        """Envoie des NOOP aux sessions inactives et évince celles qui sont mortes ou trop vieilles"""
+        while not self._stop.wait(self.keepalive_interval / 2):
+            with self._lock:
+                idle, self._idle = self._idle, []
+
+            now = time.monotonic()
+            alive = []
+            for ftp, last_used, last_checked in idle:
+                if now - last_used > self.max_idle:
+                    self._discard(ftp)
+                    continue
+                if now - last_checked >= self.keepalive_interval:
+                    try:
+                        ftp.voidcmd('NOOP')
+                    except Exception as e:
+                        logger.info(f"Keepalive FTP échoué, éviction de la session: {e}")
+                        self.metrics.incr('evictions')
+                        self._discard(ftp)
+                        continue
+                    # Le NOOP ne compte pas comme un usage : max_idle reste mesuré depuis last_used
+                    last_checked = time.monotonic()
+                alive.append((ftp, last_used, last_checked))
+
+            with self._lock:
+                # Les sessions rendues pendant le keepalive sont plus récentes
+                self._idle = alive + self._idle
+
+    def close(self):
+        """Ferme toutes les sessions inactives et arrête le keepalive"""
+        self._stop.set()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for ftp, _, _ in idle:
+            self._discard(ftp)
+        if idle:
+            logger.info("Connexions FTP fermées")
@@ -0,0 +1,87 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from utils.sqlite_loader import open_readonly
+
+logger = logging.getLogger(__name__)
+
+
+class GameDBSnapshot:
+    """Copie locale d'une base SQLite distante, retéléchargée uniquement quand elle change.
+
+    Chaque accès coûte un aller-retour SIZE/MDTM ; le téléchargement complet
+    n'a lieu que si la taille ou la date de modification distante a changé
+    depuis la dernière copie. La copie est gardée en mémoire, ou dans un
+    fichier temporaire si elle dépasse max_memory octets.
+    """
+
+    def __init__(self, ftp_handler, remote_path, max_memory=None):
+        self.ftp = ftp_handler
+        self.remote_path = remote_path
+        self.max_memory = max_memory
+        self._download = None   # SpooledDownload de la dernière copie
+        self.size = None        # Taille distante de la copie locale
+        self.mtime = None       # MDTM distant de la copie locale (YYYYMMDDHHMMSS)
+        self.fetched_at = None  # Date du dernier téléchargement complet
+        self.checked_at = None  # Date de la dernière vérification SIZE/MDTM
+        self._lock = threading.Lock()
+
+    @property
+    def last_modified(self):
+        """Date de la sauvegarde distante correspondant à la copie locale (UTC)"""
+        if not self.mtime:
+            return None
+        try:
+            return datetime.strptime(self.mtime[:14], '%Y%m%d%H%M%S').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+
+    def _has_local_copy(self) -> bool:
+        return self._download is not None
+
+    def refresh(self) -> bool:
+        """Met à jour la copie locale si nécessaire.
+
+        Retourne True si un nouveau téléchargement a eu lieu, False si la copie
+        locale a été réutilisée.
+        """
+        with self._lock:
+            stat = self.ftp.stat(self.remote_path)
+            if stat is None:
+                if self._has_local_copy():
+                    logger.warning(f"Métadonnées de {self.remote_path} indisponibles, réutilisation de la copie locale")
+                    return False
+                raise RuntimeError("Impossible de lire la base de données depuis le FTP")
+
+            self.checked_at = datetime.now()
+            if stat == (self.size, self.mtime) and self._has_local_copy():
+                return False
+
+            try:
+                download = self.ftp.download_database(self.remote_path, self.max_memory)
+            except Exception as e:
+                if self._has_local_copy():
+                    logger.warning(f"Téléchargement de {self.remote_path} échoué, réutilisation de la copie locale: {e}")
+                    return False
+                raise RuntimeError("Impossible de lire la base de données depuis le FTP") from e
+
+            previous, self._download = self._download, download
+            if previous is not None:
+                previous.discard()
+
+            size, mtime = stat
+            if download.size != size:
+                # Sauvegarde en cours pendant le transfert : on forcera un nouveau téléchargement
+                logger.warning(f"Taille inattendue pour {self.remote_path}, la copie sera retéléchargée")
+                size = None
+            self.size, self.mtime = size, mtime
+            self.fetched_at = datetime.now()
+            logger.info(f"Copie locale de {self.remote_path} mise à jour ({self.mtime})")
+            return True
+
+    def connect(self) -> sqlite3.Connection:
+        """Ouvre une connexion en lecture seule sur une copie à jour"""
+        self.refresh()
+        with self._lock:
+            return open_readonly(self._download)
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Types d'événements extraits de ConanSandbox.log
+EVENT_CHAT = 'chat'
+EVENT_JOIN = 'join'
+EVENT_LEAVE = 'leave'
+EVENT_DEATH = 'death'                            # Mort d'un personnage, avec ou sans tueur
+EVENT_BUILDING_DESTROYED = 'building_destroyed'
+EVENT_SERVER_RESTART = 'server_restart'          # Nouveau fichier de log : le serveur a redémarré
+
+# Préfixe des lignes : [2025.06.01-17.57.38:972][555]
+_TIMESTAMP = re.compile(r'\[(\d{4})\.(\d\d)\.(\d\d)-(\d\d)\.(\d\d)\.(\d\d):(\d{3})\]\[\s*(\d+)\]')
+
+# Identité d'un personnage telle qu'écrite par le serveur : Character Nom (uid 12364, player 76561198276177053)
+_CHARACTER = r'Character (?P<{0}>[^()]+?) \(uid (?P<{0}_id>\d+)(?:, player (?P<{0}_steam_id>\d+))?\)'
+
+# Table des événements : (type, littéral, motif). Le littéral sert de préfiltre : le
+# motif n'est essayé que sur les lignes qui le contiennent. Ajouter une entrée ici
+# suffit pour extraire un nouvel événement (ou un autre format d'une même ligne).
+EVENT_PATTERNS = (
+    (EVENT_CHAT, 'ChatWindow', re.compile(
+        r'Character (?P<char_name>[^()]+) \(uid (?P<uid>\d+), player (?P<steam_id>\d+)\) said: (?P<message>.+)')),
+    (EVENT_JOIN, 'Join succeeded', re.compile(r'Join succeeded: (?P<player_name>.+)')),
+    (EVENT_LEAVE, 'Player disconnected', re.compile(
+        r'Player disconnected: (?P<player_name>.+?)(?: \((?P<steam_id>\d+)\))?\s*$')),
+    (EVENT_DEATH, 'killed', re.compile(
+        _CHARACTER.format('victim') + r' (?:was )?killed(?: by (?:' + _CHARACTER.format('killer')
+        + r'|(?P<killer_name>.+?)))?\s*$')),
+    (EVENT_DEATH, 'died', re.compile(_CHARACTER.format('victim') + r' died')),
+    (EVENT_BUILDING_DESTROYED, 'destroyed', re.compile(
+        r'Building (?P<building>.+?)(?: owned by (?P<owner>.+?))? (?:was )?destroyed(?: by (?P<destroyed_by>.+?))?\s*$')),
+    (EVENT_SERVER_RESTART, 'Log file open', re.compile(
+        r'Log file open, (?P<month>\d\d)/(?P<day>\d\d)/(?P<year>\d\d) (?P<time>\d\d:\d\d:\d\d)')),
+)
+
+
+_UNSET = object()
+
+
+class LogEvent:
+    """Événement extrait d'une ligne du log du serveur.
+
+    Les champs et l'horodatage ne sont extraits de la ligne qu'au premier accès :
+    un abonné ne lit souvent qu'un champ (le message du chat) de chaque événement.
+    """
+
+    __slots__ = ('type', 'line', '_match', '_fields', '_timestamp', '_frame')
+
+    def __init__(self, type, match, line):
+        self.type = type
+        self.line = line
+        self._match = match             # Correspondance du motif de la table
+        self._fields = None
+        self._timestamp = _UNSET
+        self._frame = None
+
+    @property
+    def fields(self):
+        """Champs nommés du motif (char_name, message, killer...)"""
+        if self._fields is None:
+            self._fields = {name: value.strip() if value else value
+                            for name, value in self._match.groupdict().items()}
+        return self._fields
+
+    @property
+    def timestamp(self):
+        """datetime de la ligne (None si la ligne n'a pas d'horodatage)"""
+        if self._timestamp is _UNSET:
+            self._timestamp, self._frame = parse_timestamp(self.line)
+            if self._timestamp is None and self.type == EVENT_SERVER_RESTART:
+                fields = self.fields
+                self._timestamp = datetime.strptime(
+                    f"{fields['month']}/{fields['day']}/{fields['year']} {fields['time']}", '%m/%d/%y %H:%M:%S')
+        return self._timestamp
+
+    @property
+    def frame(self):
+        """Numéro de frame du serveur ([555])"""
+        self.timestamp
+        return self._frame
+
+    def __getitem__(self, name):
+        try:
+            value = self._match.group(name)
+        except IndexError:
+            raise KeyError(name) from None
+        return value.strip() if value else value
+
+    def get(self, name, default=None):
+        value = self[name] if name in self._match.re.groupindex else None
+        return default if value is None else value
+
+    def __repr__(self):
+        return f"LogEvent({self.type!r}, {self.timestamp}, {self.fields!r})"
+
+
+def parse_timestamp(line):
+    """Horodatage et frame d'une ligne de log ((None, None) si absents)"""
+    match = _TIMESTAMP.match(line)
+    if match is None:
+        return None, None
+    year, month, day, hour, minute, second, millis, frame = map(int, match.groups())
+    try:
+        return datetime(year, month, day, hour, minute, second, millis * 1000), frame
+    except ValueError:
+        return None, frame
+
+
+class LogEventPipeline:
+    """Transforme les lignes du log en événements typés et les diffuse aux abonnés.
+
+    Un abonné reçoit, à chaque lot de lignes lues, la liste des événements des
+    types auxquels il s'est abonné, dans l'ordre du log. Seuls les motifs des
+    types ayant au moins un abonné sont essayés, et seulement sur les lignes
+    qui contiennent leur littéral.
+
+    Un abonné transactionnel reçoit aussi la connexion SQLite du lot : ses
+    écritures sont validées avec le curseur du log, ou annulées avec lui. Son
+    erreur est propagée pour que le lot soit relu, au lieu d'être perdue.
+    """
+
+    def __init__(self, patterns=EVENT_PATTERNS):
+        self.patterns = patterns
+        self.counters = defaultdict(int)   # lignes lues, événements par type, erreurs des abonnés
+        self._subscribers = []             # (types, handler, transactional)
+        self._literals = ()                # ((littéral, ((type, motif), ...)), ...) dans l'ordre de la table
+        self._compile()
+
+    def _compile(self):
+        active = {event_type for types, _, _ in self._subscribers for event_type in types}
+        by_literal = {}
+        for event_type, literal, regex in self.patterns:
+            if event_type in active:
+                by_literal.setdefault(literal, []).append((event_type, regex))
+        self._literals = tuple((literal, tuple(entries)) for literal, entries in by_literal.items())
+
+    def subscribe(self, event_types, handler, transactional=False):
+        """Abonne handler(events) aux types donnés (fonction ou coroutine).
+
+        Avec transactional=True, le handler est appelé avec (events, conn).
+        """
+        if isinstance(event_types, str):
+            event_types = (event_types,)
+        self._subscribers.append((frozenset(event_types), handler, transactional))
+        self._compile()
+
+    def unsubscribe(self, handler):
+        self._subscribers = [entry for entry in self._subscribers if entry[1] != handler]
+        self._compile()
+
+    def parse_line(self, line):
+        """Événement décrit par la ligne, ou None.
+
+        Les littéraux sont essayés dans l'ordre de la table : "ChatWindow" passe
+        avant "killed" ou "destroyed", que le message d'un joueur peut contenir.
+        """
+        for literal, entries in self._literals:
+            if literal in line:
+                for event_type, regex in entries:
+                    match = regex.search(line)
+                    if match is not None:
+                        return LogEvent(event_type, match, line)
+        return None
+
+    def parse(self, lines):
+        """Liste des événements d'une suite de lignes, dans l'ordre (une seule passe).
+
+        Chaque ligne est d'abord testée avec `literal in line` ; seules celles qui
+        contiennent un littéral (une infime partie du log) passent aux motifs.
+        """
+        if len(self._literals) == 1 and len(self._literals[0][1]) == 1:
+            # Un seul motif actif (cas courant : seul le chat est suivi)
+            literal, ((event_type, regex),) = self._literals[0]
+            search = regex.search
+            return [LogEvent(event_type, match, line)
+                    for line in [line for line in lines if literal in line]
+                    if (match := search(line)) is not None]
+        literals = tuple(literal for literal, _ in self._literals)
+        candidates = []
+        for line in lines:
+            for literal in literals:
+                if literal in line:
+                    candidates.append(line)
+                    break
+        events = []
+        for line in candidates:
+            event = self.parse_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    async def publish(self, events, conn=None):
+        """Diffuse les événements aux abonnés ; l'erreur d'un abonné non transactionnel n'empêche pas les autres"""
+        for types, handler, transactional in list(self._subscribers):
+            selected = [event for event in events if event.type in types]
+            if not selected:
+                continue
+            try:
+                result = handler(selected, conn) if transactional else handler(selected)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                self.counters['handler_errors'] += 1
+                logger.error(f"Erreur d'un abonné aux événements du log ({getattr(handler, '__name__', handler)}): {e}")
+                if transactional:
+                    raise
+
+    async def process(self, lines, conn=None, since=None):
+        """Analyse un lot de lignes et diffuse les événements trouvés ; retourne ces événements.
+
+        conn est transmise aux abonnés transactionnels. since (dernier événement déjà
+        traité) ne sert que sans position d'octet fiable : les événements antérieurs
+        ou égaux sont ignorés, y compris ceux de la même milliseconde.
+        """
+        if not isinstance(lines, list):
+            lines = list(lines)
+        self.counters['lines'] += len(lines)
+        events = list(self.parse(lines))
+        if since is not None:
+            # "Log file open" est à l'heure locale du serveur, les autres lignes non : pas de comparaison
+            events = [event for event in events
+                      if event.timestamp is None or event.type == EVENT_SERVER_RESTART or event.timestamp > since]
+        for event in events:
+            self.counters[event.type] += 1
+        if events:
+            await self.publish(events, conn)
+        return events
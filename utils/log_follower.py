@@ -0,0 +1,139 @@
+import ftplib
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LogFollower:
+    """Suit un fichier de log distant en ne téléchargeant que les nouveaux octets.
+
+    Le décalage du dernier octet lu est conservé entre deux appels à follow() ;
+    seuls les octets ajoutés depuis sont récupérés via REST. Une rotation ou
+    une troncature du fichier (taille qui diminue, ou première ligne différente
+    quand la taille ou la date de modification a changé) provoque une
+    relecture complète.
+
+    Le fichier est identifié par l'empreinte de sa première ligne : après un
+    redémarrage du bot, resume() ne reprend à l'ancienne position que si le
+    log est toujours le même (le serveur de jeu en crée un nouveau à chaque
+    redémarrage).
+    """
+
+    IDENTITY_BYTES = 4096  # La première ligne ("Log file open, ...") tient largement dedans
+
+    def __init__(self, ftp_handler, remote_path, encoding='utf-8'):
+        self.ftp = ftp_handler
+        self.remote_path = remote_path
+        self.encoding = encoding
+        self.offset = 0      # Octets déjà consommés dans le fichier distant
+        self.size = None     # Dernière taille vue (SIZE)
+        self.mtime = None    # Dernière date de modification vue (MDTM)
+        self.identity = None  # Empreinte de la première ligne du fichier
+        self._partial = b''  # Dernière ligne incomplète, en attente de son retour à la ligne
+
+    @property
+    def position(self) -> int:
+        """Octets de lignes complètes déjà rendues (position à enregistrer dans un curseur)"""
+        return self.offset - len(self._partial)
+
+    @staticmethod
+    def first_line_identity(data: bytes):
+        """Empreinte de la première ligne de data (None si elle n'est pas encore complète)"""
+        end = data.find(b'\n')
+        if end < 0:
+            return None
+        return hashlib.sha1(data[:end]).hexdigest()
+
+    def state(self):
+        """Position courante, pour revenir en arrière si le lot lu n'a pas pu être traité"""
+        return self.offset, self.size, self.mtime, self.identity, self._partial
+
+    def restore(self, state):
+        self.offset, self.size, self.mtime, self.identity, self._partial = state
+
+    def resume(self, identity, offset) -> bool:
+        """Reprend la lecture à offset si le fichier distant est toujours celui d'empreinte identity.
+
+        Retourne False (position inchangée) si le fichier a changé ; les erreurs FTP sont propagées.
+        """
+        if not identity:
+            return False
+        stat = self.ftp.stat(self.remote_path)
+        if stat is None:
+            raise ConnectionError(f"Impossible de lire les métadonnées de {self.remote_path}")
+        size, mtime = stat
+        if size < offset:
+            return False
+        head = self.ftp.read_range(self.remote_path, 0, self.IDENTITY_BYTES)
+        if self.first_line_identity(head) != identity:
+            return False
+        self.offset = offset
+        self.size, self.mtime = size, mtime
+        self.identity = identity
+        self._partial = b''
+        return True
+
+    def reset(self):
+        """Oublie la position courante : la prochaine lecture sera complète"""
+        self.offset = 0
+        self.size = None
+        self.mtime = None
+        self.identity = None
+        self._partial = b''
+
+    def _is_rotated(self, size, mtime) -> bool:
+        """Détecte une rotation ou une troncature du log depuis la dernière lecture"""
+        if size < self.offset:
+            return True
+        if not self.offset or self.identity is None or (size, mtime) == (self.size, self.mtime):
+            return False
+        # Le nouveau log peut déjà être plus long que l'ancien décalage : seule sa première ligne le distingue
+        head = self.ftp.read_range(self.remote_path, 0, self.IDENTITY_BYTES)
+        return self.first_line_identity(head) != self.identity
+
+    def _fetch(self) -> bytes:
+        """Télécharge les octets situés après le décalage courant"""
+        try:
+            return self.ftp.read_from_offset(self.remote_path, self.offset)
+        except (ftplib.error_perm, ftplib.error_reply) as e:
+            if not self.offset:
+                raise
+            # Serveur sans support de REST : lecture complète puis découpe locale
+            logger.warning(f"REST refusé pour {self.remote_path}, lecture complète: {e}")
+            return self.ftp.read_from_offset(self.remote_path, 0)[self.offset:]
+
+    def read_new_bytes(self) -> bytes:
+        """Retourne les octets de lignes complètes ajoutés depuis le dernier appel"""
+        stat = self.ftp.stat(self.remote_path)
+        if stat is None:
+            return b''
+        size, mtime = stat
+
+        if self._is_rotated(size, mtime):
+            logger.info(f"Rotation du log détectée ({self.remote_path}), relecture complète")
+            self.reset()
+
+        self.size, self.mtime = size, mtime
+        if size == self.offset:
+            return b''
+
+        from_start = self.position == 0
+        data = self._fetch()
+        self.offset += len(data)
+
+        # Ne rendre que des lignes complètes, la fin est gardée pour le prochain appel
+        data = self._partial + data
+        if from_start and self.identity is None:
+            self.identity = self.first_line_identity(data)
+        end = data.rfind(b'\n') + 1
+        self._partial = data[end:]
+        return data[:end]
+
+    def follow(self):
+        """Génère les nouvelles lignes du log, décodées, au fil de leur lecture"""
+        data = self.read_new_bytes()
+        if not data:
+            return
+        for line in data.decode(self.encoding, errors='ignore').splitlines():
+            yield line
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import os
+import time
+from utils.player_list import PlayerList, parse_list_players
+from utils.rcon_scheduler import PRIORITY_NORMAL
+
+logger = logging.getLogger(__name__)
+
+
+class PlayerRoster:
+    """Liste des joueurs connectés partagée, mise en cache quelques secondes.
+
+    Les appels concurrents pendant un rafraîchissement attendent la même
+    requête ListPlayers au lieu d'en lancer chacun une ; elle passe à la
+    priorité du plus urgent d'entre eux.
+    """
+
+    # Clé de file de l'ordonnanceur réservée aux rafraîchissements de la liste
+    QUEUE_KEY = 'roster'
+
+    def __init__(self, rcon_client, ttl=None):
+        self.rcon = rcon_client
+        self.ttl = ttl if ttl is not None else float(os.getenv('RCON_ROSTER_TTL', '5'))
+        self.snapshot = None
+        self.fetched_at = None
+        self.refreshes = 0
+        self._inflight = None
+        self._inflight_priority = None
+
+    @property
+    def age(self) -> float:
+        """Âge de la liste en cache, en secondes"""
+        if self.fetched_at is None:
+            return float('inf')
+        return time.monotonic() - self.fetched_at
+
+    def update(self, resp) -> PlayerList:
+        """Remplace la liste en cache par une réponse ListPlayers déjà reçue"""
+        snapshot = parse_list_players(resp)
+        self.snapshot = snapshot
+        self.fetched_at = time.monotonic()
+        self.refreshes += 1
+        return snapshot
+
+    async def _refresh(self) -> PlayerList:
+        # Priorité lue au démarrage : un appelant plus urgent a pu rejoindre avant l'envoi
+        resp = await self.rcon.execute("ListPlayers", priority=self._inflight_priority, key=self.QUEUE_KEY)
+        logger.debug(f"Réponse brute de ListPlayers: {resp}")
+        return self.update(resp)
+
+    def _done(self, task):
+        if self._inflight is task:
+            self._inflight = None
+        if not task.cancelled():
+            task.exception()  # Erreur transmise aux appelants, marquée comme lue
+
+    async def get(self, force=False, priority=PRIORITY_NORMAL) -> PlayerList:
+        """Liste des joueurs connectés, relue si le cache a plus de ttl secondes"""
+        if not force and self.snapshot is not None and self.age < self.ttl:
+            return self.snapshot
+        if self._inflight is None:
+            self._inflight_priority = priority
+            self._inflight = asyncio.ensure_future(self._refresh())
+            self._inflight.add_done_callback(self._done)
+        elif priority < self._inflight_priority:
+            # Un appelant plus urgent rejoint un rafraîchissement encore en file : il est remonté
+            self._inflight_priority = priority
+            self.rcon.scheduler.promote(self.QUEUE_KEY, priority)
+        # shield : l'annulation d'un appelant n'interrompt pas la requête des autres
+        return await asyncio.shield(self._inflight)
+
+    async def find(self, steam_id=None, name=None, conid=None, priority=PRIORITY_NORMAL):
+        """Cherche un joueur connecté ; relit la liste une fois s'il n'est pas dans le cache"""
+        player = (await self.get(priority=priority)).find(steam_id, name, conid)
+        if player is None and self.age > 0.5:
+            # Le joueur vient peut-être de se connecter
+            player = (await self.get(force=True, priority=priority)).find(steam_id, name, conid)
+        return player
+
+    def invalidate(self):
+        self.snapshot = None
+        self.fetched_at = None
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CommandResult:
+    """Résultat d'une commande d'un lot RCON"""
+
+    def __init__(self, command, key=None):
+        self.command = command
+        self.key = key              # Identifiant fourni par l'appelant (ex. template_id de l'item)
+        self.success = False
+        self.retryable = True       # False si un nouvel essai ne peut pas réussir (joueur déconnecté...)
+        self.response = None
+        self.error = None
+        self.attempts = 0
+
+    def __repr__(self):
+        state = 'ok' if self.success else f"échec ({self.error or self.response!r})"
+        return f"CommandResult({self.command!r}, {state}, essais={self.attempts})"
+
+
+class AdaptivePacer:
+    """Cadence d'envoi ajustée aux erreurs observées du serveur.
+
+    Tant que les commandes réussissent, jusqu'à max_window commandes sont en
+    vol sans pause. Chaque erreur divise la fenêtre par deux et double le
+    délai entre deux envois ; chaque succès réduit le délai et rouvre la
+    fenêtre d'une commande.
+    """
+
+    def __init__(self, max_window=8, min_delay=0.0, max_delay=2.0, initial_delay=0.1):
+        self.max_window = max_window
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.window = max_window
+        self.delay = min_delay
+
+    def on_success(self):
+        self.window = min(self.max_window, self.window + 1)
+        self.delay = self.delay / 2 if self.delay / 2 > max(self.min_delay, 0.01) else self.min_delay
+
+    def on_error(self):
+        self.window = max(1, self.window // 2)
+        self.delay = min(self.max_delay, max(self.initial_delay, self.delay * 2))
+
+
+async def run_pipelined(connection, results, pacer, check_response=None, timeout=None):
+    """Envoie les commandes d'un lot en pipeline sur une même connexion.
+
+    check_response(result) valide une réponse reçue : elle positionne
+    success (et retryable si l'échec est définitif). Sans elle, toute réponse
+    est un succès. Les résultats sont complétés sur place.
+    """
+    in_flight = set()
+
+    async def _send(result):
+        result.attempts += 1
+        try:
+            result.response = await connection.execute(result.command, timeout)
+            result.error = None
+            result.success = True
+            if check_response is not None:
+                check_response(result)
+        except (asyncio.TimeoutError, ConnectionError, OSError, RuntimeError) as e:
+            result.success = False
+            result.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        if result.success:
+            pacer.on_success()
+        else:
+            pacer.on_error()
+            logger.warning(f"Échec de la commande RCON '{result.command}': {result.error or result.response!r}")
+
+    started = time.monotonic()
+    for result in results:
+        while len(in_flight) >= pacer.window:
+            _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        if pacer.delay:
+            await asyncio.sleep(pacer.delay)
+        in_flight.add(asyncio.create_task(_send(result)))
+    if in_flight:
+        await asyncio.wait(in_flight)
+    logger.debug(f"Lot de {len(results)} commande(s) RCON traité en {time.monotonic() - started:.2f}s "
+                 f"(fenêtre {pacer.window}, délai {pacer.delay:.2f}s)")
+    return results
@@ -1,38 +1,263 @@
 # rcon.py
 
-import socket, struct, os, threading
-from dotenv import load_dotenv
-import logging
 import asyncio
+import itertools
+import logging
+import os
+import struct
 import time
-import json
+from dotenv import load_dotenv
+from utils.rcon_pool import RCONPool
+from utils.rcon_scheduler import PRIORITY_NORMAL, RCONScheduler
+from utils.player_roster import PlayerRoster
+from utils.player_list import parse_get_player_list, parse_list_player_ids, parse_list_players
 
 # Utiliser le logger configuré dans bot.py
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-# Utiliser le logger configuré dans bot.py
-logger = logging.getLogger(__name__)
+# Types de paquets du protocole Source RCON
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
 
-load_dotenv()
+# Commandes de liste des joueurs, dans l'ordre de préférence, et leur analyseur
+PLAYER_LIST_COMMANDS = (
+    ("GetPlayerList", parse_get_player_list),
+    ("ListPlayers", parse_list_players),
+    ("ListPlayerIDs", parse_list_player_ids),
+)
+
+# Résultat du sondage par serveur : (hôte, port) -> {'version': ..., 'command': ...}
+_player_list_capabilities = {}
+
+# Taille maximale acceptée pour un paquet (au-delà, le flux est désynchronisé)
+MAX_PACKET_SIZE = 1024 * 1024
+
+
+class _PendingResponse:
+    """Réponse en cours de réassemblage : fragments reçus jusqu'au retour de la sentinelle"""
+
+    def __init__(self, future, req_id, sentinel_id):
+        self.future = future
+        self.req_id = req_id
+        self.sentinel_id = sentinel_id
+        self.buffer = bytearray()
+        self.packets = 0
+
+    def text(self) -> str:
+        # Décodage unique : un caractère multi-octets peut être coupé entre deux paquets
+        return self.buffer.decode('utf8', errors='ignore')
+
+
+class RCONConnection:
+    """Connexion RCON authentifiée, multiplexée.
+
+    Chaque commande reçoit un identifiant de requête unique et sa réponse est
+    routée vers la coroutine qui l'attend, ce qui permet plusieurs commandes
+    en vol simultanément sur la même socket. Un paquet dont l'identifiant
+    n'est attendu par personne est ignoré au lieu de décaler les réponses
+    suivantes.
+
+    Les grosses réponses (ListPlayers avec beaucoup de joueurs) arrivent en
+    plusieurs paquets : chaque commande est suivie d'un paquet vide
+    (sentinelle) que le serveur renvoie après le dernier fragment, et les
+    fragments sont concaténés jusqu'au retour de la sentinelle.
+    """
+
+    def __init__(self, host, port, password, timeout, sentinel_type=SERVERDATA_RESPONSE_VALUE):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.sentinel_type = sentinel_type
+        self.connected = False
+        self.in_flight = 0                    # Commandes en attente de réponse
+        self.last_used = time.monotonic()
+        self.on_connect = None                # Appelé après chaque connexion réussie
+        self.on_disconnect = None             # Appelé avec l'erreur quand la connexion est perdue
+
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}  # id de requête ou de sentinelle -> _PendingResponse
+        self._ids = itertools.count(1)
+
+    def _next_id(self) -> int:
+        """Identifiant de requête libre (positif, -1 étant réservé à l'échec d'authentification)"""
+        while True:
+            req_id = next(self._ids)
+            if req_id > 0x7FFFFFFF:
+                self._ids = itertools.count(1)
+                continue
+            if req_id not in self._pending:
+                return req_id
+
+    @staticmethod
+    def _encode_packet(req_id: int, type_id: int, payload: str) -> bytes:
+        data = payload.encode('utf8')
+        # length, requestId, typeId, payload, two null bytes
+        return struct.pack('<iii', 4 + 4 + len(data) + 2, req_id, type_id) + data + b'\x00\x00'
+
+    @staticmethod
+    async def _read_packet(reader):
+        """Lit un paquet complet : (id de requête, type, contenu brut)"""
+        length = struct.unpack('<i', await reader.readexactly(4))[0]
+        if length < 10 or length > MAX_PACKET_SIZE:
+            raise ConnectionError(f"Taille de paquet RCON invalide: {length}")
+        data = memoryview(await reader.readexactly(length))
+        req_id, type_id = struct.unpack_from('<ii', data)
+        # Vue sans copie : le contenu est recopié une seule fois, dans le tampon de la réponse
+        return req_id, type_id, data[8:-2]
+
+    async def _auth(self, reader, writer) -> bool:
+        req_id = self._next_id()
+        writer.write(self._encode_packet(req_id, SERVERDATA_AUTH, self.password))
+        await writer.drain()
+        # Certains serveurs envoient un RESPONSE_VALUE vide avant la réponse d'authentification
+        while True:
+            resp_id, type_id, _ = await self._read_packet(reader)
+            if type_id == SERVERDATA_AUTH_RESPONSE:
+                return resp_id != -1  # -1 = échec
+
+    async def connect(self):
+        """Ouvre et authentifie la connexion RCON (une seule tentative, les reprises sont gérées par le pool)"""
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            if not await asyncio.wait_for(self._auth(reader, writer), self.timeout):
+                raise PermissionError("Authentification RCON échouée")
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            raise
+        self._writer = writer
+        self._reader_task = asyncio.create_task(self._read_loop(reader, writer))
+        self.connected = True
+        logger.info(f"Connexion RCON établie avec {self.host}:{self.port}")
+        if self.on_connect is not None:
+            self.on_connect(self)
+
+    async def _read_loop(self, reader, writer):
+        """Route chaque réponse vers la commande qui porte le même identifiant"""
+        error = ConnectionError("Connexion RCON fermée")
+        try:
+            while True:
+                req_id, type_id, payload = await self._read_packet(reader)
+                pending = self._pending.get(req_id)
+                if pending is None:
+                    logger.debug(f"Paquet RCON ignoré (id {req_id} inattendu): {bytes(payload[:200])!r}")
+                    continue
+                if req_id == pending.sentinel_id:
+                    # Le serveur traite les paquets dans l'ordre : tous les fragments sont arrivés
+                    if not pending.future.done():
+                        pending.future.set_result(pending.text())
+                    continue
+                pending.buffer += payload
+                pending.packets += 1
+        except (OSError, asyncio.IncompleteReadError, ConnectionError) as e:
+            error = ConnectionError(f"Connexion RCON perdue: {e}")
+            logger.warning(str(error))
+        finally:
+            if self._writer is writer:
+                self.connected = False
+                self._writer = None
+            writer.close()
+            # Les commandes en vol ne recevront jamais leur réponse
+            for pending in self._pending.values():
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+            if self.on_disconnect is not None:
+                self.on_disconnect(self, error)
+
+    async def execute(self, command: str, timeout: float = None) -> str:
+        """Envoie une commande et attend sa réponse (plusieurs commandes peuvent être en vol)"""
+        if not self.connected:
+            raise ConnectionError("Connexion RCON fermée")
+        self.in_flight += 1
+        self.last_used = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        req_id = self._next_id()
+        self._pending[req_id] = None  # Réserve l'identifiant avant de tirer celui de la sentinelle
+        sentinel_id = self._next_id()
+        pending = _PendingResponse(future, req_id, sentinel_id)
+        self._pending[req_id] = self._pending[sentinel_id] = pending
+        try:
+            # Commande et sentinelle partent dans la même écriture
+            self._writer.write(
+                self._encode_packet(req_id, SERVERDATA_EXECCOMMAND, command)
+                + self._encode_packet(sentinel_id, self.sentinel_type, '')
+            )
+            await self._writer.drain()
+            response = await asyncio.wait_for(future, timeout or self.timeout)
+            if pending.packets > 1:
+                logger.debug(f"Réponse RCON à '{command}' réassemblée depuis {pending.packets} paquets")
+            return response
+        except asyncio.TimeoutError:
+            if pending.packets:
+                # Serveur qui ignore la sentinelle : on rend ce qui est arrivé plutôt que rien
+                logger.warning(f"Sentinelle RCON non reçue pour '{command}', réponse possiblement incomplète")
+                return pending.text()
+            logger.error(f"Pas de réponse RCON à '{command}' après {timeout or self.timeout}s")
+            raise
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+            self._pending.pop(req_id, None)
+            self._pending.pop(sentinel_id, None)
+
+    async def ping(self, timeout: float = None) -> bool:
+        """Vérifie que la connexion répond : aller-retour d'une sentinelle seule, sans commande"""
+        writer = self._writer
+        if not self.connected or writer is None or writer.is_closing():
+            return False
+        future = asyncio.get_running_loop().create_future()
+        sentinel_id = self._next_id()
+        self._pending[sentinel_id] = _PendingResponse(future, None, sentinel_id)
+        try:
+            writer.write(self._encode_packet(sentinel_id, self.sentinel_type, ''))
+            await writer.drain()
+            await asyncio.wait_for(future, timeout or self.timeout)
+            return True
+        except (OSError, asyncio.TimeoutError):
+            # OSError couvre ConnectionError, posée par la boucle de lecture si la connexion tombe
+            return False
+        finally:
+            self._pending.pop(sentinel_id, None)
+
+    async def close(self):
+        """Ferme la connexion RCON"""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.connected = False
 
-# Utiliser le logger configuré dans bot.py
-logger = logging.getLogger(__name__)
 
 class RCONClient:
+    """Client RCON partagé par tous les modules du bot.
+
+    Les commandes passent par un pool de connexions authentifiées et
+    réutilisées (voir RCONPool) : suivi des joueurs, livraison d'items et
+    commandes Discord ne refont pas de connexion ni d'authentification à
+    chaque appel.
+    """
     DEFAULT_TIMEOUT = 10.0  # Timeout par défaut en secondes
-    
-    def __init__(self, timeout: float = None, max_retries: int = 3):
+
+    def __init__(self, timeout: float = None):
         self.host = os.getenv('GAME_SERVER_HOST')
         self.port = int(os.getenv('RCON_PORT'))
         self.password = os.getenv('RCON_PASSWORD')
-        self.max_retries = max_retries
-        self.retries = 0
-        self.sock = None
-        self.event_callbacks = []  # Liste des callbacks pour les événements
-        self.connected = False
-        
+
         # Vérifier que les variables d'environnement sont définies
         if not self.host:
             raise ValueError("GAME_SERVER_HOST n'est pas défini dans .env")
@@ -40,212 +265,149 @@ class RCONClient:
             raise ValueError("RCON_PORT n'est pas défini dans .env")
         if not self.password:
             raise ValueError("RCON_PASSWORD n'est pas défini dans .env")
-        
+
         # Utiliser le timeout par défaut si aucun n'est fourni
         self.timeout = timeout or self.DEFAULT_TIMEOUT
-        
-        # Initialiser la connexion
-        self._connect()
 
-    def _connect(self):
-        """Tente de se connecter au serveur RCON avec gestion des reconnexions"""
-        try:
-            if self.sock:
-                try:
-                    self.sock.close()
-                except:
-                    pass
-                self.sock = None
-            
-            # Vérifier la connexion avant de continuer
-            if not self.sock:
-                self.sock = socket.create_connection((self.host, self.port), self.timeout)
-            
-            # Authentification
-            if not self._auth():
-                raise RuntimeError("Authentification RCON échouée")
-            
-            self.retries = 0
-            self.connected = True
-            logger.info(f"Connexion RCON réussie après {self.retries} tentatives")
-            
-        except (socket.timeout, ConnectionRefusedError, ConnectionResetError, BrokenPipeError) as e:
-            self.connected = False
-            if self.retries < self.max_retries:
-                self.retries += 1
-                logger.warning(f"Échec de la connexion RCON (tentative {self.retries}/{self.max_retries}): {str(e)}")
-                time.sleep(5)
-                self._connect()
-            else:
-                raise RuntimeError(f"Impossible de se connecter après {self.max_retries} tentatives: {str(e)}")
-        except Exception as e:
-            self.connected = False
-            logger.error(f"Erreur inattendue lors de la connexion RCON: {str(e)}")
-            raise RuntimeError(f"Erreur lors de la connexion RCON: {str(e)}")
-
-    def _ensure_connection(self):
-        """Assure que la connexion est active avant d'envoyer une commande"""
-        if not self.connected or not self.sock:
-            self._connect()
-            if not self.connected:
-                raise RuntimeError("Impossible de se connecter au serveur RCON")
-
-    def _send_packet(self, req_id: int, type_id: int, payload: str):
-        data   = payload.encode('utf8')
-        length = 4 + 4 + len(data) + 2
-        # length, requestId, typeId, payload, two null bytes
-        pkt = struct.pack('<iii', length, req_id, type_id) + data + b'\x00\x00'
-        self.sock.sendall(pkt)
-
-    def _recv_packet(self):
-        # lire length
-        raw = self.sock.recv(4)
-        if len(raw) < 4:
-            raise ConnectionError("Réponse RCON incomplète")
-        length = struct.unpack('<i', raw)[0]
-        # lire le reste
-        data = b''
-        while len(data) < length:
-            chunk = self.sock.recv(length - len(data))
-            if not chunk:
-                break
-            data += chunk
-        req_id, type_id = struct.unpack('<ii', data[:8])
-        payload = data[8:-2].decode('utf8', errors='ignore')
-        return req_id, type_id, payload
-
-    def _auth(self) -> bool:
-        # Utiliser un petit ID (1) pour l'authentification (type=3)
-        self._send_packet(1, 3, self.password)
-        req_id, type_id, _ = self._recv_packet()
-        return req_id != -1  # -1 = échec
-
-    def execute(self, command: str) -> str:
-        # Utiliser un autre ID (2) pour l'exécution de commande (type=2)
-        self._send_packet(2, 2, command)
-        _, _, payload = self._recv_packet()
-        return payload
-
-    def get_online_players(self) -> list[str]:
-        """Récupère la liste des joueurs connectés"""
-        try:
-            self._ensure_connection()
-            
-            # Essayer la commande GetPlayerList spécifique à Conan Exiles
-            resp_player_list = self.execute("GetPlayerList")
-            logger.info(f"Réponse de GetPlayerList: {resp_player_list}")
-            
-            # Si la commande a fonctionné et retourne des données JSON valides
-            if resp_player_list and resp_player_list.strip() and "{" in resp_player_list:
-                try:
-                    # Nettoyer la réponse si nécessaire pour obtenir un JSON valide
-                    json_str = resp_player_list.strip()
-                    if json_str.startswith("Command 'GetPlayerList' succeeded!"):
-                        json_str = json_str.replace("Command 'GetPlayerList' succeeded!", "").strip()
-                    
-                    # Analyser le JSON
-                    player_data = json.loads(json_str)
-                    players = []
-                    
-                    # Format attendu: {"players": [{"playerId": 12345, "name": "PlayerName", "charName": "CharacterName"}, ...]}
-                    if "players" in player_data and isinstance(player_data["players"], list):
-                        for player in player_data["players"]:
-                            # Utiliser le nom du personnage s'il existe, sinon le nom du joueur
-                            if "charName" in player and player["charName"]:
-                                players.append(player["charName"])
-                            elif "name" in player and player["name"]:
-                                players.append(player["name"])
-                        
-                        if players:
-                            logger.info(f"Joueurs connectés via GetPlayerList: {players}")
-                            return players
-                except Exception as e:
-                    logger.warning(f"Erreur lors du parsing du JSON de GetPlayerList: {e}")
-            
-            # Si GetPlayerList n'a pas fonctionné, essayer avec ListPlayers
-            resp = self.execute("ListPlayers")
-            logger.info(f"Réponse brute de ListPlayers: {resp}")
-            
-            # Si aucun joueur n'est connecté
-            if "No players" in resp or not resp.strip():
-                logger.info("Aucun joueur connecté")
-                return []
-            
-            players = []
-            
-            # Analyser la réponse ligne par ligne
-            lines = resp.splitlines()
-            
-            # Ignorer la ligne d'en-tête si elle existe
-            if lines and ("Idx" in lines[0] or "Char name" in lines[0] or "Player name" in lines[0]):
-                lines = lines[1:]
-                
-            for line in lines:
-                if not line.strip():
-                    continue
-                    
-                try:
-                    logger.info(f"Ligne ListPlayers: {line}")
-                    
-                    # Format attendu: Idx | Char name | Player name | User ID | Platform ID | Platform Name
-                    if "|" in line:
-                        parts = line.split("|")
-                        if len(parts) >= 2:  # Au moins l'index et le nom du personnage
-                            char_name = parts[1].strip()
-                            if char_name and char_name != "Char name":
-                                players.append(char_name)
-                                logger.info(f"Joueur trouvé: {char_name}")
-                    else:
-                        # Format alternatif sans pipes
-                        parts = line.strip().split()
-                        if len(parts) >= 3:  # Au moins l'index, le nom et quelque chose d'autre
-                            # Essayer de récupérer le nom du personnage (souvent la deuxième colonne)
-                            char_name = parts[1]
-                            if char_name and char_name != "Steam" and not char_name.isdigit():
-                                players.append(char_name)
-                                logger.info(f"Joueur trouvé (format alternatif): {char_name}")
-                except Exception as e:
-                    logger.warning(f"Erreur lors du parsing d'une ligne de ListPlayers: {line} - {str(e)}")
-            
-            # Si on a trouvé des joueurs, on retourne la liste
-            if players:
-                logger.info(f"Joueurs connectés avec noms de personnage: {players}")
-                return players
-            
-            # Dernier recours: si la commande ListPlayerIDs est disponible
-            try:
-                resp2 = self.execute("ListPlayerIDs")
-                logger.info(f"Réponse de ListPlayerIDs: {resp2}")
-                
-                # Ne pas traiter si la commande n'existe pas
-                if "Couldn't find the command" in resp2:
-                    logger.warning("La commande ListPlayerIDs n'est pas disponible")
+        # Type du paquet sentinelle : RESPONSE_VALUE vide (réponse miroir du serveur) par défaut,
+        # RCON_SENTINEL=command pour les serveurs qui ne répondent qu'à une commande vide
+        if os.getenv('RCON_SENTINEL', 'response').lower() == 'command':
+            self.sentinel_type = SERVERDATA_EXECCOMMAND
+        else:
+            self.sentinel_type = SERVERDATA_RESPONSE_VALUE
+
+        # Les connexions sont ouvertes au premier appel, dans la boucle asyncio du bot
+        self.pool = RCONPool(
+            self._new_connection,
+            max_connections=int(os.getenv('RCON_POOL_SIZE', '2')),
+            max_idle=int(os.getenv('RCON_POOL_MAX_IDLE', '300')),
+            health_interval=int(os.getenv('RCON_HEALTH_INTERVAL', '60')),
+            health_timeout=min(self.timeout, 5.0),
+            backoff_base=float(os.getenv('RCON_BACKOFF_BASE', '1')),
+            backoff_max=float(os.getenv('RCON_BACKOFF_MAX', '60'))
+        )
+        # Toutes les commandes passent par l'ordonnanceur : priorités et débit toléré par le serveur
+        self.scheduler = RCONScheduler(
+            rate=float(os.getenv('RCON_RATE', '5')),
+            burst=int(os.getenv('RCON_BURST', '10'))
+        )
+        # Liste des joueurs connectés partagée par le suivi, les commandes et la livraison d'items
+        self.roster = PlayerRoster(self)
+        self._checked_connects = None   # Nombre de connexions du pool lors de la dernière vérification
+        self._probe_lock = None
+
+    def _new_connection(self) -> RCONConnection:
+        return RCONConnection(self.host, self.port, self.password, self.timeout, sentinel_type=self.sentinel_type)
+
+    @property
+    def connected(self) -> bool:
+        """Vrai si au moins une connexion du pool est ouverte"""
+        return self.pool.connected
+
+    @property
+    def state(self) -> str:
+        """État de la liaison : idle, connecting, connected ou disconnected"""
+        return self.pool.state
+
+    @property
+    def last_error(self):
+        """Dernière erreur de connexion (None une fois la connexion rétablie)"""
+        return self.pool.last_error
+
+    async def execute(self, command: str, timeout: float = None, priority=PRIORITY_NORMAL, key=None,
+                      connection=None) -> str:
+        """Envoie une commande et attend sa réponse.
+
+        La commande passe par l'ordonnanceur (priority, key pour la file
+        équitable) puis part sur une connexion du pool, ou sur connection si
+        elle est fournie.
+        """
+        async def _run():
+            if connection is not None:
+                return await connection.execute(command, timeout)
+            return await self.pool.execute(command, timeout)
+        return await self.scheduler.submit(_run, priority, key)
+
+    async def acquire(self, priority=PRIORITY_NORMAL, key=None):
+        """Connexion du pool sur laquelle envoyer un lot de commandes en pipeline"""
+        return _ScheduledConnection(self, await self.pool.acquire(), priority, key)
+
+    async def _player_list_command(self, priority=PRIORITY_NORMAL):
+        """Commande de liste des joueurs supportée par le serveur.
+
+        Le résultat du sondage est gardé par serveur ; après chaque (re)connexion,
+        la commande version suffit à vérifier que le serveur n'a pas changé.
+        """
+        connects = self.pool.counters['connects']
+        key = (self.host, self.port)
+        cached = _player_list_capabilities.get(key)
+        if cached is not None and cached['command'] and self._checked_connects == connects:
+            return cached['command']
+        if self._probe_lock is None:
+            self._probe_lock = asyncio.Lock()
+        async with self._probe_lock:
+            cached = _player_list_capabilities.get(key)
+            if cached is not None and cached['command'] and self._checked_connects == self.pool.counters['connects']:
+                return cached['command']
+            version = (await self.execute("version", priority=priority)).strip()
+            connects = self.pool.counters['connects']
+            if cached is None or cached['version'] != version or not cached['command']:
+                command = await self._probe_player_list_command(priority)
+                cached = _player_list_capabilities[key] = {'version': version, 'command': command}
+                if command:
+                    logger.info(f"Liste des joueurs via {command} (serveur {version!r})")
                 else:
-                    # Extraire les noms des joueurs
-                    lines2 = resp2.splitlines()
-                    for line in lines2:
-                        if not line.strip():
-                            continue
-                            
-                        try:
-                            parts = line.strip().split()
-                            if len(parts) >= 3:
-                                # Format possible: PlayerID CharID Name
-                                char_name = ' '.join(parts[2:])  # Le nom peut contenir des espaces
-                                if char_name and not char_name.isdigit():
-                                    players.append(char_name)
-                        except Exception as e:
-                            logger.warning(f"Erreur lors du parsing de ListPlayerIDs: {line} - {str(e)}")
+                    logger.warning(f"Aucune commande de liste des joueurs ne fonctionne (serveur {version!r})")
+            self._checked_connects = connects
+            return cached['command']
+
+    async def _probe_player_list_command(self, priority=PRIORITY_NORMAL):
+        """Essaie chaque commande de liste des joueurs et retourne la première utilisable"""
+        for command, parse in PLAYER_LIST_COMMANDS:
+            try:
+                resp = await self.execute(command, priority=priority)
             except Exception as e:
-                logger.warning(f"Erreur lors de l'exécution de ListPlayerIDs: {e}")
-            
-            # Retourner la liste finale des joueurs
-            logger.info(f"Joueurs connectés (final): {players}")
-            return players
-            
+                logger.warning(f"Sondage de {command} impossible: {e}")
+                continue
+            logger.debug(f"Réponse brute de {command}: {resp}")
+            if parse(resp).available:
+                if command == "ListPlayers":
+                    self.roster.update(resp)
+                return command
+        return None
+
+    async def get_online_players(self, priority=PRIORITY_NORMAL) -> list[str]:
+        """Récupère la liste des joueurs connectés avec la commande supportée par le serveur"""
+        try:
+            command = await self._player_list_command(priority)
+            if command is None or command == "ListPlayers":
+                # Liste partagée, mise en cache quelques secondes
+                return (await self.roster.get(priority=priority)).names
+            resp = await self.execute(command, priority=priority)
+            logger.debug(f"Réponse brute de {command}: {resp}")
+            return dict(PLAYER_LIST_COMMANDS)[command](resp).names
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des joueurs en ligne: {str(e)}")
             return []
 
-    def close(self):
-        self.sock.close()
+    def start(self):
+        """Rouvre le client après close()"""
+        self.pool.start()
+
+    async def close(self):
+        """Ferme toutes les connexions RCON"""
+        await self.scheduler.close()
+        await self.pool.close()
+
+
+class _ScheduledConnection:
+    """Connexion du pool réservée à un lot, dont les commandes restent ordonnancées"""
+
+    def __init__(self, client, connection, priority, key):
+        self.client = client
+        self.connection = connection
+        self.priority = priority
+        self.key = key
+
+    async def execute(self, command: str, timeout: float = None) -> str:
+        return await self.client.execute(command, timeout, self.priority, self.key, self.connection)
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# États de la liaison avec le serveur RCON
+STATE_IDLE = 'idle'                  # Aucune connexion ouverte (démarrage ou connexions inactives fermées)
+STATE_CONNECTING = 'connecting'      # Tentative de connexion en cours
+STATE_CONNECTED = 'connected'
+STATE_DISCONNECTED = 'disconnected'  # Serveur injoignable, en attente de la prochaine tentative
+
+
+class RCONUnavailable(RuntimeError):
+    """Serveur RCON injoignable : la commande échoue tout de suite au lieu d'attendre la reconnexion"""
+
+
+class RCONPool:
+    """Pool de connexions RCON authentifiées, partagé par tous les modules.
+
+    Une connexion libre est réutilisée en priorité ; une nouvelle n'est
+    ouverte que si toutes sont occupées et que le plafond max_connections
+    n'est pas atteint, sinon la commande est multiplexée sur la connexion la
+    moins chargée. Une tâche de fond vérifie les connexions inactives (ping)
+    et ferme celles qui ne servent plus depuis max_idle secondes.
+
+    Quand le serveur devient injoignable, un superviseur en tâche de fond
+    retente la connexion avec un délai exponentiel (avec gigue) ; pendant
+    ce temps les commandes échouent immédiatement avec RCONUnavailable.
+    """
+
+    def __init__(self, connection_factory, max_connections=2, max_idle=300, health_interval=60, health_timeout=5.0,
+                 backoff_base=1.0, backoff_max=60.0):
+        self.connection_factory = connection_factory
+        self.max_connections = max(1, max_connections)
+        self.max_idle = max_idle
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.counters = defaultdict(int)   # ouvertures, réutilisations, évictions, échecs de ping
+        self.state = STATE_IDLE
+        self.last_error = None             # Dernière erreur de connexion (texte)
+        self.failures = 0                  # Échecs de connexion consécutifs
+        self.next_attempt_at = None        # time.monotonic() de la prochaine tentative
+        self._connections = []
+        self._health_task = None
+        self._supervisor = None
+        self._attempt = None               # Future du résultat de la tentative en cours
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self.state == STATE_CONNECTED and any(conn.connected for conn in self._connections)
+
+    @property
+    def size(self) -> int:
+        return len(self._connections)
+
+    @property
+    def retry_in(self):
+        """Secondes avant la prochaine tentative de reconnexion (None si aucune n'est prévue)"""
+        if self.next_attempt_at is None:
+            return None
+        return max(0.0, self.next_attempt_at - time.monotonic())
+
+    def _start_health_check(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    def _on_connect(self, conn):
+        # Toute (re)connexion : les capacités du serveur ont pu changer (redémarrage, mise à jour)
+        self.counters['connects'] += 1
+
+    def _on_disconnect(self, conn, error):
+        """Connexion perdue : retirée du pool, reconnexion en arrière-plan si c'était la dernière"""
+        if conn in self._connections:
+            self._connections.remove(conn)
+        if self._closed or any(c.connected for c in self._connections):
+            return
+        self.state = STATE_DISCONNECTED
+        self.last_error = str(error)
+        self.counters['disconnects'] += 1
+        self._start_supervisor()
+
+    async def _open(self):
+        """Ouvre une connexion (une seule tentative) et l'ajoute au pool"""
+        conn = self.connection_factory()
+        conn.on_connect = self._on_connect
+        await conn.connect()
+        conn.on_disconnect = self._on_disconnect
+        self._connections.append(conn)
+        self.counters['opened'] += 1
+        logger.info(f"Connexion RCON ajoutée au pool ({len(self._connections)}/{self.max_connections})")
+        return conn
+
+    def _backoff(self) -> float:
+        """Délai avant la prochaine tentative : exponentiel, plafonné, avec gigue"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _begin_attempt(self):
+        self.state = STATE_CONNECTING
+        self.next_attempt_at = None
+        self._attempt = asyncio.get_running_loop().create_future()
+
+    def _start_supervisor(self):
+        if self._supervisor is None or self._supervisor.done():
+            self._begin_attempt()
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def _supervise(self):
+        """Rétablit la connexion en arrière-plan, sans bloquer les appelants"""
+        while not self._closed:
+            try:
+                await self._open()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e) or type(e).__name__
+                # Mot de passe refusé : inutile d'insister au rythme normal
+                delay = self.backoff_max if isinstance(e, PermissionError) else self._backoff()
+                self.state = STATE_DISCONNECTED
+                self.next_attempt_at = time.monotonic() + delay
+                self.counters['connect_failures'] += 1
+                logger.warning(f"Connexion RCON impossible ({self.failures} échec(s) consécutif(s)): "
+                               f"{self.last_error} - nouvelle tentative dans {delay:.1f}s")
+                self._attempt.set_result(False)
+                await asyncio.sleep(delay)
+                self._begin_attempt()
+            else:
+                if self.failures:
+                    logger.info(f"Connexion RCON rétablie après {self.failures} échec(s)")
+                self.failures = 0
+                self.last_error = None
+                self.state = STATE_CONNECTED
+                self._attempt.set_result(True)
+                return
+
+    async def acquire(self):
+        """Choisit la connexion qui exécutera la prochaine commande (ou le prochain lot)"""
+        if self._closed:
+            # Un appel tardif pendant l'arrêt ne doit pas relancer les connexions
+            raise RCONUnavailable("Pool RCON fermé")
+        self._start_health_check()
+        if self.state != STATE_CONNECTED:
+            self._start_supervisor()
+            if self.state == STATE_CONNECTING:
+                # Une tentative est en cours : l'attendre, sans relancer la sienne
+                await asyncio.shield(self._attempt)
+            if self.state != STATE_CONNECTED:
+                retry_in = self.retry_in
+                when = f", nouvelle tentative dans {retry_in:.1f}s" if retry_in is not None else ""
+                raise RCONUnavailable(f"Serveur RCON injoignable ({self.last_error}){when}")
+
+        for conn in self._connections:
+            if conn.connected and conn.in_flight == 0:
+                self.counters['reused'] += 1
+                return conn
+        live = [conn for conn in self._connections if conn.connected]
+        if len(self._connections) < self.max_connections:
+            try:
+                return await self._open()
+            except Exception as e:
+                if not live:
+                    raise RCONUnavailable(f"Serveur RCON injoignable ({e})") from e
+                logger.warning(f"Connexion RCON supplémentaire impossible, partage d'une connexion existante: {e}")
+        if not live:
+            raise RCONUnavailable(f"Serveur RCON injoignable ({self.last_error})")
+        # Plafond atteint : multiplexer sur la connexion la moins chargée
+        self.counters['shared'] += 1
+        return min(live, key=lambda c: c.in_flight)
+
+    async def execute(self, command: str, timeout: float = None) -> str:
+        """Exécute une commande sur une connexion du pool"""
+        conn = await self.acquire()
+        return await conn.execute(command, timeout)
+
+    async def _evict(self, conn, reason):
+        if conn in self._connections:
+            self._connections.remove(conn)
+        conn.on_disconnect = None  # Fermeture voulue : pas de reconnexion
+        self.counters['evicted'] += 1
+        logger.info(f"Connexion RCON retirée du pool: {reason}")
+        await conn.close()
+        if not self._connections and self.state == STATE_CONNECTED:
+            # La prochaine commande rouvrira une connexion
+            self.state = STATE_IDLE
+
+    async def check_health(self):
+        """Ferme les connexions inactives trop longtemps ou qui ne répondent plus"""
+        now = time.monotonic()
+        for conn in list(self._connections):
+            if conn.in_flight:
+                continue
+            idle = now - conn.last_used
+            if idle >= self.max_idle:
+                await self._evict(conn, f"inactive depuis {idle:.0f}s")
+            elif not conn.connected:
+                await self._evict(conn, "connexion fermée")
+            elif idle >= self.health_interval and not await conn.ping(self.health_timeout):
+                self.counters['health_failures'] += 1
+                await self._evict(conn, "pas de réponse au ping")
+
+    async def _health_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"Erreur lors de la vérification des connexions RCON: {e}")
+
+    def start(self):
+        """Rouvre le pool après close() ; les connexions s'ouvrent à la prochaine commande"""
+        self._closed = False
+
+    async def close(self):
+        """Ferme toutes les connexions et arrête les tâches de fond"""
+        self._closed = True
+        for task in (self._health_task, self._supervisor):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._health_task = None
+        self._supervisor = None
+        if self._attempt is not None and not self._attempt.done():
+            self._attempt.set_result(False)
+        connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.on_disconnect = None
+            await conn.close()
+        self.state = STATE_IDLE
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+# Classes de priorité : la plus petite valeur passe en premier
+PRIORITY_PLAYER = 0       # Actions demandées par un joueur (starter pack, items...)
+PRIORITY_NORMAL = 1       # Commandes d'administration, appels sans priorité précisée
+PRIORITY_BACKGROUND = 2   # Sondages périodiques (suivi des joueurs, surveillance)
+PRIORITIES = (PRIORITY_PLAYER, PRIORITY_NORMAL, PRIORITY_BACKGROUND)
+
+
+class TokenBucket:
+    """Seau à jetons : rate commandes par seconde en moyenne, burst d'affilée au plus"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Temps d'attente avant le prochain jeton disponible (0 si disponible)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class RCONScheduler:
+    """Ordonnanceur des commandes RCON : priorités, débit limité et file équitable.
+
+    Chaque commande est placée dans la file de sa classe de priorité, sous
+    une clé (joueur, module...). La classe la plus prioritaire est toujours
+    servie d'abord ; à l'intérieur d'une classe, les clés sont servies à tour
+    de rôle pour qu'un joueur qui envoie beaucoup de commandes ne bloque pas
+    les autres. Une commande ne part que si le seau à jetons le permet ; elle
+    n'attend pas la fin de la précédente (les connexions sont multiplexées).
+    """
+
+    def __init__(self, rate=5.0, burst=10):
+        self.bucket = TokenBucket(rate, burst)
+        self.counters = defaultdict(int)   # Commandes envoyées par classe, attentes dues au débit
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}  # clé -> deque
+        self._queued = 0
+        self._wakeup = None
+        self._task = None
+        self._running = set()              # Commandes envoyées, en attente de réponse
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _ensure_running(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch())
+
+    async def submit(self, run, priority=PRIORITY_NORMAL, key=None):
+        """Planifie run() (coroutine qui envoie la commande) et retourne son résultat"""
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        queues = self._queues.get(priority, self._queues[PRIORITY_NORMAL])
+        queues.setdefault(key, deque()).append((run, future))
+        self._queued += 1
+        self._wakeup.set()
+        return await future
+
+    def promote(self, key, priority) -> int:
+        """Passe dans la classe priority les commandes de key qui attendent dans une classe moins prioritaire"""
+        target = self._queues.get(priority)
+        if target is None:
+            return 0
+        moved = 0
+        for current in PRIORITIES:
+            if current <= priority:
+                continue
+            queue = self._queues[current].pop(key, None)
+            if queue:
+                target.setdefault(key, deque()).extend(queue)
+                moved += len(queue)
+        if moved:
+            self._wakeup.set()
+        return moved
+
+    def _pop(self):
+        """Prochaine commande : classe la plus prioritaire, clés servies à tour de rôle"""
+        for priority in PRIORITIES:
+            queues = self._queues[priority]
+            while queues:
+                key, queue = next(iter(queues.items()))
+                run, future = queue.popleft()
+                self._queued -= 1
+                if queue:
+                    queues.move_to_end(key)
+                else:
+                    del queues[key]
+                if future.done():
+                    # Appelant annulé pendant l'attente
+                    continue
+                self.counters[priority] += 1
+                return run, future
+        return None
+
+    async def _run(self, run, future):
+        try:
+            result = await run()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    async def _dispatch(self):
+        while True:
+            if not self._queued:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self.bucket.delay()
+            if delay:
+                # Réévaluer après l'attente : une commande plus prioritaire a pu arriver
+                self.counters['throttled'] += 1
+                await asyncio.sleep(delay)
+                continue
+            item = self._pop()
+            if item is None:
+                continue
+            self.bucket.take()
+            task = asyncio.create_task(self._run(*item))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def close(self):
+        """Arrête l'ordonnanceur ; les commandes en attente échouent"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queues in self._queues.values():
+            for queue in queues.values():
+                for _, future in queue:
+                    if not future.done():
+                        future.set_exception(ConnectionError("Client RCON fermé"))
+            queues.clear()
+        self._queued = 0
@@ -0,0 +1,112 @@
+import logging
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de cette taille, le téléchargement est déversé dans un fichier temporaire
+DEFAULT_MAX_MEMORY = int(os.getenv('GAME_DB_MAX_MEMORY_MB', '128')) * 1024 * 1024
+
+# Connection.deserialize n'existe qu'à partir de Python 3.11
+HAS_DESERIALIZE = hasattr(sqlite3.Connection, 'deserialize')
+
+
+class SpooledDownload:
+    """Tampon de réception d'un RETR : en mémoire, puis sur disque au-delà d'un seuil.
+
+    S'utilise directement comme callback de retrbinary (méthode write).
+    """
+
+    def __init__(self, max_memory=None):
+        self.max_memory = DEFAULT_MAX_MEMORY if max_memory is None else max_memory
+        if not HAS_DESERIALIZE:
+            self.max_memory = 0
+        self.buffer = bytearray()
+        self.path = None   # Chemin du fichier temporaire une fois déversé
+        self.size = 0
+        self._file = None
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def write(self, data):
+        """Ajoute un bloc reçu"""
+        self.size += len(data)
+        if self._file is not None:
+            self._file.write(data)
+            return
+        self.buffer += data
+        if len(self.buffer) > self.max_memory:
+            self._spill()
+
+    def _spill(self):
+        """Déverse le tampon mémoire dans un fichier temporaire"""
+        # Préfixe conan_db_ pour que clear_cache() puisse nettoyer ces fichiers
+        self._file = tempfile.NamedTemporaryFile(prefix='conan_db_', suffix='.db', delete=False)
+        self.path = self._file.name
+        self._file.write(self.buffer)
+        self.buffer = bytearray()
+        logger.info(f"Téléchargement volumineux déversé sur disque: {self.path}")
+
+    def allocate(self, size):
+        """Réserve size octets pour une réception par plages (téléchargement segmenté).
+
+        Retourne une memoryview du tampon si le fichier tient sous max_memory ;
+        sinon None, et le fichier temporaire (self.path) a déjà cette taille :
+        chaque plage y est écrite à son décalage.
+        """
+        self.size = size
+        if size <= self.max_memory:
+            self.buffer = bytearray(size)
+            return memoryview(self.buffer)
+        self._spill()
+        self._file.truncate(size)
+        self._file.flush()
+        return None
+
+    def reset(self):
+        """Vide le tampon pour recommencer la réception depuis le début"""
+        self.discard()
+        self.size = 0
+
+    def finish(self):
+        """Termine la réception (ferme le fichier temporaire éventuel)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self
+
+    def discard(self):
+        """Libère la mémoire ou supprime le fichier temporaire"""
+        self.finish()
+        self.buffer = bytearray()
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                # Sous Windows, le fichier peut encore être ouvert par une connexion
+                logger.warning(f"Impossible de supprimer {self.path}: {e}")
+            self.path = None
+
+
+def open_readonly(download: SpooledDownload) -> sqlite3.Connection:
+    """Ouvre une connexion SQLite en lecture seule sur un téléchargement terminé"""
+    if not download.in_memory:
+        # immutable=1 : pas de verrou ni de fichiers -wal/-shm à côté du fichier
+        uri = Path(download.path).resolve().as_uri() + '?mode=ro&immutable=1'
+        return sqlite3.connect(uri, uri=True)
+
+    data = download.buffer
+    if len(data) >= 20 and data[18] == 2 and data[19] == 2:
+        # Base en mode WAL : une base en mémoire ne le supporte pas, on repasse
+        # l'en-tête en mode journal classique (octets 18-19 = 1)
+        data[18] = 1
+        data[19] = 1
+
+    conn = sqlite3.connect(':memory:')
+    conn.deserialize(data)
+    conn.execute('PRAGMA query_only = ON')
+    return conn